@@ -7,8 +7,29 @@ from pathlib import Path
 import pandas as pd
 
 
-def summarize(scored_csv: Path) -> pd.DataFrame:
-    df = pd.read_csv(scored_csv)
+def load_scored(results_dir: Path, experiment_id: str) -> tuple[pd.DataFrame, Path]:
+    """
+    Prefer the columnar Parquet partition (results/parquet/scored/experiment_id=<id>),
+    fall back to the scored CSV.
+    """
+    parquet_dir = results_dir / "parquet" / "scored" / f"experiment_id={experiment_id}"
+    if parquet_dir.exists():
+        df = pd.read_parquet(parquet_dir)
+        # partition / dictionary columns come back as categoricals
+        for col in df.columns:
+            if isinstance(df[col].dtype, pd.CategoricalDtype):
+                df[col] = df[col].astype(str)
+        return df, parquet_dir
+
+    scored_csv = results_dir / "scored" / f"scored_{experiment_id}.csv"
+    if not scored_csv.exists():
+        raise FileNotFoundError(f"Could not find: {scored_csv}")
+
+    return pd.read_csv(scored_csv), scored_csv
+
+
+def summarize(scored: Path | pd.DataFrame) -> pd.DataFrame:
+    df = scored if isinstance(scored, pd.DataFrame) else pd.read_csv(scored)
 
     # expected columns in your scored csv
     required = {
@@ -45,12 +66,9 @@ def main():
     args = ap.parse_args()
 
     results_dir = Path(args.results_dir)
-    scored_csv = results_dir / "scored" / f"scored_{args.experiment_id}.csv"
-
-    if not scored_csv.exists():
-        raise FileNotFoundError(f"Could not find: {scored_csv}")
+    scored_df, source = load_scored(results_dir, args.experiment_id)
 
-    summary_df = summarize(scored_csv)
+    summary_df = summarize(scored_df)
 
     # Display to console (no file output)
     pd.set_option("display.max_rows", 500)
@@ -58,7 +76,7 @@ def main():
     pd.set_option("display.width", 140)
 
     print(f"\n=== SUMMARY for experiment {args.experiment_id} ===")
-    print(f"Source: {scored_csv}")
+    print(f"Source: {source}")
     print(summary_df.to_string(index=False))
     print("=== END SUMMARY ===\n")
 
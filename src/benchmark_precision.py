@@ -0,0 +1,204 @@
+# src/benchmark_precision.py
+# Usage: python src/benchmark_precision.py --model mistral-7b --variants fp32,bf16,int8_dynamic
+#
+# Compares precision / quantization variants of one huggingface_local model on a test
+# (default: bfi10_en.json). Every variant runs in a fresh process, so peak RSS is its own.
+# Reports per variant:
+#   - load time, greedy generation tokens/sec
+#   - peak RSS (MB)
+#   - answer-distribution drift vs the first variant (the reference, normally fp32):
+#     scale-value probabilities from one forward pass per item (scoring_mode="logits")
+import argparse
+import json
+import multiprocessing
+import resource
+import time
+from dataclasses import asdict, replace
+from datetime import datetime
+from pathlib import Path
+from typing import Dict, List, Optional, Tuple
+
+from input_loader import ModelDef, load_model, load_persona
+from test_loader import load_test
+
+
+def parse_variant(spec: str) -> Tuple[Optional[str], Optional[str]]:
+    """
+    "fp32" / "bf16" / "int8_dynamic" / "bf16+bnb_4bit" / "default" -> (precision, quantization)
+    """
+    from hf_llm_client import PRECISIONS, QUANTIZATIONS
+
+    precision = quantization = None
+    for part in spec.split("+"):
+        part = part.strip()
+        if part in ("", "default"):
+            continue
+        if part in PRECISIONS:
+            precision = part
+        elif part in QUANTIZATIONS:
+            quantization = part
+        else:
+            raise ValueError(
+                f"Unknown variant part '{part}' (precisions: {sorted(PRECISIONS)}, quantizations: {QUANTIZATIONS})"
+            )
+    return precision, quantization
+
+
+def _bench_variant(
+    model_fields: Dict,
+    variant: str,
+    test_file: str,
+    persona_id: str,
+    repeat: int,
+    batch_size: int,
+) -> Dict:
+    """
+    Runs in a fresh process: load, greedy generation (throughput), logits pass (distribution).
+    """
+    from experiment_runner import build_system_prompt
+    from hf_llm_client import (
+        _generate_batch,
+        _get_model_pipeline,
+        _messages_to_prompt,
+        _parse_reply,
+        score_hf_local_logits_batch,
+    )
+
+    precision, quantization = parse_variant(variant)
+    model = replace(ModelDef(**model_fields), precision=precision, quantization=quantization)
+
+    test_def = load_test(test_file)
+    scale = (int(test_def.scale_min), int(test_def.scale_max))
+    system_prompt = build_system_prompt(load_persona(persona_id), *scale)
+    messages_list = [
+        [{"role": "system", "content": system_prompt}, {"role": "user", "content": item.text}]
+        for item in test_def.items
+    ]
+
+    started = time.perf_counter()
+    pipe = _get_model_pipeline(model)
+    load_s = time.perf_counter() - started
+
+    tokenizer = pipe.tokenizer
+    rows = [
+        tokenizer(_messages_to_prompt(messages, scale), add_special_tokens=True)["input_ids"]
+        for messages in messages_list
+    ] * max(1, repeat)
+
+    started = time.perf_counter()
+    gens = _generate_batch(pipe, rows, batch_size=batch_size, do_sample=False, max_new_tokens=12)
+    gen_s = time.perf_counter() - started
+    new_tokens = sum(len(tokenizer(g, add_special_tokens=False)["input_ids"]) for g in gens)
+
+    scored = score_hf_local_logits_batch(model, messages_list, temperature=0.0, batch_size=batch_size, scale=scale)
+
+    return {
+        "variant": variant,
+        "precision": precision,
+        "quantization": quantization,
+        "load_s": round(load_s, 2),
+        "generate_s": round(gen_s, 2),
+        "new_tokens": new_tokens,
+        "tokens_per_s": round(new_tokens / gen_s, 2) if gen_s > 0 else None,
+        # Linux: ru_maxrss is in KB
+        "peak_rss_mb": round(resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024, 1),
+        "item_ids": [item.id for item in test_def.items],
+        "generated": [_parse_reply(g, scale) for g in gens[: len(messages_list)]],
+        "probs": [probs for _answer, probs in scored],
+        "scale_min": scale[0],
+    }
+
+
+def drift(reference: Dict, other: Dict) -> Dict:
+    """
+    Per-item answer-distribution drift of `other` vs `reference`.
+    """
+    tvds: List[float] = []
+    shifts: List[float] = []
+    same_argmax = 0
+
+    for p, q in zip(reference["probs"], other["probs"]):
+        tvds.append(0.5 * sum(abs(a - b) for a, b in zip(p, q)))
+        values = range(reference["scale_min"], reference["scale_min"] + len(p))
+        shifts.append(abs(sum(v * a for v, a in zip(values, p)) - sum(v * b for v, b in zip(values, q))))
+        same_argmax += int(max(range(len(p)), key=p.__getitem__) == max(range(len(q)), key=q.__getitem__))
+
+    n = max(1, len(tvds))
+    same_generated = sum(a == b for a, b in zip(reference["generated"], other["generated"]))
+
+    return {
+        "mean_tvd": round(sum(tvds) / n, 4),
+        "max_tvd": round(max(tvds, default=0.0), 4),
+        "mean_expected_shift": round(sum(shifts) / n, 4),
+        "argmax_agreement": round(same_argmax / n, 3),
+        "generated_agreement": round(same_generated / max(1, len(reference["generated"])), 3),
+    }
+
+
+def main():
+    ap = argparse.ArgumentParser(description="Precision / quantization benchmark for a huggingface_local model")
+    ap.add_argument("--model", required=True, help="model id (data/models/<id>.json)")
+    ap.add_argument(
+        "--variants",
+        default="fp32,bf16,int8_dynamic",
+        help="comma-separated; the first is the reference (e.g. fp32,bf16,int8_dynamic,bf16+bnb_4bit)",
+    )
+    ap.add_argument("--test-file", default="data/tests/bfi10_en.json")
+    ap.add_argument("--persona", default="neutral", help="persona id for the system prompt")
+    ap.add_argument("--repeat", type=int, default=3, help="generation passes over the items (throughput)")
+    ap.add_argument("--batch-size", type=int, default=8)
+    ap.add_argument("--out-dir", default="results/benchmarks")
+    args = ap.parse_args()
+
+    model = load_model(args.model)
+    if model.provider != "huggingface_local":
+        raise ValueError(f"Model '{model.id}' is not huggingface_local (provider={model.provider}).")
+
+    variants = [v.strip() for v in args.variants.split(",") if v.strip()]
+    for v in variants:
+        parse_variant(v)
+
+    # one fresh process per variant: peak RSS and the model load are per variant
+    ctx = multiprocessing.get_context("spawn")
+    results: List[Dict] = []
+    for variant in variants:
+        print(f"-- {model.id} [{variant}] ...", flush=True)
+        with ctx.Pool(1, maxtasksperchild=1) as pool:
+            results.append(
+                pool.apply(
+                    _bench_variant,
+                    (asdict(model), variant, args.test_file, args.persona, args.repeat, args.batch_size),
+                )
+            )
+
+    reference = results[0]
+    print(f"\n=== PRECISION BENCHMARK: {model.id} on {Path(args.test_file).name} (reference: {reference['variant']}) ===")
+    header = f"{'variant':<20}{'load s':>8}{'tok/s':>9}{'peak RSS MB':>13}{'mean TVD':>10}{'max TVD':>9}{'E shift':>9}{'argmax =':>10}{'gen =':>7}"
+    print(header)
+    print("-" * len(header))
+
+    for r in results:
+        r["drift"] = drift(reference, r)
+        d = r["drift"]
+        print(
+            f"{r['variant']:<20}{r['load_s']:>8}{str(r['tokens_per_s']):>9}{r['peak_rss_mb']:>13}"
+            f"{d['mean_tvd']:>10}{d['max_tvd']:>9}{d['mean_expected_shift']:>9}"
+            f"{d['argmax_agreement']:>10}{d['generated_agreement']:>7}"
+        )
+
+    out_dir = Path(args.out_dir)
+    out_dir.mkdir(parents=True, exist_ok=True)
+    out = out_dir / f"precision_{model.id}_{datetime.utcnow().strftime('%Y%m%dT%H%M%S')}.json"
+    out.write_text(
+        json.dumps(
+            {"model": asdict(model), "test_file": args.test_file, "persona": args.persona, "results": results},
+            ensure_ascii=False,
+            indent=2,
+        ),
+        encoding="utf-8",
+    )
+    print(f"\nSaved: {out}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,167 @@
+# src/benchmark_startup.py
+# Usage: python src/benchmark_startup.py [--repeat 3] [--baseline results/benchmarks/startup_<ts>.json]
+#
+# Startup (import) cost of every entry point, measured with `python -X importtime`
+# in a fresh interpreter per run. Reports per entry point:
+#   - import wall time (median over --repeat runs)
+#   - the heaviest top-level packages it pulls in (cumulative import time)
+#   - whether heavy optional dependencies (torch, transformers, ...) got imported
+# With --baseline, also the change vs an earlier run of this script.
+import argparse
+import json
+import statistics
+import subprocess
+import sys
+import time
+from datetime import datetime
+from pathlib import Path
+from typing import Dict, List, Optional, Tuple
+
+SRC_DIR = Path(__file__).resolve().parent
+
+# entry point -> module imported (importing must not run the entry point's main)
+ENTRY_POINTS = {
+    "run_experiment": "run_experiment",
+    "analyze_experiment": "analyze_experiment",
+    "create_persona": "create_persona",
+    "ui_biasmind": "ui_biasmind",
+    "model_daemon": "model_daemon",
+    "benchmark_precision": "benchmark_precision",
+}
+
+# should only be imported on the first real call of a provider / output format
+HEAVY_PACKAGES = ("torch", "transformers", "gradio", "pyarrow", "pandas", "httpx")
+
+
+def parse_importtime(stderr: str) -> Tuple[int, Dict[str, int]]:
+    """
+    `-X importtime` lines -> (total µs, {top-level package: cumulative µs}).
+
+    A package's time is the cumulative time of its outermost imports, wherever in the
+    import tree they happen (e.g. torch pulled in by hf_llm_client via llm_router).
+    """
+    # (level, package, cumulative µs) in output order: a module is printed after its imports
+    nodes: List[Tuple[int, str, int]] = []
+    for line in stderr.splitlines():
+        if not line.startswith("import time:") or "|" not in line:
+            continue
+        _self_us, cumulative_us, name = line[len("import time:"):].split("|", 2)
+        if not cumulative_us.strip().isdigit():
+            continue  # header line
+        # one leading space, plus two per nesting level
+        level = (len(name) - len(name.lstrip()) - 1) // 2
+        nodes.append((level, name.strip().split(".")[0], int(cumulative_us)))
+
+    # rebuild the tree: the children of a node are the pending nodes one level deeper
+    pending: Dict[int, List] = {}
+    roots: List = []
+    for level, package, us in nodes:
+        node = (package, us, pending.pop(level + 1, []))
+        (pending.setdefault(level, []) if level > 0 else roots).append(node)
+
+    packages: Dict[str, int] = {}
+
+    def _walk(node, inside: frozenset) -> None:
+        package, us, children = node
+        if package not in inside:
+            packages[package] = packages.get(package, 0) + us
+        for child in children:
+            _walk(child, inside | {package})
+
+    for root in roots:
+        _walk(root, frozenset())
+
+    return sum(us for _package, us, _children in roots), packages
+
+
+def measure(module: str, python: str = sys.executable) -> Dict:
+    started = time.perf_counter()
+    proc = subprocess.run(
+        [python, "-X", "importtime", "-c", f"import {module}"],
+        cwd=SRC_DIR,
+        capture_output=True,
+        text=True,
+    )
+    wall_s = time.perf_counter() - started
+
+    error: Optional[str] = None
+    if proc.returncode != 0:
+        lines = [l for l in proc.stderr.splitlines() if not l.startswith("import time:")]
+        error = lines[-1] if lines else f"exit code {proc.returncode}"
+
+    total_us, packages = parse_importtime(proc.stderr)
+    # the entry point module itself holds everything it imports
+    packages.pop(module, None)
+    return {
+        "wall_s": round(wall_s, 3),
+        "import_ms": round(total_us / 1000, 1),
+        "packages_ms": {k: round(v / 1000, 1) for k, v in sorted(packages.items(), key=lambda kv: -kv[1])},
+        "heavy": [p for p in HEAVY_PACKAGES if p in packages],
+        "error": error,
+    }
+
+
+def bench_entry_point(module: str, repeat: int) -> Dict:
+    runs = [measure(module) for _ in range(max(1, repeat))]
+    # the run with the median import time, so that its package breakdown is consistent
+    runs.sort(key=lambda r: r["import_ms"])
+    result = runs[len(runs) // 2]
+    result["import_ms_runs"] = [r["import_ms"] for r in runs]
+    result["import_ms_median"] = statistics.median(r["import_ms"] for r in runs)
+    return result
+
+
+def main():
+    ap = argparse.ArgumentParser(description="Import-time benchmark of the BiasMind entry points")
+    ap.add_argument(
+        "--entry-points",
+        default=",".join(ENTRY_POINTS),
+        help=f"comma-separated subset of: {', '.join(ENTRY_POINTS)}",
+    )
+    ap.add_argument("--repeat", type=int, default=3, help="fresh interpreters per entry point (median)")
+    ap.add_argument("--top", type=int, default=5, help="heaviest packages shown per entry point")
+    ap.add_argument("--baseline", help="earlier startup_<ts>.json to compare against")
+    ap.add_argument("--out-dir", default="results/benchmarks")
+    args = ap.parse_args()
+
+    names = [n.strip() for n in args.entry_points.split(",") if n.strip()]
+    unknown = [n for n in names if n not in ENTRY_POINTS]
+    if unknown:
+        raise ValueError(f"Unknown entry points: {unknown} (known: {list(ENTRY_POINTS)})")
+
+    baseline: Dict = {}
+    if args.baseline:
+        baseline = json.loads(Path(args.baseline).read_text(encoding="utf-8"))["entry_points"]
+
+    results: Dict[str, Dict] = {}
+    print("=== STARTUP BENCHMARK (python -X importtime) ===")
+    header = f"{'entry point':<22}{'import ms':>11}{'vs base':>10}  heaviest packages (ms)"
+    print(header)
+    print("-" * (len(header) + 30))
+
+    for name in names:
+        r = bench_entry_point(ENTRY_POINTS[name], args.repeat)
+        results[name] = r
+
+        delta = ""
+        if name in baseline:
+            delta = f"{r['import_ms_median'] - baseline[name]['import_ms_median']:+.0f}"
+        top = ", ".join(f"{p} {ms:.0f}" for p, ms in list(r["packages_ms"].items())[: args.top])
+        print(f"{name:<22}{r['import_ms_median']:>11.0f}{delta:>10}  {top}")
+        if r["heavy"]:
+            print(f"{'':<22}  heavy: {', '.join(r['heavy'])}")
+        if r["error"]:
+            print(f"{'':<22}  import failed: {r['error']}")
+
+    out_dir = Path(args.out_dir)
+    out_dir.mkdir(parents=True, exist_ok=True)
+    out = out_dir / f"startup_{datetime.utcnow().strftime('%Y%m%dT%H%M%S')}.json"
+    out.write_text(
+        json.dumps({"python": sys.version, "repeat": args.repeat, "entry_points": results}, indent=2),
+        encoding="utf-8",
+    )
+    print(f"\nSaved: {out}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,137 @@
+from pathlib import Path
+from typing import Dict, List, Optional
+import json
+import os
+
+
+class ExperimentJournal:
+    """
+    Append-only journal των ολοκληρωμένων βημάτων ενός experiment:
+      results/checkpoints/journal_<experiment_id>.jsonl
+
+    - 1η γραμμή: {"config": ...} (fingerprint του ExperimentConfig)
+    - κάθε επόμενη: ένα (model, lane, item) βήμα με το reply, τα probs και το raw row
+
+    Στο resume, τα βήματα του journal ξαναπαίζονται χωρίς κλήση στο μοντέλο:
+    τα replies ξαναχτίζουν το run_context / carry_over seed ακριβώς όπως ήταν.
+    """
+
+    def __init__(
+        self,
+        experiment_id: str,
+        fingerprint: Dict,
+        resume: bool = False,
+        base_dir: str | Path = "results/checkpoints",
+        fsync_every: int = 50,
+    ):
+        base_dir = Path(base_dir)
+        base_dir.mkdir(parents=True, exist_ok=True)
+
+        self.path = base_dir / f"journal_{experiment_id}.jsonl"
+        self.fsync_every = max(1, int(fsync_every))
+        self._entries: Dict[str, Dict] = {}
+        self._since_fsync = 0
+
+        if resume:
+            if not self.path.exists():
+                raise FileNotFoundError(f"Δεν βρέθηκε journal για resume: {self.path}")
+
+            self._load(fingerprint)
+            self._f = self.path.open("a", encoding="utf-8")
+        else:
+            self._f = self.path.open("w", encoding="utf-8")
+            self._write({"config": fingerprint})
+
+    @staticmethod
+    def stored_config(experiment_id: str, base_dir: str | Path = "results/checkpoints") -> Optional[Dict]:
+        """
+        Το fingerprint (1η γραμμή) ενός υπάρχοντος journal, ή None (π.χ. για το seed στο resume).
+        """
+        path = Path(base_dir) / f"journal_{experiment_id}.jsonl"
+        try:
+            with path.open("r", encoding="utf-8") as f:
+                return json.loads(f.readline()).get("config")
+        except (OSError, json.JSONDecodeError, AttributeError):
+            return None
+
+    def _load(self, fingerprint: Dict) -> None:
+        with self.path.open("r", encoding="utf-8") as f:
+            lines = f.read().splitlines()
+
+        for n, line in enumerate(lines):
+            if not line.strip():
+                continue
+            try:
+                entry = json.loads(line)
+            except json.JSONDecodeError:
+                # μισογραμμένη τελευταία γραμμή (crash πάνω στο write)
+                if n == len(lines) - 1:
+                    break
+                raise
+
+            if "config" in entry:
+                if entry["config"] != fingerprint:
+                    raise ValueError(
+                        f"Το journal {self.path} ανήκει σε διαφορετικό config· "
+                        "το resume χρειάζεται τα ίδια test / models / personas / memory / sampling."
+                    )
+                continue
+
+            self._entries[entry["key"]] = entry
+
+        # κόβουμε τη μισή γραμμή, αν υπάρχει, ώστε τα νέα entries να ξεκινούν καθαρά
+        with self.path.open("w", encoding="utf-8") as f:
+            f.write(json.dumps({"config": fingerprint}, ensure_ascii=False) + "\n")
+            for entry in self._entries.values():
+                f.write(json.dumps(entry, ensure_ascii=False) + "\n")
+
+    def _write(self, obj: Dict) -> None:
+        self._f.write(json.dumps(obj, ensure_ascii=False) + "\n")
+        self._f.flush()
+
+        self._since_fsync += 1
+        if self._since_fsync >= self.fsync_every:
+            os.fsync(self._f.fileno())
+            self._since_fsync = 0
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def lookup(self, key: str) -> Optional[Dict]:
+        return self._entries.get(key)
+
+    def entries(self, prefix: str = "") -> Dict[str, Dict]:
+        """
+        Τα journaled βήματα με key που ξεκινά από prefix (π.χ. "<model_id>|").
+        """
+        return {key: entry for key, entry in self._entries.items() if key.startswith(prefix)}
+
+    def record(self, key: str, reply: str, probs: Optional[List[float]], row: Dict) -> None:
+        self._write({"key": key, "reply": reply, "probs": probs, "row": row})
+
+    def close(self) -> None:
+        self._f.flush()
+        os.fsync(self._f.fileno())
+        self._f.close()
+
+
+class JournalBuffer:
+    """
+    Journal στη μνήμη, για ένα shard lanes σε worker process (--workers):
+    - lookup: τα βήματα του πραγματικού journal (resume), όπως δόθηκαν από τον parent
+    - record: τα νέα βήματα κρατιούνται στο self.records και τα γράφει ο parent
+      στο ExperimentJournal όταν επιστρέψει το shard
+    """
+
+    def __init__(self, entries: Optional[Dict[str, Dict]] = None):
+        self._entries: Dict[str, Dict] = dict(entries or {})
+        self.records: List[Dict] = []
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def lookup(self, key: str) -> Optional[Dict]:
+        return self._entries.get(key)
+
+    def record(self, key: str, reply: str, probs: Optional[List[float]], row: Dict) -> None:
+        self.records.append({"key": key, "reply": reply, "probs": probs, "row": row})
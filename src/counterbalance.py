@@ -0,0 +1,129 @@
+"""
+Counterbalancing της σειράς των items: κάθε run (lane) ρωτά τα items ενός test
+με τη δική του σειρά, ώστε τα order effects να μη μπλέκονται με τα persona effects
+(κυρίως σε continuous / carry_over, όπου οι προηγούμενες απαντήσεις μένουν στο context).
+
+Σειρές (ExperimentConfig.item_order / --item-order):
+- "file"    -> η σειρά του test JSON (όπως πριν)
+- "reverse" -> ανάποδα
+- "random"  -> τυχαία μετάθεση ανά (test, persona, run), από το seed του experiment
+- "latin"   -> balanced Latin square (Williams): το run r παίρνει τη γραμμή (r-1) mod k,
+               με k = n items (n ζυγό) ή 2n (n μονό). Με runs πολλαπλάσιο του k, κάθε item
+               εμφανίζεται το ίδιο συχνά σε κάθε θέση και μετά από κάθε άλλο item.
+
+Η σειρά δεν εξαρτάται από το μοντέλο: ίδιο (test, persona, run) -> ίδια σειρά σε όλα τα
+μοντέλα, άρα οι διαφορές ανάμεσα σε μοντέλα δεν είναι διαφορές σειράς.
+
+Κάθε μετάθεση είναι απλώς τα items ενός lane (Lane.items), άρα τα fresh runs με
+διαφορετικές σειρές είναι ανεξάρτητα lanes και μπαίνουν στα ίδια batched ticks (και
+στους workers του --workers): k σειρές κοστίζουν όσο k runs με τη σειρά του αρχείου.
+"""
+
+from typing import Dict, List, Optional, Tuple
+import hashlib
+import random
+
+from lane_scheduler import Lane
+
+
+ITEM_ORDERS = ("file", "reverse", "random", "latin")
+
+
+def williams_square(n: int) -> List[List[int]]:
+    """
+    Balanced Latin square n × n (Williams design) για n ζυγό· για n μονό, οι n γραμμές
+    και οι ανάποδές τους (2n γραμμές). Κάθε γραμμή είναι μια μετάθεση των 0..n-1.
+    """
+    if n <= 0:
+        return [[]]
+
+    # 1η γραμμή: 0, 1, n-1, 2, n-2, ...
+    first = [0]
+    lo, hi = 1, n - 1
+    while len(first) < n:
+        if len(first) % 2 == 1:
+            first.append(lo)
+            lo += 1
+        else:
+            first.append(hi)
+            hi -= 1
+
+    rows = [[(x + r) % n for x in first] for r in range(n)]
+    if n % 2 == 1:
+        rows += [row[::-1] for row in rows]
+    return rows
+
+
+def _order_rng(seed: int, test_name: str, persona_id: str, run_index: int) -> random.Random:
+    payload = f"{int(seed)}|item_order|{test_name}|{persona_id}|{int(run_index)}"
+    return random.Random(hashlib.sha256(payload.encode("utf-8")).digest())
+
+
+def item_permutation(
+    order: str,
+    n_items: int,
+    test_name: str,
+    persona_id: str,
+    run_index: int,
+    seed: Optional[int] = None,
+    square: Optional[List[List[int]]] = None,
+) -> Tuple[List[int], str]:
+    """
+    (θέσεις των items του test με τη σειρά που ρωτιούνται, label για τη στήλη item_order).
+    """
+    if order == "file":
+        return list(range(n_items)), "file"
+
+    if order == "reverse":
+        return list(range(n_items))[::-1], "reverse"
+
+    if order == "random":
+        if seed is None:
+            raise ValueError("item_order='random' χρειάζεται seed (το seed του experiment).")
+        perm = list(range(n_items))
+        _order_rng(seed, test_name, persona_id, run_index).shuffle(perm)
+        return perm, "random"
+
+    if order == "latin":
+        square = square if square is not None else williams_square(n_items)
+        row = (int(run_index) - 1) % len(square)
+        return list(square[row]), f"latin:{row + 1}"
+
+    raise ValueError(f"item_order πρέπει να είναι ένα από {ITEM_ORDERS}, όχι '{order}'")
+
+
+def latin_orders(n_items: int) -> int:
+    """
+    Πόσες σειρές (γραμμές) έχει το Latin square ενός test με n_items.
+    """
+    return len(williams_square(n_items))
+
+
+def apply_item_order(lanes: List[Lane], order: str, seed: Optional[int] = None) -> None:
+    """
+    Βάζει σε κάθε lane τα items του με τη σειρά του (Lane.items, Lane.item_order).
+    """
+    if order not in ITEM_ORDERS:
+        raise ValueError(f"item_order πρέπει να είναι ένα από {ITEM_ORDERS}, όχι '{order}'")
+    if order == "file":
+        return
+
+    # ένα square ανά πλήθος items (τα lanes ενός test μοιράζονται το ίδιο)
+    squares: Dict[int, List[List[int]]] = {}
+
+    for lane in lanes:
+        n = len(lane.items)
+        if order == "latin" and n not in squares:
+            squares[n] = williams_square(n)
+
+        perm, label = item_permutation(
+            order,
+            n,
+            lane.test_name,
+            lane.persona.id,
+            lane.run_index,
+            seed=seed,
+            square=squares.get(n),
+        )
+        lane.items = [lane.items[i] for i in perm]
+        lane.item_order = label
@@ -1,14 +1,42 @@
-from dataclasses import dataclass
+from contextlib import ExitStack
+from dataclasses import dataclass, replace
 from pathlib import Path
 from typing import List, Dict, Optional, Tuple
 from datetime import datetime
+import asyncio
+import json
 import re
 import os
 
 from input_loader import ModelDef, PersonaDef
 from test_loader import load_test, TestDefinition
-from results_io import write_metadata_json, write_raw_csv, write_scored_csv
-from llm_router import call_model
+from results_io import (
+    MetadataWriter,
+    open_raw_csv_writer,
+    open_scored_csv_writer,
+    open_raw_parquet_writer,
+    open_scored_parquet_writer,
+)
+from llm_router import (
+    BATCHED_PROVIDERS,
+    acall_model,
+    aclose_clients,
+    call_model_batch,
+    generated_tokens,
+    plan_model_sweep,
+    score_model_batch,
+)
+from response_cache import ResponseCache, open_response_cache
+from checkpoint import ExperimentJournal, JournalBuffer
+from scoring import ScoringEngine
+from lane_scheduler import Lane, LaneScheduler, build_lanes
+from counterbalance import ITEM_ORDERS, apply_item_order, latin_orders
+from parallel_runner import open_lane_pool, run_shards, shard_lanes
+from seeding import derive_seed, new_base_seed
+from progress import ProgressReporter
+import profiling
+from profiling import ExperimentProfile, timer
+from job_queue import raise_if_cancelled
 
 
 @dataclass
@@ -19,14 +47,35 @@ class PersonaRunConfig:
 
 
 @dataclass
-class ExperimentConfig:
-    experiment_id: str
+class TestSpec:
     test_name: str
     test_file: Path
+
+
+@dataclass
+class ExperimentConfig:
+    experiment_id: str
+    tests: List[TestSpec]  # ένα ή περισσότερα tests, με ένα φόρτωμα κάθε μοντέλου
     models: List[ModelDef]
     personas: List[PersonaRunConfig]
     memory_between_personas: str  # "reset" ή "carry_over"
     temperature: float = 0.7
+    seed: Optional[int] = None  # seed του experiment (None = τυχαίο, γράφεται στο metadata)
+    seed_explicit: bool = False  # το seed δόθηκε από τον χρήστη (το θέτει το run_experiment)· μόνο τότε μπαίνει στο key της cache
+    batch_size: int = 8  # πόσα ανεξάρτητα dialogues ανά generate() call
+    prefix_cache_mb: int = 0  # budget για prefix KV-cache reuse (0 = off)
+    cache_mode: str = "off"  # "off", "read" ή "readwrite" (ResponseCache στο results/cache)
+    cache_max_mb: int = 512
+    parquet: bool = False  # επιπλέον Parquet output στο results/parquet (χρειάζεται pyarrow)
+    resume: bool = False  # συνέχεια από το journal του ίδιου experiment_id
+    scoring_mode: str = "generate"  # "generate", "constrained" (μόνο tokens κλίμακας) ή "logits" (ένα forward pass)
+    item_order: str = "file"  # "file", "reverse", "random" ή "latin": σειρά των items ανά run (βλ. counterbalance.py)
+    max_in_flight: int = 8  # remote providers: πόσα requests (από διαφορετικά lanes) ταυτόχρονα
+    workers: int = 1  # huggingface_local: processes για ανεξάρτητα lanes (1 = στο ίδιο process)
+    torch_threads: int = 0  # torch threads ανά worker (0 = cores / workers)
+    model_ram_mb: int = 0  # RAM budget για φορτωμένα μοντέλα ανά process (0 = μέρος της RAM)
+    progress: bool = False  # JSON-lines progress events στο stdout (βλ. progress.py)
+    profile: str = "off"  # "off", "timers" ή "cprofile" -> results/metadata/profile_<id>.json (βλ. profiling.py)
 
 
 def _now_iso() -> str:
@@ -41,85 +90,341 @@ def _infer_scale_from_test(test_def: TestDefinition) -> Tuple[int, int]:
     return 1, 5
 
 
-def _parse_likert_answer(text: str, min_val: int, max_val: int) -> int:
+def _load_tests(config: ExperimentConfig) -> Dict[str, TestDefinition]:
     """
-    Robust Likert parsing:
-    - βρίσκει όλους τους ακέραιους στο text
-    - κρατά τον τελευταίο εντός scale
-    - fallback στο midpoint
+    test_name -> TestDefinition, με τη σειρά του config.tests.
+    """
+    if not config.tests:
+        raise ValueError("Το experiment χρειάζεται τουλάχιστον ένα test.")
+
+    tests: Dict[str, TestDefinition] = {}
+    for spec in config.tests:
+        if spec.test_name in tests:
+            raise ValueError(f"Το test_name '{spec.test_name}' δίνεται δύο φορές· τα rows κρατιούνται ανά test_name.")
+        tests[spec.test_name] = load_test(spec.test_file)
+    return tests
+
+
+def _config_fingerprint(config: ExperimentConfig) -> Dict:
+    """
+    Ό,τι καθορίζει τα βήματα / replies ενός experiment (για έλεγχο στο resume).
+    """
+    return {
+        "tests": [[t.test_name, str(t.test_file)] for t in config.tests],
+        "models": [m.id for m in config.models],
+        "personas": [
+            [p.persona.id, p.runs, p.memory_within_persona]
+            for p in config.personas
+        ],
+        "memory_between_personas": config.memory_between_personas,
+        "temperature": config.temperature,
+        "seed": config.seed,
+        "scoring_mode": config.scoring_mode,
+        "item_order": config.item_order,
+    }
+
+
+def build_system_prompt(persona: PersonaDef, scale_min: int, scale_max: int) -> str:
+    return (
+        f"{persona.prompt_prefix} "
+        "You are answering a psychometric questionnaire. "
+        f"Use the following scale: {scale_min} = Strongly DISAGREE, {scale_max} = Strongly AGREE. "
+        f"Always answer ONLY with a single integer number from {scale_min} to {scale_max}."
+    )
+
+
+def _find_likert_answer(text: str, min_val: int, max_val: int) -> Optional[int]:
+    """
+    Ο τελευταίος ακέραιος του text εντός scale, ή None (parse failure).
     """
     text = (text or "").strip()
     ints = [int(m.group(0)) for m in re.finditer(r"-?\d+", text)]
     in_range = [x for x in ints if min_val <= x <= max_val]
 
-    if in_range:
-        return in_range[-1]
+    return in_range[-1] if in_range else None
 
-    return (min_val + max_val) // 2
+
+def _parse_likert_answer(text: str, min_val: int, max_val: int) -> int:
+    """
+    Robust Likert parsing:
+    - βρίσκει όλους τους ακέραιους στο text
+    - κρατά τον τελευταίο εντός scale
+    - fallback στο midpoint
+    """
+    found = _find_likert_answer(text, min_val, max_val)
+    return (min_val + max_val) // 2 if found is None else found
 
 
 def _compute_scored_rows(
     test_def: TestDefinition,
     raw_rows: List[Dict],
 ) -> List[Dict]:
-    scored_rows: List[Dict] = []
-    if not raw_rows:
-        return scored_rows
-
-    scale_min, scale_max = _infer_scale_from_test(test_def)
-
-    grouped: Dict[tuple, List[Dict]] = {}
-    for row in raw_rows:
-        key = (
-            row["model"],
-            row["provider"],
-            row["persona_id"],
-            row["run_index"],
-            row["test_name"],
-        )
-        grouped.setdefault(key, []).append(row)
-
-    for (model, provider, persona_id, run_index, test_name), rows in grouped.items():
-        trait_values: Dict[str, List[float]] = {}
-
-        for r in rows:
-            trait = r["trait"]
-            ans = int(r["answer"])
-            rev = r["reverse"]
-
-            is_rev = (
-                rev is True
-                or rev == "true"
-                or rev == "True"
-                or rev == 1
-                or rev == "1"
-            )
+    """
+    Βαθμολογεί raw rows σύμφωνα με τα scoring rules του test (βλ. scoring.ScoringEngine).
+    Για πολλά batches του ίδιου test, φτιάξε μία φορά το ScoringEngine και κάλεσε score_rows.
+    """
+    return ScoringEngine(test_def).score_rows(raw_rows)
 
-            if is_rev:
-                adj = scale_min + scale_max - ans
-            else:
-                adj = ans
-
-            trait_values.setdefault(trait, []).append(adj)
-
-        for trait, vals in trait_values.items():
-            mean_val = sum(vals) / len(vals) if vals else 0.0
-            scored_rows.append(
-                {
-                    "model": model,
-                    "provider": provider,
-                    "persona_id": persona_id,
-                    "run_index": run_index,
-                    "test_name": test_name,
-                    "score_name": trait,
-                    "score_kind": "trait",
-                    "score_value": round(mean_val, 3),
-                    "score_normalized": "",
-                    "summary_label": "",
-                }
+
+class LaneSteps:
+    """
+    Τα βήματα ενός lane για ένα experiment: κλήση στο μοντέλο (batched ή async),
+    raw row ανά απάντηση, journal (record / replay στο resume) και response cache.
+
+    Το χρησιμοποιούν ο runner και οι workers του --workers (βλ. run_lane_shard).
+    """
+
+    def __init__(
+        self,
+        config: ExperimentConfig,
+        tests: Dict[str, TestDefinition],
+        cache: Optional[ResponseCache],
+        journal,
+        debug_ctx: bool = False,
+        progress: Optional[ProgressReporter] = None,
+    ):
+        self.config = config
+        # test_name -> (scale_min, scale_max)· τα items κάθε lane είναι στο lane.items
+        self.scales = {name: _infer_scale_from_test(test_def) for name, test_def in tests.items()}
+        self.cache = cache
+        self.journal = journal
+        self.debug_ctx = debug_ctx
+        self.progress = progress
+
+        # scoring_mode="logits": probs του τελευταίου tick ανά lane, για τη στήλη answer_probs
+        self.lane_probs: Dict[int, List[float]] = {}
+        # seed που παρήγαγε την απάντηση του τελευταίου tick ανά lane (στήλη seed)·
+        # για cache hits είναι το seed του run που την έγραψε στην cache
+        self.lane_seeds: Dict[int, Optional[int]] = {}
+
+    @staticmethod
+    def step_key(lane: Lane) -> str:
+        return f"{lane.model.id}|{lane.index}|{lane.persona.id}|{lane.run_index}|{lane.next_item}"
+
+    def seed_for(self, lane: Lane) -> Optional[int]:
+        # seed του τρέχοντος βήματος του lane: ίδιο όπου κι αν τρέξει (batch, task, worker)
+        if self.config.seed is None:
+            return None
+        item = lane.items[lane.next_item]
+        return derive_seed(self.config.seed, lane.model.id, lane.persona.id, lane.run_index, item.id, lane.test_name)
+
+    def make_row(self, lane: Lane, item, reply_text: str) -> Dict:
+        # job της ουράς (UI / daemon) που ακυρώθηκε: σταματά εδώ, το journal κρατά ό,τι έγινε
+        raise_if_cancelled()
+
+        # lane.next_item δείχνει ακόμα στο τρέχον item (το scheduler το αυξάνει μετά)
+        key = self.step_key(lane)
+        probs = self.lane_probs.pop(lane.index, None)
+        seed = self.lane_seeds.pop(lane.index, None)
+        scale_min, scale_max = self.scales[lane.test_name]
+
+        # βήμα από το journal (--resume): μετρά μόνο ως replayed, όχι στα parse_failures
+        # ούτε στα items/sec, αφού δεν έτρεξε σε αυτό το process
+        done = self.journal.lookup(key)
+        if done is not None:
+            if self.progress is not None:
+                self.progress.rows(1, replayed=True)
+            return done["row"]
+
+        with timer("parse.likert"):
+            found = _find_likert_answer(reply_text, scale_min, scale_max)
+
+        if self.progress is not None:
+            self.progress.rows(1, parse_failures=int(found is None))
+
+        answer_val = (scale_min + scale_max) // 2 if found is None else found
+        row = {
+            "model": lane.model.id,
+            "provider": lane.model.provider,
+            "persona_id": lane.persona.id,
+            "run_index": lane.run_index,
+            "test_name": lane.test_name,
+            "question_id": item.id,
+            "question_text": item.text,
+            "trait": item.trait,
+            "reverse": item.reverse,
+            "item_order": lane.item_order,
+            "item_position": lane.next_item + 1,
+            "seed": seed,
+            "answer": answer_val,
+            "answer_probs": "" if probs is None else json.dumps([round(p, 4) for p in probs]),
+            "timestamp_run": _now_iso(),
+        }
+        with timer("journal.record"):
+            self.journal.record(key, reply_text, probs, row)
+        return row
+
+    def print_ctx_debug(self, lane: Lane) -> None:
+        ctx = lane.context
+        item = lane.items[lane.next_item]
+        print("\n" + "-" * 80)
+        print(f"[CTX DEBUG] model={lane.model.id} test={lane.test_name} persona={lane.persona.id} run={lane.run_index} qid={item.id}")
+        print(f"[CTX DEBUG] history_messages={len(ctx)}")
+        if len(ctx) >= 2:
+            print("[CTX DEBUG] last user:", ctx[-2]["content"][:200])
+            print("[CTX DEBUG] last assistant:", ctx[-1]["content"][:200])
+        else:
+            print("[CTX DEBUG] (no prior turns)")
+        print("[CTX DEBUG] current item:", item.text[:200])
+        print("-" * 80 + "\n")
+
+    def generate(self, lanes: List[Lane], messages_list: List[List[Dict]]) -> List[str]:
+        if self.debug_ctx:
+            for lane in lanes:
+                self.print_ctx_debug(lane)
+
+        # lanes από tests με διαφορετική κλίμακα: ένα batched call ανά κλίμακα
+        by_scale: Dict[Tuple[int, int], List[int]] = {}
+        for i, lane in enumerate(lanes):
+            by_scale.setdefault(self.scales[lane.test_name], []).append(i)
+
+        replies: List[str] = [""] * len(lanes)
+        for scale, positions in by_scale.items():
+            generated = self._generate_scale(
+                [lanes[i] for i in positions],
+                [messages_list[i] for i in positions],
+                scale,
             )
+            for i, reply_text in zip(positions, generated):
+                replies[i] = reply_text
+        return replies
+
+    def _generate_scale(
+        self,
+        lanes: List[Lane],
+        messages_list: List[List[Dict]],
+        scale: Tuple[int, int],
+    ) -> List[str]:
+        config = self.config
+        model = lanes[0].model
+
+        if config.scoring_mode == "logits":
+            scored = score_model_batch(
+                model,
+                messages_list,
+                temperature=config.temperature,
+                batch_size=config.batch_size,
+                prefix_cache_mb=config.prefix_cache_mb,
+                cache=self.cache,
+                sample_indices=[lane.run_index for lane in lanes],
+                scale=scale,
+                seeds=self._seeds(lanes),
+                seed_in_key=config.seed_explicit,
+                with_seeds=True,
+            )
+            for lane, (_answer, probs, seed) in zip(lanes, scored):
+                self.lane_probs[lane.index] = probs
+                self.lane_seeds[lane.index] = seed
+            return [answer for answer, _probs, _seed in scored]
+
+        replies = call_model_batch(
+            model,
+            messages_list,
+            temperature=config.temperature,
+            batch_size=config.batch_size,
+            prefix_cache_mb=config.prefix_cache_mb,
+            constrained=config.scoring_mode == "constrained",
+            cache=self.cache,
+            sample_indices=[lane.run_index for lane in lanes],
+            scale=scale,
+            seeds=self._seeds(lanes),
+            seed_in_key=config.seed_explicit,
+            with_seeds=True,
+        )
+        for lane, (_reply, seed) in zip(lanes, replies):
+            self.lane_seeds[lane.index] = seed
+        return [reply for reply, _seed in replies]
+
+    def _seeds(self, lanes: List[Lane]) -> Optional[List[int]]:
+        if self.config.seed is None:
+            return None
+        return [self.seed_for(lane) for lane in lanes]
+
+    def call_batch(self, ready: List[Lane], messages_list: List[List[Dict]]) -> List[str]:
+        # resume: βήματα που υπάρχουν στο journal δεν ξαναστέλνονται στο μοντέλο
+        replies: List[Optional[str]] = [None] * len(ready)
+        pending: List[int] = []
+
+        for i, lane in enumerate(ready):
+            done = self.journal.lookup(self.step_key(lane))
+            if done is None:
+                pending.append(i)
+            else:
+                replies[i] = done["reply"]
+
+        if pending:
+            with timer("lane.tick"):
+                generated = self.generate(
+                    [ready[i] for i in pending],
+                    [messages_list[i] for i in pending],
+                )
+            for i, reply_text in zip(pending, generated):
+                replies[i] = reply_text
+
+        return replies
+
+    async def acall_step(self, lane: Lane, messages: List[Dict]) -> str:
+        done = self.journal.lookup(self.step_key(lane))
+        if done is not None:
+            return done["reply"]
+
+        if self.debug_ctx:
+            self.print_ctx_debug(lane)
+
+        reply, self.lane_seeds[lane.index] = await acall_model(
+            lane.model,
+            messages,
+            temperature=self.config.temperature,
+            cache=self.cache,
+            sample_index=lane.run_index,
+            seed=self.seed_for(lane),
+            seed_in_key=self.config.seed_explicit,
+            with_seed=True,
+        )
+        return reply
+
+
+def run_lane_shard(
+    lanes: List[Lane],
+    config: ExperimentConfig,
+    journal_entries: Dict[str, Dict],
+) -> Tuple[List[Lane], List[Dict], Optional[Dict]]:
+    """
+    Εκτελείται σε worker process (--workers): τρέχει ένα shard ανεξάρτητων lanes
+    με batched ticks και επιστρέφει τα lanes (με τα rows τους), τα νέα journal records
+    και τις μετρήσεις του profiling (None αν είναι κλειστό).
+    """
+    # ο worker ζει για όλο το experiment: μετρήσεις μόνο αυτού του shard
+    profiling.reset()
+    profiling.enable(config.profile != "off")
+
+    debug_ctx = (os.getenv("BIASMIND_DEBUG_CTX") or "").strip().lower() in ("1", "true", "yes", "on")
+
+    tests = _load_tests(config)
+    cache = open_response_cache(config.cache_mode, max_mb=config.cache_max_mb)
+    journal = JournalBuffer(journal_entries)
+
+    model = lanes[0].model
+    plan_model_sweep(
+        config.models[config.models.index(model):],
+        config.model_ram_mb,
+        processes=config.workers,
+    )
+    steps = LaneSteps(config, tests, cache, journal, debug_ctx=debug_ctx)
+
+    done: List[Lane] = []
+    try:
+        for lane in LaneScheduler(lanes).run(steps.call_batch, steps.make_row):
+            done.append(lane)
+    finally:
+        if cache is not None:
+            cache.close()
+
+    # το context δεν χρειάζεται στον parent (τα dependents είναι στο ίδιο shard)
+    for lane in done:
+        lane.context = []
 
-    return scored_rows
+    return done, journal.records, profiling.snapshot() if profiling.enabled() else None
 
 
 def run_experiment(config: ExperimentConfig) -> None:
@@ -132,19 +437,50 @@ def run_experiment(config: ExperimentConfig) -> None:
         reset      -> base_context = []
         carry_over -> base_context = τελικό context προηγούμενης persona (τελευταίο run)
 
+    Execution:
+    - κάθε (model, test, persona, run) είναι ένα dialogue lane (βλ. lane_scheduler)
+    - σε κάθε tick, τα ready lanes ενός μοντέλου (από όλα τα tests) στέλνονται σε ένα batched call
+    - τα rows γράφονται με την ίδια σειρά όπως στο σειριακό model -> test -> persona -> run -> item
+    - πολλά tests: κάθε μοντέλο φορτώνεται μία φορά για όλα· το system prompt μιας persona
+      είναι ίδιο σε όσα tests έχουν την ίδια κλίμακα, άρα τα token ids του (PromptTokens)
+      και το prefix KV-cache του (prefix_cache_mb) ξαναχρησιμοποιούνται από test σε test
+    - workers > 1 (huggingface_local): οι ανεξάρτητες ομάδες lanes μοιράζονται σε
+      processes, και τα rows ξαναμπαίνουν στη σειρά του σειριακού loop
+
     Debug:
     - set BIASMIND_DEBUG_CTX=1 to print context info before each item call
     """
     debug_ctx = (os.getenv("BIASMIND_DEBUG_CTX") or "").strip().lower() in ("1", "true", "yes", "on")
 
-    test_def: TestDefinition = load_test(config.test_file)
-    scale_min, scale_max = _infer_scale_from_test(test_def)
+    if config.seed is None:
+        # resume: το seed του αρχικού run (αλλιώς τα υπόλοιπα βήματα θα είχαν άλλα seeds)
+        stored = ExperimentJournal.stored_config(config.experiment_id) if config.resume else None
+        seed = (stored or {}).get("seed")
+        # τυχαίο seed: όχι στο key της response cache, ώστε ένα ξανατρέξιμο να τη βρίσκει
+        config = replace(config, seed=new_base_seed() if seed is None else seed, seed_explicit=False)
+    else:
+        config = replace(config, seed_explicit=True)
+
+    tests = _load_tests(config)
+    scales = {name: _infer_scale_from_test(test_def) for name, test_def in tests.items()}
+    scoring = {name: ScoringEngine(test_def) for name, test_def in tests.items()}
+    n_items = sum(len(test_def.items) for test_def in tests.values())
 
     metadata = {
         "experiment_id": config.experiment_id,
-        "test": config.test_name,
+        "tests": [
+            {
+                "test_name": spec.test_name,
+                "test_file": str(spec.test_file),
+                "items": len(tests[spec.test_name].items),
+                "scale_min": scales[spec.test_name][0],
+                "scale_max": scales[spec.test_name][1],
+            }
+            for spec in config.tests
+        ],
         "models": [
             {"id": m.id, "provider": m.provider, "api_name": m.api_name}
+            | {k: v for k, v in (("base_url", m.base_url), ("precision", m.precision), ("quantization", m.quantization)) if v}
             for m in config.models
         ],
         "personas": [
@@ -157,114 +493,212 @@ def run_experiment(config: ExperimentConfig) -> None:
             for p in config.personas
         ],
         "memory_between_personas": config.memory_between_personas,
-        "scale_min": scale_min,
-        "scale_max": scale_max,
         "temperature": config.temperature,
+        # seed ανά βήμα = seeding.derive_seed(seed, model, persona, run_index, item, test_name)·
+        # χωρίς seed_explicit, απαντήσεις από την cache μπορεί να είναι από άλλο seed:
+        # η στήλη seed των raw rows έχει το seed που παρήγαγε κάθε απάντηση
+        "seed": config.seed,
+        "seed_explicit": config.seed_explicit,
+        "batch_size": config.batch_size,
+        "prefix_cache_mb": config.prefix_cache_mb,
+        "scoring_mode": config.scoring_mode,
+        # σειρά των items ανά (test, persona, run)· ανά row: item_order / item_position
+        "item_order": config.item_order,
+        "cache_mode": config.cache_mode,
+        "max_in_flight": config.max_in_flight,
+        "workers": config.workers,
+        "model_ram_mb": config.model_ram_mb,
+        "profile": config.profile,
     }
-    write_metadata_json(metadata)
+    if config.item_order not in ITEM_ORDERS:
+        raise ValueError(f"item_order πρέπει να είναι ένα από {ITEM_ORDERS}, όχι '{config.item_order}'")
+    if config.scoring_mode != "generate":
+        remote = [m.id for m in config.models if m.provider not in BATCHED_PROVIDERS]
+        if remote:
+            raise ValueError(
+                f"scoring_mode='{config.scoring_mode}' υποστηρίζεται μόνο για huggingface_local (όχι για: {remote})"
+            )
+
+    # checkpoint: κάθε ολοκληρωμένο βήμα γράφεται στο journal (append-only)·
+    # πριν την cache, ώστε ένα resume με άλλο config να μην αφήνει την cache ανοιχτή
+    journal = ExperimentJournal(
+        config.experiment_id,
+        _config_fingerprint(config),
+        resume=config.resume,
+    )
 
-    raw_rows: List[Dict] = []
+    cache = open_response_cache(config.cache_mode, max_mb=config.cache_max_mb)
+    if config.resume:
+        print(f"Resume: {len(journal)} βήματα βρέθηκαν στο {journal.path}")
 
     print("=== Running BiasMind experiment ===")
     print(f"Experiment ID: {config.experiment_id}")
-    print(f"Test: {config.test_name} ({len(test_def.items)} items)")
-    print(f"Scale: {scale_min}–{scale_max}")
+    for name, test_def in tests.items():
+        print(f"Test: {name} ({len(test_def.items)} items, scale {scales[name][0]}–{scales[name][1]})")
     print(f"Temperature: {config.temperature}")
+    print(f"Seed: {config.seed}")
+    print(f"Scoring mode: {config.scoring_mode}")
+    print(f"Item order: {config.item_order}")
+    if config.item_order == "latin":
+        for name, test_def in tests.items():
+            k = latin_orders(len(test_def.items))
+            partial = [p.persona.id for p in config.personas if p.runs % k]
+            if partial:
+                print(f"  {name}: Latin square με {k} σειρές· runs που δεν είναι πολλαπλάσιο του {k} "
+                      f"δίνουν μη πλήρες counterbalancing ({', '.join(partial)})")
+
+    # ένα system prompt ανά (persona, κλίμακα), κοινό για τα tests με την ίδια κλίμακα
+    system_prompts: Dict[Tuple[str, Tuple[int, int]], str] = {}
+
+    def _system_prompt_for(persona: PersonaDef, test_name: str) -> str:
+        key = (persona.id, scales[test_name])
+        if key not in system_prompts:
+            system_prompts[key] = build_system_prompt(persona, *scales[test_name])
+        return system_prompts[key]
+
+    items_per_model = sum(p.runs for p in config.personas) * n_items
+    progress = ProgressReporter(
+        config.experiment_id,
+        len(config.models) * items_per_model,
+        enabled=config.progress,
+        tokens=generated_tokens,
+    )
+    progress.start(models=[m.id for m in config.models], tests=list(tests), items=n_items)
+
+    steps = LaneSteps(config, tests, cache, journal, debug_ctx=debug_ctx, progress=progress)
+
+    metadata_writer = MetadataWriter(metadata | {"status": "running", "rows_written": 0})
+
+    # rows γράφονται στο δίσκο μόλις ελευθερωθεί ένα lane (με τη σειρά του
+    # σειριακού loop), ώστε η μνήμη να μη μεγαλώνει με το μέγεθος του experiment
+    with ExitStack() as outputs:
+        # βγαίνει τελευταίο: το profile μετρά και το κλείσιμο των writers
+        outputs.enter_context(ExperimentProfile(config.experiment_id, config.profile))
+        # journal και cache κλείνουν και σε cancel / KeyboardInterrupt / σφάλμα provider,
+        # αφού το process του daemon / UI ζει μετά το job
+        outputs.callback(journal.close)
+        if cache is not None:
+            outputs.callback(cache.close)
+        outputs.enter_context(metadata_writer)
+        outputs.enter_context(progress)
+        raw_writer = outputs.enter_context(open_raw_csv_writer(config.experiment_id))
+        scored_writer = outputs.enter_context(open_scored_csv_writer(config.experiment_id))
+
+        raw_sinks = [raw_writer]
+        scored_sinks = [scored_writer]
+        if config.parquet:
+            raw_sinks.append(outputs.enter_context(open_raw_parquet_writer(config.experiment_id)))
+            scored_sinks.append(outputs.enter_context(open_scored_parquet_writer(config.experiment_id)))
+
+        # scoring ανά (model, test, persona): τα runs της persona βαθμολογούνται μαζί,
+        # ως ένας πίνακας n_runs × n_items (τα lanes της βγαίνουν διαδοχικά)
+        scoring_rows: List[Dict] = []
+        scoring_group: List[Optional[Tuple[str, str, str]]] = [None]
+
+        def _flush_scoring() -> None:
+            if not scoring_rows:
+                return
+            with timer("scoring.score_rows"):
+                scored = scoring[scoring_rows[0]["test_name"]].score_rows(scoring_rows)
+            with timer("write.scored"):
+                for sink in scored_sinks:
+                    sink.write_rows(scored)
+            scoring_rows.clear()
+
+        def _write_lane(lane: Lane) -> None:
+            group = (lane.model.id, lane.test_name, lane.persona.id)
+            if group != scoring_group[0]:
+                _flush_scoring()
+                scoring_group[0] = group
+
+            with timer("write.raw"):
+                for sink in raw_sinks:
+                    sink.write_rows(lane.rows)
+            scoring_rows.extend(lane.rows)
+            lane.rows = []
+
+        async def _arun_lanes(scheduler: LaneScheduler) -> None:
+            try:
+                async for lane in scheduler.arun(steps.acall_step, steps.make_row, max_in_flight=config.max_in_flight):
+                    _write_lane(lane)
+            finally:
+                await aclose_clients()
+
+        def _journal_records(records: List[Dict]) -> None:
+            for record in records:
+                journal.record(record["key"], record["reply"], record["probs"], record["row"])
+
+            # --workers: τα νέα βήματα ενός shard φτάνουν μαζί, όταν τελειώσει
+            failures = sum(
+                _find_likert_answer(r["reply"], *scales[r["row"]["test_name"]]) is None for r in records
+            )
+            progress.rows(len(records), parse_failures=failures)
+
+        # --workers: ένα pool για όλο το experiment (οι workers κρατούν τα μοντέλα φορτωμένα)
+        pool = None
+
+        for pos, model in enumerate(config.models):
+            raise_if_cancelled()
+            print(f"\n=== MODEL: {model.id} (provider={model.provider}) ===")
+            progress.set_model(model.id)
+            done_before = progress.done
+            for persona_cfg in config.personas:
+                print(f"-- Persona: {persona_cfg.persona.id} (runs={persona_cfg.runs})")
+
+            # Κάθε (test, persona, run) είναι ένα lane. Ανεξάρτητα lanes (fresh runs,
+            # personas με reset, διαφορετικά tests) τρέχουν μαζί, ένα batched call ανά tick.
+            lanes = build_lanes(
+                model,
+                {name: test_def.items for name, test_def in tests.items()},
+                config.personas,
+                config.memory_between_personas,
+                _system_prompt_for,
+            )
 
-    for model in config.models:
-        print(f"\n=== MODEL: {model.id} (provider={model.provider}) ===")
+            # counterbalancing: κάθε lane ρωτά τα items με τη δική του σειρά
+            apply_item_order(lanes, config.item_order, config.seed)
+
+            scheduler = LaneScheduler(lanes)
+
+            # τα lanes βγαίνουν με τη σειρά του σειριακού loop (test -> persona -> run)
+            if model.provider in BATCHED_PROVIDERS and config.workers > 1:
+                if pool is None:
+                    pool = outputs.enter_context(open_lane_pool(config.workers, config.torch_threads or None))
+
+                for lane in run_shards(
+                    pool,
+                    run_lane_shard,
+                    shard_lanes(lanes, config.workers),
+                    config,
+                    journal.entries(f"{model.id}|"),
+                    on_records=_journal_records,
+                    on_profile=profiling.merge,
+                ):
+                    _write_lane(lane)
+            elif model.provider in BATCHED_PROVIDERS:
+                # τα μοντέλα φορτώνονται μία φορά ανά sweep, μέσα στο RAM budget
+                plan_model_sweep(config.models[pos:], config.model_ram_mb)
+                for lane in scheduler.run(steps.call_batch, steps.make_row):
+                    _write_lane(lane)
+            else:
+                # remote providers: ένα task ανά lane, έως max_in_flight requests ταυτόχρονα
+                asyncio.run(_arun_lanes(scheduler))
 
-        previous_persona_id: Optional[str] = None
-        carry_over_seed: List[Dict] = []  # seed passed to next persona if carry_over
+            # --workers + resume: τα βήματα από το journal δεν περνούν από records
+            replayed = items_per_model - (progress.done - done_before)
+            if replayed > 0:
+                progress.rows(replayed, replayed=True)
 
-        for persona_cfg in config.personas:
-            persona = persona_cfg.persona
-            print(f"-- Persona: {persona.id} (runs={persona_cfg.runs})")
+            _flush_scoring()
+            metadata_writer.update(rows_written=raw_writer.rows_written)
 
-            # --- base_context for this persona (depends on between-persona memory) ---
-            if previous_persona_id is None:
-                base_context: List[Dict] = []
-            else:
-                if config.memory_between_personas == "carry_over":
-                    base_context = carry_over_seed.copy()
-                else:
-                    base_context = []
-
-            persona_final_context: List[Dict] = base_context.copy()
-
-            for run_index in range(1, persona_cfg.runs + 1):
-                # --- start run_context depending on within-persona memory ---
-                if run_index == 1:
-                    run_context = base_context.copy()
-                else:
-                    if persona_cfg.memory_within_persona == "continuous":
-                        # keep accumulating from previous run
-                        run_context = run_context
-                    else:
-                        # fresh: restart from base_context
-                        run_context = base_context.copy()
-
-                system_prompt = (
-                    f"{persona.prompt_prefix} "
-                    "You are answering a psychometric questionnaire. "
-                    f"Use the following scale: {scale_min} = Strongly DISAGREE, {scale_max} = Strongly AGREE. "
-                    f"Always answer ONLY with a single integer number from {scale_min} to {scale_max}."
-                )
+        if cache is not None:
+            print(f"Response cache: {cache.hits} hits, {cache.misses} misses")
+
+        metadata_writer.update(
+            status="finished",
+            rows_written=raw_writer.rows_written,
+            finished_at=_now_iso(),
+        )
 
-                for item in test_def.items:
-                    messages = (
-                        [{"role": "system", "content": system_prompt}]
-                        + run_context
-                        + [{"role": "user", "content": item.text}]
-                    )
-
-                    if debug_ctx:
-                        print("\n" + "-" * 80)
-                        print(f"[CTX DEBUG] model={model.id} persona={persona.id} run={run_index} qid={item.id}")
-                        print(f"[CTX DEBUG] history_messages={len(run_context)}")
-                        if len(run_context) >= 2:
-                            print("[CTX DEBUG] last user:", run_context[-2]["content"][:200])
-                            print("[CTX DEBUG] last assistant:", run_context[-1]["content"][:200])
-                        else:
-                            print("[CTX DEBUG] (no prior turns)")
-                        print("[CTX DEBUG] current item:", item.text[:200])
-                        print("-" * 80 + "\n")
-
-                    reply_text = call_model(
-                        model,
-                        messages,
-                        temperature=config.temperature,
-                    )
-                    answer_val = _parse_likert_answer(reply_text, scale_min, scale_max)
-
-                    raw_rows.append(
-                        {
-                            "model": model.id,
-                            "provider": model.provider,
-                            "persona_id": persona.id,
-                            "run_index": run_index,
-                            "test_name": config.test_name,
-                            "question_id": item.id,
-                            "question_text": item.text,
-                            "trait": item.trait,
-                            "reverse": item.reverse,
-                            "answer": answer_val,
-                            "timestamp_run": _now_iso(),
-                        }
-                    )
-
-                    # Store real dialogue turns (memory modes)
-                    run_context.append({"role": "user", "content": item.text})
-                    run_context.append({"role": "assistant", "content": reply_text})
-
-                persona_final_context = run_context.copy()
-
-            # after finishing persona runs, set seed for next persona (if carry_over)
-            carry_over_seed = persona_final_context
-            previous_persona_id = persona.id
-
-    write_raw_csv(config.experiment_id, raw_rows)
-    scored_rows = _compute_scored_rows(test_def, raw_rows)
-    write_scored_csv(config.experiment_id, scored_rows)
-
-    print(f"\n✅ Experiment finished. RAW + SCORED saved for {config.experiment_id}")
\ No newline at end of file
+    print(f"\n✅ Experiment finished. RAW + SCORED saved for {config.experiment_id}")
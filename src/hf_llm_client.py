@@ -1,97 +1,632 @@
 # hf_llm_client.py
 from typing import List, Dict, Optional, Tuple
-from functools import lru_cache
+from collections import OrderedDict
+import copy
 import os
-import re
 
-from transformers import AutoTokenizer, AutoModelForCausalLM, pipeline
+import torch
+from transformers import (
+    AutoTokenizer,
+    AutoModelForCausalLM,
+    DynamicCache,
+    LogitsProcessor,
+    LogitsProcessorList,
+    pipeline,
+)
 from transformers.utils import logging as hf_logging
 
 from input_loader import ModelDef
+from model_residency import ModelResidency, default_budget_mb
+from profiling import count, timer
+from prompt_format import (
+    DEFAULT_BATCH_SIZE,
+    DEFAULT_TOP_P,
+    PromptTokens,
+    _extract_scale_from_system,
+    _messages_to_prompt,
+    _parse_reply,
+    model_key,
+    pipeline_key,
+)
 
 # Silence HF/Transformers warnings
 hf_logging.set_verbosity_error()
 
 
-@lru_cache(maxsize=4)
-def _get_pipeline(model_id: str):
+# new (non-pad) tokens produced by generate() in this process, for tokens/sec in progress events
+_TOKEN_COUNTS = {"generated": 0}
+
+
+def generated_tokens() -> int:
+    return _TOKEN_COUNTS["generated"]
+
+
+# ModelDef.precision -> torch_dtype for from_pretrained
+PRECISIONS = {
+    "fp32": torch.float32,
+    "fp16": torch.float16,
+    "bf16": torch.bfloat16,
+    "auto": "auto",
+}
+QUANTIZATIONS = ("int8_dynamic", "bnb_8bit", "bnb_4bit")
+
+
+def _load_pipeline(model_id: str, precision: Optional[str] = None, quantization: Optional[str] = None):
+    if precision is not None and precision not in PRECISIONS:
+        raise ValueError(f"Άγνωστο precision '{precision}' (υποστηρίζονται: {sorted(PRECISIONS)})")
+    if quantization is not None and quantization not in QUANTIZATIONS:
+        raise ValueError(f"Άγνωστο quantization '{quantization}' (υποστηρίζονται: {QUANTIZATIONS})")
+    if quantization == "int8_dynamic" and precision not in (None, "fp32", "auto"):
+        # dynamic quantization works on fp32 Linear modules
+        raise ValueError(f"quantization 'int8_dynamic' χρειάζεται precision fp32 (ή κανένα), όχι '{precision}'")
+
     tokenizer = AutoTokenizer.from_pretrained(model_id)
-    model = AutoModelForCausalLM.from_pretrained(model_id, device_map="auto")
+    # Batched generation needs a pad token and LEFT padding, so that every
+    # prompt in the batch ends at the same position and new tokens line up.
+    if tokenizer.pad_token is None:
+        tokenizer.pad_token = tokenizer.eos_token
+    tokenizer.padding_side = "left"
+
+    load_kwargs: Dict = {"device_map": "auto"}
+    if precision is not None:
+        load_kwargs["torch_dtype"] = PRECISIONS[precision]
+
+    if quantization == "int8_dynamic":
+        # CPU only: Linear weights stored as int8, activations quantized on the fly,
+        # on fp32 modules (other precisions are rejected above)
+        if torch.cuda.is_available():
+            print(f"[BiasMind] {model_id}: int8_dynamic runs on CPU; the GPU is not used for this model.")
+        load_kwargs["device_map"] = "cpu"
+        load_kwargs["torch_dtype"] = torch.float32
+    elif quantization in ("bnb_8bit", "bnb_4bit"):
+        from transformers import BitsAndBytesConfig  # needs bitsandbytes + CUDA
+
+        load_kwargs["quantization_config"] = BitsAndBytesConfig(
+            load_in_8bit=quantization == "bnb_8bit",
+            load_in_4bit=quantization == "bnb_4bit",
+            bnb_4bit_compute_dtype=PRECISIONS.get(precision or "bf16", torch.bfloat16),
+        )
+
+    model = AutoModelForCausalLM.from_pretrained(model_id, **load_kwargs)
+
+    if quantization == "int8_dynamic":
+        model = torch.ao.quantization.quantize_dynamic(model, {torch.nn.Linear}, dtype=torch.qint8)
+
+    model.eval()
     return pipeline("text-generation", model=model, tokenizer=tokenizer)
 
 
-def _extract_scale_from_system(messages: List[Dict]) -> Optional[Tuple[int, int]]:
+def _drop_model_caches(model_id: str) -> None:
+    # KV tensors and token ids of an evicted model are useless and hold memory
+    if _PREFIX_CACHE is not None:
+        _PREFIX_CACHE.drop_model(model_id)
+    _PROMPT_TOKENS.drop_model(model_id)
+
+
+def _default_ram_mb(processes: int = 1) -> int:
+    # BIASMIND_MODEL_RAM_MB overrides the default budget (share of the machine's RAM)
+    env = os.getenv("BIASMIND_MODEL_RAM_MB")
+    if env:
+        return int(env) // max(1, int(processes))
+    return default_budget_mb(processes)
+
+
+# Loaded pipelines, evicted by RAM budget (see model_residency)
+_RESIDENCY = ModelResidency(
+    _default_ram_mb(),
+    on_evict=_drop_model_caches,
+    source_of=lambda key: key.split("@", 1)[0],
+)
+
+
+def _get_pipeline(model_id: str, precision: Optional[str] = None, quantization: Optional[str] = None):
+    def _load(_key: str):
+        with timer("hf.load_model"):
+            return _load_pipeline(model_id, precision, quantization)
+
+    return _RESIDENCY.get(pipeline_key(model_id, precision, quantization), _load)
+
+
+def _get_model_pipeline(model: ModelDef):
+    return _get_pipeline(model.api_name, model.precision, model.quantization)
+
+
+def configure_model_residency(budget_mb: int = 0, processes: int = 1, upcoming: Optional[List[str]] = None) -> None:
     """
-    Extract (min,max) from system prompt like:
-    "Always answer ONLY with a single integer number from X to Y."
+    budget_mb: RAM budget for loaded models in this process (0 = BIASMIND_MODEL_RAM_MB or
+    a share of the machine's RAM, split across `processes` that load models at the same
+    time, e.g. --workers).
+    upcoming: the models (model_key) a sweep will use, in order, for eviction / prefetch.
     """
-    sys = ""
-    for m in messages:
-        if m.get("role") == "system":
-            sys = m.get("content", "") or ""
-            break
+    _RESIDENCY.set_budget(budget_mb or _default_ram_mb(processes))
+    if upcoming is not None:
+        _RESIDENCY.plan(upcoming)
 
-    matches = re.findall(r"from\s+(-?\d+)\s+to\s+(-?\d+)", sys, flags=re.IGNORECASE)
-    if not matches:
-        return None
 
-    a, b = matches[-1]
-    try:
-        mn, mx = int(a), int(b)
-        if mn > mx:
-            mn, mx = mx, mn
-        return mn, mx
-    except Exception:
-        return None
+def pipeline_cache_info() -> Dict:
+    """
+    Loaded models, their measured memory footprint and load times, and the RAM budget.
+    """
+    return _RESIDENCY.info()
 
 
-def _messages_to_prompt(messages: List[Dict]) -> str:
+def _cache_nbytes(cache) -> int:
     """
-    UPDATED:
-    - Includes FULL conversation history (system, user, assistant)
-    - Preserves original instruction style
+    Size in bytes of all key/value tensors of a past_key_values cache.
     """
-    prompt = ""
+    if hasattr(cache, "layers"):
+        tensors = [t for layer in cache.layers for t in (layer.keys, layer.values)]
+    elif hasattr(cache, "key_cache"):
+        tensors = list(cache.key_cache) + list(cache.value_cache)
+    else:
+        tensors = [t for kv in cache for t in kv]
 
-    for msg in messages:
-        role = msg.get("role")
-        content = msg.get("content", "")
+    return sum(t.numel() * t.element_size() for t in tensors if t is not None)
 
-        if role == "system":
-            prompt += f"{content}\n\n"
-        elif role == "user":
-            prompt += f"User: {content}\n"
-        elif role == "assistant":
-            prompt += f"Assistant: {content}\n"
 
-    scale = _extract_scale_from_system(messages)
-    if scale is not None:
-        mn, mx = scale
-        tail = f"\nRespond with ONE integer between {mn} and {mx}. No words.\nAnswer: "
+class PrefixKVCache:
+    """
+    LRU cache of past_key_values, keyed by (model, token-id prefix).
+    - lookup() returns the LONGEST cached prefix of the given token ids (as a copy,
+      since generate() extends the cache in place).
+    - Entries are evicted least-recently-used first once max_bytes is exceeded.
+    """
+
+    def __init__(self, max_bytes: int):
+        self.max_bytes = int(max_bytes)
+        self._entries: "OrderedDict[Tuple[str, Tuple[int, ...]], Tuple[object, int]]" = OrderedDict()
+        self._bytes = 0
+        self.hits = 0
+        self.misses = 0
+
+    def lookup(self, model_id: str, ids: List[int]) -> Tuple[int, Optional[object]]:
+        best: Optional[Tuple[str, Tuple[int, ...]]] = None
+
+        for key in self._entries:
+            mid, prefix = key
+            n = len(prefix)
+            if mid != model_id or n > len(ids):
+                continue
+            if best is not None and n <= len(best[1]):
+                continue
+            if tuple(ids[:n]) == prefix:
+                best = key
+
+        if best is None:
+            self.misses += 1
+            return 0, None
+
+        self.hits += 1
+        self._entries.move_to_end(best)
+        cache, _ = self._entries[best]
+        return len(best[1]), copy.deepcopy(cache)
+
+    def store(self, model_id: str, ids: List[int], cache) -> None:
+        nbytes = _cache_nbytes(cache)
+        if nbytes > self.max_bytes:
+            return
+
+        key = (model_id, tuple(ids))
+        if key in self._entries:
+            self._bytes -= self._entries.pop(key)[1]
+
+        self._entries[key] = (copy.deepcopy(cache), nbytes)
+        self._bytes += nbytes
+
+        while self._bytes > self.max_bytes and self._entries:
+            _, (_, evicted) = self._entries.popitem(last=False)
+            self._bytes -= evicted
+
+    def drop_model(self, model_id: str) -> None:
+        for key in [k for k in self._entries if k[0] == model_id]:
+            self._bytes -= self._entries.pop(key)[1]
+
+
+_PREFIX_CACHE: Optional[PrefixKVCache] = None
+
+
+def _get_prefix_cache(max_mb: int) -> PrefixKVCache:
+    """
+    One process-wide prefix cache; the memory budget follows the latest caller.
+    """
+    global _PREFIX_CACHE
+    max_bytes = int(max_mb) * 1024 * 1024
+
+    if _PREFIX_CACHE is None:
+        _PREFIX_CACHE = PrefixKVCache(max_bytes)
     else:
-        tail = "\nRespond with ONE integer. No words.\nAnswer: "
+        _PREFIX_CACHE.max_bytes = max_bytes
+
+    return _PREFIX_CACHE
+
+
+def _pad_left(tokenizer, rows: List[List[int]], device):
+    enc = tokenizer.pad({"input_ids": rows}, return_tensors="pt", padding=True)
+    return enc["input_ids"].to(device), enc["attention_mask"].to(device)
+
+
+class LikertLogitsProcessor(LogitsProcessor):
+    """
+    Constrained decoding: at every step only the tokens that continue one of the
+    allowed scale values (e.g. "1".."9", or "10" for longer scales) are kept,
+    and EOS once a full value has been produced.
+
+    allowed[row] = list of token-id sequences, one per scale value, for that row.
+    prompt_len   = width of the (left-padded) prompt, i.e. where generation starts.
+    """
+
+    def __init__(self, allowed: List[List[List[int]]], prompt_len: int, eos_token_id: int):
+        self.allowed = allowed
+        self.prompt_len = prompt_len
+        self.eos_token_id = eos_token_id
+
+    def __call__(self, input_ids: "torch.LongTensor", scores: "torch.FloatTensor") -> "torch.FloatTensor":
+        mask = torch.full_like(scores, float("-inf"))
+
+        for row in range(input_ids.shape[0]):
+            done = input_ids[row, self.prompt_len:].tolist()
+            options = set()
+
+            for seq in self.allowed[row]:
+                if seq[:len(done)] != done:
+                    continue
+                if len(seq) > len(done):
+                    options.add(seq[len(done)])
+                else:
+                    options.add(self.eos_token_id)
+
+            if not options:
+                options.add(self.eos_token_id)
+
+            mask[row, list(options)] = 0.0
+
+        return scores + mask
+
+
+class SeededSampler(LogitsProcessor):
+    """
+    Sampling with one torch.Generator per row, seeded with that row's step seed
+    (seeding.derive_seed), instead of the global torch RNG. The token drawn for a
+    row then does not depend on which other dialogues share the batch, on the
+    batch order, or on what ran before in the process.
+
+    Temperature and top-p are applied here like HF's warpers; the drawn token gets
+    score 0 and every other token -inf, and generate() runs with do_sample=False.
+    temperature <= 0 -> argmax.
+    """
+
+    def __init__(self, seeds: List[int], temperature: float, top_p: float = 1.0):
+        self.seeds = list(seeds)
+        self.temperature = float(temperature)
+        self.top_p = float(top_p)
+        self._generators: Optional[List["torch.Generator"]] = None
+
+    def __call__(self, input_ids: "torch.LongTensor", scores: "torch.FloatTensor") -> "torch.FloatTensor":
+        if self._generators is None:
+            self._generators = [torch.Generator(device=scores.device).manual_seed(s) for s in self.seeds]
+
+        logits = scores.float()
+        out = torch.full_like(scores, float("-inf"))
+
+        if self.temperature <= 0:
+            out.scatter_(1, logits.argmax(dim=-1, keepdim=True), 0.0)
+            return out
+
+        logits = logits / self.temperature
+        if self.top_p < 1.0:
+            sorted_logits, sorted_idx = torch.sort(logits, descending=False)
+            cumulative = sorted_logits.softmax(dim=-1).cumsum(dim=-1)
+            remove = cumulative <= (1 - self.top_p)
+            remove[..., -1:] = False  # keep at least the most likely token
+            logits = logits.masked_fill(remove.scatter(1, sorted_idx, remove), float("-inf"))
+
+        probs = torch.softmax(logits, dim=-1)
+        for row, generator in enumerate(self._generators):
+            token = torch.multinomial(probs[row], 1, generator=generator)
+            out[row, token] = 0.0
+
+        return out
+
+
+def _seeded_sampling(
+    seeds: Optional[List[int]],
+    gen_kwargs: Dict,
+) -> Tuple[Optional[SeededSampler], Dict]:
+    """
+    (sampler, generate kwargs): with seeds, sampling moves into a SeededSampler
+    and generate() itself only picks the sampled token.
+    """
+    if seeds is None or not gen_kwargs.get("do_sample"):
+        return None, gen_kwargs
+
+    sampler = SeededSampler(seeds, gen_kwargs.get("temperature", 1.0), gen_kwargs.get("top_p", 1.0))
+    kwargs = {k: v for k, v in gen_kwargs.items() if k not in ("temperature", "top_p")}
+    kwargs["do_sample"] = False
+    return sampler, kwargs
+
+
+def _logits_processors(
+    tokenizer,
+    allowed: Optional[List[List[List[int]]]],
+    prompt_len: int,
+    sampler: Optional[SeededSampler] = None,
+):
+    # the scale mask goes first, so the sampler only draws among allowed tokens
+    processors = []
+    if allowed is not None:
+        processors.append(LikertLogitsProcessor(allowed, prompt_len, tokenizer.eos_token_id))
+    if sampler is not None:
+        processors.append(sampler)
+    return LogitsProcessorList(processors) if processors else None
+
+
+def _generate_with_prefix_cache(
+    pipe,
+    model_id: str,
+    ids: List[int],
+    stable: int,
+    prefix_cache: PrefixKVCache,
+    allowed: Optional[List[List[int]]] = None,
+    seed: Optional[int] = None,
+    **gen_kwargs,
+) -> str:
+    """
+    Single-dialogue generation that only encodes the tokens not already in the cache:
+    1. find the longest cached prefix of the prompt tokens
+    2. prefill the rest of the stable body (system + history + current item) and cache it
+    3. generate from there; only the tail is encoded on top of the cached body
+    seed: per-row sampling seed (SeededSampler), else the global torch RNG.
+    """
+    tokenizer = pipe.tokenizer
+    model = pipe.model
+    sampler, gen_kwargs = _seeded_sampling(None if seed is None else [seed], gen_kwargs)
+
+    # tokens may merge across the body/tail boundary; only cache what is stable
+    stable = min(stable, len(ids) - 1)
+
+    hit_len, cache = prefix_cache.lookup(model_id, ids[:stable])
+    if cache is None:
+        cache = DynamicCache()
+
+    input_ids = torch.tensor([ids], device=model.device)
+
+    with torch.no_grad():
+        if hit_len < stable:
+            with timer("hf.prefill"):
+                model(
+                    input_ids=input_ids[:, hit_len:stable],
+                    past_key_values=cache,
+                    use_cache=True,
+                )
+            prefix_cache.store(model_id, ids[:stable], cache)
+
+        with timer("hf.generate"):
+            out = model.generate(
+                input_ids=input_ids,
+                attention_mask=torch.ones_like(input_ids),
+                past_key_values=cache,
+                pad_token_id=tokenizer.pad_token_id,
+                logits_processor=_logits_processors(
+                    tokenizer,
+                    None if allowed is None else [allowed],
+                    len(ids),
+                    sampler,
+                ),
+                **gen_kwargs,
+            )
 
-    return prompt + tail
+    new_tokens = out[0, len(ids):]
+    n_new = int((new_tokens != tokenizer.pad_token_id).sum())
+    _TOKEN_COUNTS["generated"] += n_new
+    count("hf.generated_tokens", n_new)
+    return tokenizer.decode(new_tokens, skip_special_tokens=True)
 
 
-def _parse_first_int_in_range(text: str, mn: int, mx: int) -> Optional[int]:
+_PROMPT_TOKENS = PromptTokens()
+
+
+def _debug_enabled() -> bool:
+    return (os.getenv("BIASMIND_DEBUG_LLM") or "").strip().lower() in ("1", "true", "yes", "on")
+
+
+def _debug_dump(
+    model: ModelDef,
+    scale: Optional[Tuple[int, int]],
+    prompt: str,
+    gen: str,
+    parsed: str,
+) -> None:
+    print("\n" + "=" * 90)
+    print("[BiasMind DEBUG] hf_local_chat")
+    print(f"model.id={getattr(model, 'id', None)} api_name={getattr(model, 'api_name', None)} provider={getattr(model, 'provider', None)}")
+    print(f"extracted_scale={scale[0]}..{scale[1]}" if scale else "extracted_scale=None")
+    print("-" * 90)
+    print("[PROMPT SENT TO MODEL]")
+    print(prompt)
+    print("-" * 90)
+    print("[RAW MODEL OUTPUT]")
+    print(gen)
+    print("-" * 90)
+    print("[PARSED RETURN]")
+    print(repr(parsed))
+    print("=" * 90 + "\n")
+
+
+def _generate_batch(
+    pipe,
+    rows: List[List[int]],
+    batch_size: int,
+    allowed: Optional[List[List[List[int]]]] = None,
+    seeds: Optional[List[int]] = None,
+    **gen_kwargs,
+) -> List[str]:
+    """
+    Padding-aware batched generation over prompt token ids.
+    - Prompts are sorted by token length, so each batch holds prompts of similar
+      length and little compute is spent on padding.
+    - allowed (optional): per-row scale continuations for constrained decoding.
+    - seeds (optional): per-row sampling seeds (SeededSampler). A row's answer is then
+      the same whatever batch it lands in (up to float differences from padding).
+    - Returns the generated continuation (without the prompt) in the ORIGINAL order.
     """
-    Extract the first integer token that lies within [mn,mx].
+    tokenizer = pipe.tokenizer
+    model = pipe.model
+
+    order = sorted(range(len(rows)), key=lambda i: len(rows[i]))
+
+    outputs: List[str] = [""] * len(rows)
+    batch_size = max(1, int(batch_size))
+
+    for start in range(0, len(order), batch_size):
+        idx = order[start:start + batch_size]
+        input_ids, attention_mask = _pad_left(tokenizer, [rows[i] for i in idx], model.device)
+        prompt_len = input_ids.shape[1]
+        sampler, batch_kwargs = _seeded_sampling(None if seeds is None else [seeds[i] for i in idx], gen_kwargs)
+
+        with torch.no_grad(), timer("hf.generate"):
+            out = model.generate(
+                input_ids=input_ids,
+                attention_mask=attention_mask,
+                pad_token_id=tokenizer.pad_token_id,
+                logits_processor=_logits_processors(
+                    tokenizer,
+                    None if allowed is None else [allowed[i] for i in idx],
+                    prompt_len,
+                    sampler,
+                ),
+                **batch_kwargs,
+            )
+
+        # left padding: the prompt part has the same width for every row
+        new_tokens = out[:, prompt_len:]
+        n_new = int((new_tokens != tokenizer.pad_token_id).sum())
+        _TOKEN_COUNTS["generated"] += n_new
+        count("hf.generated_tokens", n_new)
+        count("hf.generate_batches")
+        texts = tokenizer.batch_decode(new_tokens, skip_special_tokens=True)
+
+        for i, text in zip(idx, texts):
+            outputs[i] = text
+
+    return outputs
+
+
+def call_hf_local_chat_batch(
+    model: ModelDef,
+    messages_list: List[List[Dict]],
+    temperature: float = 0.7,
+    batch_size: int = DEFAULT_BATCH_SIZE,
+    prefix_cache_mb: int = 0,
+    constrained: bool = False,
+    scale: Optional[Tuple[int, int]] = None,
+    seeds: Optional[List[int]] = None,
+) -> List[str]:
+    """
+    Batched version of call_hf_local_chat: one generate() call per batch of
+    independent dialogues (e.g. the same item across fresh runs).
+    Returns ONE integer as a string per messages list (same order as the input).
+
+    constrained=True:
+      a LikertLogitsProcessor only lets the model emit one of the scale values
+      (from the system prompt) followed by EOS, and max_new_tokens drops to the
+      longest value + 1. No prose, no parse failures.
+
+    prefix_cache_mb > 0:
+      dialogues are generated one by one on top of cached past_key_values
+      (persona system prompt + earlier turns), so each item only encodes its
+      new tokens. Best for continuous / carry_over runs with long contexts.
+
+    scale: the test's (min, max), the same for every dialogue. If not given it is
+      parsed from each system prompt ("from X to Y").
+
+    Prompt token ids come from PromptTokens: per-segment ids cached across the
+    turns of a dialogue, handed to the model as input_ids.
+
+    seeds: one sampling seed per dialogue (seeding.derive_seed). Each row then
+      samples from its own generator, so batched and one-by-one runs agree.
+      Without seeds, sampling uses the global torch RNG.
     """
-    for tok in re.findall(r"-?\d+", text):
-        try:
-            v = int(tok)
-        except Exception:
-            continue
-        if mn <= v <= mx:
-            return v
-    return None
+    if not messages_list:
+        return []
+
+    debug = _debug_enabled()
+
+    if scale is not None:
+        scales = [scale] * len(messages_list)
+    else:
+        scales = [_extract_scale_from_system(messages) for messages in messages_list]
+
+    pipe = _get_model_pipeline(model)
+    tokenizer = pipe.tokenizer
+    key = model_key(model)
+
+    gen_kwargs = dict(
+        do_sample=True,
+        temperature=temperature,
+        top_p=DEFAULT_TOP_P,
+        max_new_tokens=12,
+        num_return_sequences=1,
+    )
+
+    allowed: Optional[List[List[List[int]]]] = None
+
+    if constrained:
+        if any(s is None for s in scales):
+            raise ValueError("Constrained decoding χρειάζεται scale (from X to Y) στο system prompt.")
+
+        with timer("prompt.tokenize"):
+            splits = [
+                _PROMPT_TOKENS.scale_continuations(key, tokenizer, messages, s)
+                for messages, s in zip(messages_list, scales)
+            ]
+        # generation starts right where the scale value starts
+        rows = [context for context, _conts, _stable in splits]
+        allowed = [conts for _context, conts, _stable in splits]
+        stables = [stable for _context, _conts, stable in splits]
+        gen_kwargs["max_new_tokens"] = max(len(c) for conts in allowed for c in conts) + 1
+    else:
+        with timer("prompt.tokenize"):
+            encoded = [
+                _PROMPT_TOKENS.encode(key, tokenizer, messages, s)
+                for messages, s in zip(messages_list, scales)
+            ]
+        rows = [ids for ids, _stable in encoded]
+        stables = [stable for _ids, stable in encoded]
+
+    if prefix_cache_mb > 0:
+        prefix_cache = _get_prefix_cache(prefix_cache_mb)
+        gens = [
+            _generate_with_prefix_cache(
+                pipe,
+                key,
+                rows[i],
+                stables[i],
+                prefix_cache,
+                allowed=None if allowed is None else allowed[i],
+                seed=None if seeds is None else seeds[i],
+                **gen_kwargs,
+            )
+            for i in range(len(rows))
+        ]
+    else:
+        gens = _generate_batch(pipe, rows, batch_size=batch_size, allowed=allowed, seeds=seeds, **gen_kwargs)
+
+    replies: List[str] = []
+    for messages, s, gen in zip(messages_list, scales, gens):
+        with timer("parse.reply"):
+            parsed = _parse_reply(gen or "", s)
+        if debug:
+            _debug_dump(model, s, _messages_to_prompt(messages, s), gen, parsed)
+        replies.append(parsed)
+
+    return replies
 
 
 def call_hf_local_chat(
     model: ModelDef,
     messages: List[Dict],
     temperature: float = 0.7,
+    seed: Optional[int] = None,
 ) -> str:
     """
     Generates a response and returns ONE integer as a string.
@@ -100,49 +635,182 @@ def call_hf_local_chat(
     Debug:
       set BIASMIND_DEBUG_LLM=1 to print full prompt, raw output, and parsed result.
     """
-    debug = (os.getenv("BIASMIND_DEBUG_LLM") or "").strip().lower() in ("1", "true", "yes", "on")
+    return call_hf_local_chat_batch(
+        model,
+        [messages],
+        temperature=temperature,
+        batch_size=1,
+        seeds=None if seed is None else [seed],
+    )[0]
 
-    prompt = _messages_to_prompt(messages)
-    scale = _extract_scale_from_system(messages)
 
-    pipe = _get_pipeline(model.api_name)
+# ---------- logits scoring (no decoding) ----------
+
+def _last_logits_batch(pipe, contexts: List[List[int]], batch_size: int) -> List["torch.Tensor"]:
+    """
+    Next-token logits after each context, one forward pass per (length-sorted) batch.
+    """
+    tokenizer = pipe.tokenizer
+    model = pipe.model
+
+    order = sorted(range(len(contexts)), key=lambda i: len(contexts[i]))
+    out: List = [None] * len(contexts)
+    batch_size = max(1, int(batch_size))
+
+    for start in range(0, len(order), batch_size):
+        idx = order[start:start + batch_size]
+        input_ids, attention_mask = _pad_left(tokenizer, [contexts[i] for i in idx], model.device)
+
+        with torch.no_grad(), timer("hf.forward"):
+            logits = model(input_ids=input_ids, attention_mask=attention_mask).logits
+
+        # left padding: the last position is the real last token of every row
+        for row, i in enumerate(idx):
+            out[i] = logits[row, -1, :].float()
+
+    return out
 
-    outputs = pipe(
-        prompt,
-        do_sample=True,
-        temperature=temperature,
-        top_p=0.9,
-        max_new_tokens=12,
-        num_return_sequences=1,
-        return_full_text=False,
-    )
 
-    gen = (outputs[0].get("generated_text") or "")
+def _last_logits_with_prefix_cache(
+    pipe,
+    model_id: str,
+    ids: List[int],
+    stable: int,
+    prefix_cache: PrefixKVCache,
+) -> "torch.Tensor":
+    """
+    Next-token logits after ids, encoding only the tokens not in the prefix cache.
+    """
+    model = pipe.model
+    stable = min(stable, len(ids) - 1)
+
+    hit_len, cache = prefix_cache.lookup(model_id, ids[:stable])
+    if cache is None:
+        cache = DynamicCache()
+
+    input_ids = torch.tensor([ids], device=model.device)
+
+    with torch.no_grad():
+        if hit_len < stable:
+            with timer("hf.prefill"):
+                model(input_ids=input_ids[:, hit_len:stable], past_key_values=cache, use_cache=True)
+            prefix_cache.store(model_id, ids[:stable], cache)
+            hit_len = stable
+
+        with timer("hf.forward"):
+            logits = model(input_ids=input_ids[:, hit_len:], past_key_values=cache, use_cache=True).logits
+
+    return logits[0, -1, :].float()
+
+
+def _sequence_logprobs(pipe, context: List[int], continuations: List[List[int]]) -> "torch.Tensor":
+    """
+    log P(continuation | context) for every continuation, in ONE batched forward pass.
+    Used only when some scale value needs more than one token (e.g. "10").
+    """
+    tokenizer = pipe.tokenizer
+    model = pipe.model
 
-    parsed: str = ""
+    rows = [context + cont for cont in continuations]
+    input_ids, attention_mask = _pad_left(tokenizer, rows, model.device)
+
+    with torch.no_grad(), timer("hf.forward"):
+        logprobs = torch.log_softmax(
+            model(input_ids=input_ids, attention_mask=attention_mask).logits.float(),
+            dim=-1,
+        )
+
+    width = input_ids.shape[1]
+    scores = []
+    for row, cont in enumerate(continuations):
+        total = 0.0
+        for k, tok in enumerate(cont):
+            # the token at position (width - len(cont) + k) is predicted one step earlier
+            pos = width - len(cont) + k - 1
+            total += float(logprobs[row, pos, tok])
+        scores.append(total)
+
+    return torch.tensor(scores)
+
+
+def score_hf_local_logits_batch(
+    model: ModelDef,
+    messages_list: List[List[Dict]],
+    temperature: float = 0.7,
+    batch_size: int = DEFAULT_BATCH_SIZE,
+    prefix_cache_mb: int = 0,
+    scale: Optional[Tuple[int, int]] = None,
+    seeds: Optional[List[int]] = None,
+) -> List[Tuple[str, List[float]]]:
+    """
+    scoring_mode="logits": ONE forward pass per prompt instead of sampling + regex parsing.
+    Reads the next-token distribution over the scale values scale_min..scale_max.
+
+    Returns, per messages list, (answer, probs):
+    - answer: argmax if temperature <= 0, otherwise sampled from the scale
+      distribution at that temperature
+    - probs: the model's probability of every scale value (renormalized over the scale)
+
+    scale: the test's (min, max); parsed from each system prompt if not given.
+    seeds: one seed per prompt for the sampled answer (else the global torch RNG).
+    """
+    if not messages_list:
+        return []
+
+    debug = _debug_enabled()
+    pipe = _get_model_pipeline(model)
+    tokenizer = pipe.tokenizer
 
     if scale is not None:
-        mn, mx = scale
-        v = _parse_first_int_in_range(gen, mn, mx)
-        parsed = "" if v is None else str(v)
+        scales = [scale] * len(messages_list)
     else:
-        m = re.search(r"-?\d+", gen)
-        parsed = "" if not m else m.group(0)
-
-    if debug:
-        print("\n" + "=" * 90)
-        print("[BiasMind DEBUG] hf_local_chat")
-        print(f"model.id={getattr(model, 'id', None)} api_name={getattr(model, 'api_name', None)} provider={getattr(model, 'provider', None)}")
-        print(f"extracted_scale={scale[0]}..{scale[1]}" if scale else "extracted_scale=None")
-        print("-" * 90)
-        print("[PROMPT SENT TO MODEL]")
-        print(prompt)
-        print("-" * 90)
-        print("[RAW MODEL OUTPUT]")
-        print(gen)
-        print("-" * 90)
-        print("[PARSED RETURN]")
-        print(repr(parsed))
-        print("=" * 90 + "\n")
-
-    return parsed
\ No newline at end of file
+        scales = [_extract_scale_from_system(messages) for messages in messages_list]
+    if any(s is None for s in scales):
+        raise ValueError("scoring_mode='logits' χρειάζεται scale (from X to Y) στο system prompt.")
+
+    key = model_key(model)
+    with timer("prompt.tokenize"):
+        splits = [
+            _PROMPT_TOKENS.scale_continuations(key, tokenizer, messages, s)
+            for messages, s in zip(messages_list, scales)
+        ]
+
+    # common case: every scale value is one token -> scores = next-token logits
+    single = [i for i, (_, conts, _stable) in enumerate(splits) if all(len(c) == 1 for c in conts)]
+    scores: List = [None] * len(splits)
+
+    if prefix_cache_mb > 0:
+        prefix_cache = _get_prefix_cache(prefix_cache_mb)
+        for i in single:
+            context, conts, stable = splits[i]
+            logits = _last_logits_with_prefix_cache(pipe, key, context, stable, prefix_cache)
+            scores[i] = torch.log_softmax(logits, dim=-1)[[c[0] for c in conts]].cpu()
+    elif single:
+        logits_list = _last_logits_batch(pipe, [splits[i][0] for i in single], batch_size)
+        for i, logits in zip(single, logits_list):
+            conts = splits[i][1]
+            scores[i] = torch.log_softmax(logits, dim=-1)[[c[0] for c in conts]].cpu()
+
+    for i, (context, conts, _stable) in enumerate(splits):
+        if scores[i] is None:
+            scores[i] = _sequence_logprobs(pipe, context, conts).cpu()
+
+    results: List[Tuple[str, List[float]]] = []
+    for i, (messages, (mn, _mx), logp) in enumerate(zip(messages_list, scales, scores)):
+        probs = torch.softmax(logp, dim=-1)
+
+        if temperature <= 0:
+            pick = int(torch.argmax(probs))
+        else:
+            generator = None if seeds is None else torch.Generator().manual_seed(seeds[i])
+            pick = int(torch.multinomial(torch.softmax(logp / temperature, dim=-1), 1, generator=generator))
+
+        answer = str(mn + pick)
+        prob_list = [float(p) for p in probs]
+
+        if debug:
+            _debug_dump(model, (mn, _mx), _messages_to_prompt(messages, (mn, _mx)), f"probs={[round(p, 4) for p in prob_list]}", answer)
+
+        results.append((answer, prob_list))
+
+    return results
@@ -1,7 +1,7 @@
 import json
 from dataclasses import dataclass
 from pathlib import Path
-from typing import List
+from typing import List, Optional
 
 
 # ----- Βασικοί τύποι -----
@@ -11,6 +11,10 @@ class ModelDef:
     id: str
     provider: str
     api_name: str
+    base_url: Optional[str] = None  # openai / openai_compatible: π.χ. http://127.0.0.1:8000/v1
+    api_key_env: Optional[str] = None  # όνομα env var με το API key (default: OPENAI_API_KEY μόνο για provider "openai")
+    precision: Optional[str] = None  # huggingface_local: "fp32", "bf16", "fp16" ή "auto" (None = default του transformers)
+    quantization: Optional[str] = None  # huggingface_local: "int8_dynamic" (CPU), "bnb_8bit" / "bnb_4bit" (GPU)
 
 
 @dataclass
@@ -38,6 +42,10 @@ def load_model(model_id: str, base_dir: str | Path = "data/models") -> ModelDef:
         id=data["id"],
         provider=data["provider"],
         api_name=data["api_name"],
+        base_url=data.get("base_url"),
+        api_key_env=data.get("api_key_env"),
+        precision=data.get("precision"),
+        quantization=data.get("quantization"),
     )
 
 
@@ -0,0 +1,298 @@
+"""
+Ουρά experiments που τρέχουν μέσα στο ίδιο process (UI, model daemon), ώστε τα
+φορτωμένα μοντέλα (hf_llm_client) να μοιράζονται ανάμεσα στα jobs αντί κάθε run
+να τα ξαναφορτώνει σε δικό του process.
+
+- bounded: έως max_queued jobs σε αναμονή, μετά QueueFullError
+- executors: πόσα jobs τρέχουν ταυτόχρονα (1 = ένα-ένα, με τη σειρά υποβολής)·
+  τα experiment jobs (run_experiment_job) τρέχουν πάντα με 1, γιατί μοιράζονται
+  state του process (profiling, token counters του progress) που δεν είναι ανά job
+- κάθε job έχει status, θέση στην ουρά, output (ό,τι τυπώνει) και cancel
+
+Cancel ενός job που τρέχει είναι cooperative: ο runner καλεί raise_if_cancelled()
+ανάμεσα στα βήματα (βλ. experiment_runner) και το job σταματά με JobCancelled·
+τα βήματα που ολοκληρώθηκαν είναι στο journal, άρα συνεχίζει με --resume.
+Στους workers του --workers (άλλα processes, χωρίς job) το cancel φτάνει μέσω ενός
+multiprocessing.Event (set_process_cancel_event, βλ. parallel_runner).
+
+Το module φορτώνει μόνο stdlib.
+"""
+
+from collections import deque
+from dataclasses import dataclass, field
+from typing import Callable, Deque, Dict, List, Optional
+import itertools
+import sys
+import threading
+import time
+import traceback
+
+
+DEFAULT_MAX_QUEUED = 16
+
+# πόσα ολοκληρωμένα jobs κρατάμε στη μνήμη (με το output τους)
+MAX_FINISHED_JOBS = 100
+
+FINAL_STATUSES = ("finished", "failed", "cancelled")
+
+
+class QueueFullError(RuntimeError):
+    pass
+
+
+class JobCancelled(Exception):
+    pass
+
+
+@dataclass
+class Job:
+    id: str
+    argv: List[str]
+    status: str = "queued"  # queued -> running -> finished / failed / cancelled
+    submitted_at: float = field(default_factory=time.time)
+    started_at: Optional[float] = None
+    finished_at: Optional[float] = None
+    error: Optional[str] = None
+    output: List[str] = field(default_factory=list)
+    cancel_requested: threading.Event = field(default_factory=threading.Event, repr=False)
+    _lock: threading.Lock = field(default_factory=threading.Lock, repr=False)
+
+    def write(self, text: str) -> None:
+        with self._lock:
+            self.output.append(text)
+
+    def to_dict(self, since: int = 0, position: Optional[int] = None) -> Dict:
+        with self._lock:
+            text = "".join(self.output)
+        return {
+            "id": self.id,
+            "argv": self.argv,
+            "status": self.status,
+            "position": position,
+            "cancel_requested": self.cancel_requested.is_set(),
+            "submitted_at": self.submitted_at,
+            "started_at": self.started_at,
+            "finished_at": self.finished_at,
+            "error": self.error,
+            "output": text[since:],
+            "output_end": len(text),
+        }
+
+
+# ----- output ανά job -----
+
+_CURRENT = threading.local()
+
+
+def current_job() -> Optional[Job]:
+    """
+    Το job που τρέχει σε αυτό το thread (None εκτός ουράς).
+    """
+    return getattr(_CURRENT, "job", None)
+
+
+# worker process του --workers: το Event που θέτει ο parent όταν ακυρωθεί το job του
+_PROCESS_CANCEL = {"event": None}
+
+
+def set_process_cancel_event(event) -> None:
+    _PROCESS_CANCEL["event"] = event
+
+
+def raise_if_cancelled() -> None:
+    """
+    Σημείο ελέγχου για cancel: no-op εκτός job ή αν δεν ζητήθηκε cancel.
+    """
+    job = current_job()
+    if job is not None and job.cancel_requested.is_set():
+        raise JobCancelled(f"Το job {job.id} ακυρώθηκε.")
+
+    event = _PROCESS_CANCEL["event"]
+    if event is not None and event.is_set():
+        raise JobCancelled("Το job του worker ακυρώθηκε.")
+
+
+class _JobOutput:
+    """
+    sys.stdout / sys.stderr όσο υπάρχει ουρά: ό,τι γράφει το thread ενός job πηγαίνει
+    στο output του job (και, αν echo, και στο πραγματικό stream). Ανά thread, άρα
+    ταυτόχρονα jobs δεν ανακατεύουν τα logs τους.
+    """
+
+    def __init__(self, stream, echo: bool = True):
+        self.stream = stream
+        self.echo = echo
+
+    def write(self, text: str) -> int:
+        job = current_job()
+        if job is not None:
+            job.write(text)
+        if job is None or self.echo:
+            self.stream.write(text)
+        return len(text)
+
+    def flush(self) -> None:
+        self.stream.flush()
+
+    def __getattr__(self, name):
+        return getattr(self.stream, name)
+
+
+def _install_job_output(echo: bool) -> None:
+    if not isinstance(sys.stdout, _JobOutput):
+        sys.stdout = _JobOutput(sys.stdout, echo)
+    if not isinstance(sys.stderr, _JobOutput):
+        sys.stderr = _JobOutput(sys.stderr, echo)
+
+
+# ----- ουρά -----
+
+class JobQueue:
+    """
+    run(job) εκτελεί ένα job (π.χ. run_experiment με τα job.argv) σε ένα από τα
+    executor threads· ό,τι τυπώνει γράφεται στο job.output.
+    """
+
+    def __init__(
+        self,
+        run: Callable[[Job], None],
+        executors: int = 1,
+        max_queued: int = DEFAULT_MAX_QUEUED,
+        echo: bool = True,
+        name: str = "jobs",
+    ):
+        self.run = run
+        self.executors = max(1, int(executors))
+        self.max_queued = max(1, int(max_queued))
+
+        self._jobs: Dict[str, Job] = {}
+        self._pending: Deque[Job] = deque()
+        self._running: Dict[str, Job] = {}
+        self._ids = itertools.count(1)
+        self._cond = threading.Condition()
+
+        _install_job_output(echo)
+
+        self._threads = [
+            threading.Thread(target=self._loop, name=f"{name}-{i}", daemon=True)
+            for i in range(self.executors)
+        ]
+        for thread in self._threads:
+            thread.start()
+
+    def submit(self, argv: List[str]) -> Job:
+        if not isinstance(argv, list) or not all(isinstance(a, str) for a in argv):
+            raise ValueError("Το 'argv' πρέπει να είναι λίστα από strings.")
+
+        with self._cond:
+            if len(self._pending) >= self.max_queued:
+                raise QueueFullError(
+                    f"Η ουρά είναι γεμάτη ({len(self._pending)} jobs σε αναμονή)· δοκίμασε αργότερα."
+                )
+            job = Job(id=f"job-{next(self._ids)}", argv=list(argv))
+            self._jobs[job.id] = job
+            self._pending.append(job)
+            self._prune()
+            self._cond.notify()
+        return job
+
+    def get(self, job_id: str) -> Optional[Job]:
+        with self._cond:
+            return self._jobs.get(job_id)
+
+    def position(self, job: Job) -> Optional[int]:
+        """
+        Θέση στην ουρά (1 = το επόμενο που θα τρέξει), ή None αν δεν περιμένει.
+        """
+        with self._cond:
+            try:
+                return self._pending.index(job) + 1
+            except ValueError:
+                return None
+
+    def job_dict(self, job_id: str, since: int = 0) -> Optional[Dict]:
+        job = self.get(job_id)
+        if job is None:
+            return None
+        return job.to_dict(since=since, position=self.position(job))
+
+    def cancel(self, job_id: str) -> Optional[Job]:
+        """
+        queued -> βγαίνει από την ουρά· running -> σταματά στο επόμενο raise_if_cancelled().
+        """
+        with self._cond:
+            job = self._jobs.get(job_id)
+            if job is None:
+                return None
+
+            if job.status == "queued":
+                self._pending.remove(job)
+                job.status = "cancelled"
+                job.finished_at = time.time()
+            elif job.status == "running":
+                job.cancel_requested.set()
+        return job
+
+    def jobs(self) -> List[Dict]:
+        # η λίστα φτιάχνεται μέσα στο lock: ένα job δεν γίνεται prune ανάμεσα σε λίστα και job_dict
+        with self._cond:
+            dicts = [job.to_dict(position=self.position(job)) for job in self._jobs.values()]
+        return [{k: v for k, v in d.items() if k not in ("output", "output_end")} for d in dicts]
+
+    def status(self) -> Dict:
+        with self._cond:
+            counts: Dict[str, int] = {}
+            for job in self._jobs.values():
+                counts[job.status] = counts.get(job.status, 0) + 1
+            return {
+                "executors": self.executors,
+                "max_queued": self.max_queued,
+                "running": list(self._running),
+                "queued": [job.id for job in self._pending],
+                "jobs": counts,
+            }
+
+    def _prune(self) -> None:
+        done = [j for j in self._jobs.values() if j.status in FINAL_STATUSES]
+        for job in done[:-MAX_FINISHED_JOBS]:
+            del self._jobs[job.id]
+
+    def _loop(self) -> None:
+        while True:
+            with self._cond:
+                while not self._pending:
+                    self._cond.wait()
+                job = self._pending.popleft()
+                job.status = "running"
+                job.started_at = time.time()
+                self._running[job.id] = job
+
+            _CURRENT.job = job
+            try:
+                self.run(job)
+                job.status = "finished"
+            except JobCancelled as e:
+                job.error = str(e)
+                job.write(f"\n{e} Συνέχεια με --resume <experiment_id>.\n")
+                job.status = "cancelled"
+            except BaseException as e:
+                # και το SystemExit του argparse (λάθος args) είναι αποτυχία του job, όχι της ουράς
+                job.error = f"{type(e).__name__}: {e}"
+                job.write("\n" + traceback.format_exc())
+                job.status = "failed"
+            finally:
+                _CURRENT.job = None
+                job.finished_at = time.time()
+                with self._cond:
+                    self._running.pop(job.id, None)
+
+
+def run_experiment_job(job: Job) -> None:
+    """
+    Ο default runner: τα job.argv είναι τα args του run_experiment.py.
+    """
+    from run_experiment import parse_args, run_from_args
+
+    args = parse_args(job.argv)
+    args.daemon = None  # τρέχουμε ήδη μέσα στην ουρά
+    run_from_args(args)
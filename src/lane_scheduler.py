@@ -0,0 +1,242 @@
+from dataclasses import dataclass, field
+from typing import AsyncIterator, Awaitable, Callable, Dict, Iterator, List, Optional
+import asyncio
+
+from input_loader import ModelDef, PersonaDef
+
+
+@dataclass
+class Lane:
+    """
+    Ένα dialogue lane = ένα (model, test, persona, run).
+
+    items: τα items του test του lane (με τη σειρά που ρωτιούνται).
+    item_order: label της σειράς των items (βλ. counterbalance), για τα rows.
+    depends_on: index του lane του οποίου το ΤΕΛΙΚΟ context είναι το αρχικό
+    context αυτού του lane (None -> ξεκινά από κενό context).
+    """
+    index: int
+    model: ModelDef
+    persona: PersonaDef
+    run_index: int
+    system_prompt: str
+    test_name: str = ""
+    items: List = field(default_factory=list)
+    item_order: str = "file"
+    depends_on: Optional[int] = None
+    context: List[Dict] = field(default_factory=list)
+    next_item: int = 0
+    started: bool = False
+    finished: bool = False
+    rows: List[Dict] = field(default_factory=list)
+
+
+def build_lanes(
+    model: ModelDef,
+    tests: Dict[str, List],
+    persona_cfgs: List,
+    memory_between_personas: str,
+    system_prompt_for: Callable[[PersonaDef, str], str],
+) -> List[Lane]:
+    """
+    Μετατρέπει τα persona configs ενός μοντέλου σε dependency graph από lanes,
+    με την ίδια σειρά που τα διατρέχει το σειριακό loop (test -> persona -> run).
+
+    tests: test_name -> items. Κάθε test ξεκινά από κενό context, άρα τα lanes
+    διαφορετικών tests είναι ανεξάρτητα και μπαίνουν στα ίδια batched ticks.
+
+    - fresh      -> κάθε run εξαρτάται μόνο από το base_context της persona
+    - continuous -> το run r εξαρτάται από το run r-1 (σειριακή αλυσίδα)
+    - carry_over -> το base_context μιας persona είναι το τελικό context
+                    του τελευταίου run της προηγούμενης persona (μέσα στο ίδιο test)
+    """
+    lanes: List[Lane] = []
+
+    for test_name, items in tests.items():
+        # lane που δίνει το carry_over seed στην επόμενη persona (None -> κενό)
+        carry_over_source: Optional[int] = None
+
+        for pos, persona_cfg in enumerate(persona_cfgs):
+            persona = persona_cfg.persona
+
+            if pos > 0 and memory_between_personas == "carry_over":
+                base_source = carry_over_source
+            else:
+                base_source = None
+
+            system_prompt = system_prompt_for(persona, test_name)
+            last_lane: Optional[int] = None
+
+            for run_index in range(1, persona_cfg.runs + 1):
+                if run_index > 1 and persona_cfg.memory_within_persona == "continuous":
+                    depends_on = last_lane
+                else:
+                    depends_on = base_source
+
+                lane = Lane(
+                    index=len(lanes),
+                    model=model,
+                    persona=persona,
+                    run_index=run_index,
+                    system_prompt=system_prompt,
+                    test_name=test_name,
+                    items=items,
+                    depends_on=depends_on,
+                )
+                lanes.append(lane)
+                last_lane = lane.index
+
+            # persona χωρίς runs: περνά το δικό της base_context παρακάτω
+            carry_over_source = last_lane if last_lane is not None else base_source
+
+    return lanes
+
+
+class LaneScheduler:
+    """
+    Εκτελεί lanes σε ticks: σε κάθε tick, το επόμενο item ΟΛΩΝ των ready lanes
+    πακετάρεται σε ένα batched call.
+
+    Τα lanes επιστρέφονται (yield) με τη σειρά του σειριακού loop, μόλις
+    ολοκληρωθούν αυτά και όλα τα προηγούμενα, ώστε τα rows να βγαίνουν
+    στην ίδια σειρά με πριν.
+    """
+
+    def __init__(self, lanes: List[Lane]):
+        self.lanes = lanes
+
+        # lane.index -> lane (ένα shard του --workers έχει μόνο μερικά από τα lanes)
+        self._by_index: Dict[int, Lane] = {lane.index: lane for lane in lanes}
+
+        # πόσα lanes περιμένουν ακόμα το context κάθε lane (για να το ελευθερώσουμε)
+        self._waiting: Dict[int, int] = {}
+        for lane in lanes:
+            if lane.depends_on is not None:
+                self._waiting[lane.depends_on] = self._waiting.get(lane.depends_on, 0) + 1
+
+    def _release_context(self, lane: Lane) -> None:
+        if lane.finished and self._waiting.get(lane.index, 0) == 0:
+            lane.context = []
+
+    def _start_ready_lanes(self) -> None:
+        for lane in self.lanes:
+            if lane.started:
+                continue
+
+            if lane.depends_on is None:
+                lane.context = []
+            else:
+                dep = self._by_index[lane.depends_on]
+                if not dep.finished:
+                    continue
+                lane.context = dep.context.copy()
+                self._waiting[dep.index] -= 1
+                self._release_context(dep)
+
+            lane.started = True
+            lane.finished = lane.next_item >= len(lane.items)
+
+    def _messages_for(self, lane: Lane) -> List[Dict]:
+        return (
+            [{"role": "system", "content": lane.system_prompt}]
+            + lane.context
+            + [{"role": "user", "content": lane.items[lane.next_item].text}]
+        )
+
+    def _record_reply(
+        self,
+        lane: Lane,
+        reply_text: str,
+        make_row: Callable[[Lane, object, str], Dict],
+    ) -> None:
+        item = lane.items[lane.next_item]
+        lane.rows.append(make_row(lane, item, reply_text))
+
+        # Store real dialogue turns (memory modes)
+        lane.context.append({"role": "user", "content": item.text})
+        lane.context.append({"role": "assistant", "content": reply_text})
+
+        lane.next_item += 1
+        lane.finished = lane.next_item >= len(lane.items)
+
+    def run(
+        self,
+        call_batch: Callable[[List[Lane], List[List[Dict]]], List[str]],
+        make_row: Callable[[Lane, object, str], Dict],
+    ) -> Iterator[Lane]:
+        """
+        call_batch(lanes, messages_list) -> ένα reply ανά lane
+        make_row(lane, item, reply_text) -> raw row για το lane
+        """
+        next_to_emit = 0
+
+        while next_to_emit < len(self.lanes):
+            self._start_ready_lanes()
+
+            ready = [lane for lane in self.lanes if lane.started and not lane.finished]
+
+            if ready:
+                messages_list = [self._messages_for(lane) for lane in ready]
+
+                replies = call_batch(ready, messages_list)
+
+                for lane, reply_text in zip(ready, replies):
+                    self._record_reply(lane, reply_text, make_row)
+
+            elif not self.lanes[next_to_emit].finished:
+                raise RuntimeError("Lane scheduler: κανένα lane δεν είναι έτοιμο (κυκλική εξάρτηση;)")
+
+            while next_to_emit < len(self.lanes) and self.lanes[next_to_emit].finished:
+                lane = self.lanes[next_to_emit]
+                yield lane
+                self._release_context(lane)
+                next_to_emit += 1
+
+    async def arun(
+        self,
+        acall_step: Callable[[Lane, List[Dict]], Awaitable[str]],
+        make_row: Callable[[Lane, object, str], Dict],
+        max_in_flight: int = 8,
+    ) -> AsyncIterator[Lane]:
+        """
+        Async εκδοχή για remote providers: κάθε lane είναι ένα task που στέλνει
+        τα items του σειριακά, και έως max_in_flight requests (από διαφορετικά
+        lanes) είναι ταυτόχρονα in flight. Ένα lane ξεκινά όταν τελειώσει
+        το lane από το οποίο εξαρτάται.
+
+        acall_step(lane, messages) -> reply για το τρέχον item του lane
+        """
+        in_flight = asyncio.Semaphore(max(1, int(max_in_flight)))
+        done = {lane.index: asyncio.Event() for lane in self.lanes}
+
+        async def _lane_task(lane: Lane) -> None:
+            if lane.depends_on is not None:
+                await done[lane.depends_on].wait()
+                dep = self._by_index[lane.depends_on]
+                lane.context = dep.context.copy()
+                self._waiting[dep.index] -= 1
+                self._release_context(dep)
+            else:
+                lane.context = []
+
+            lane.started = True
+            lane.finished = lane.next_item >= len(lane.items)
+
+            while not lane.finished:
+                messages = self._messages_for(lane)
+                async with in_flight:
+                    reply_text = await acall_step(lane, messages)
+                self._record_reply(lane, reply_text, make_row)
+
+            done[lane.index].set()
+
+        tasks = [asyncio.create_task(_lane_task(lane)) for lane in self.lanes]
+
+        try:
+            for lane, task in zip(self.lanes, tasks):
+                await task
+                yield lane
+                self._release_context(lane)
+        finally:
+            for task in tasks:
+                task.cancel()
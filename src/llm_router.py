@@ -1,19 +1,109 @@
-from typing import List, Dict
+from dataclasses import dataclass
+from typing import Callable, List, Dict, Optional, Tuple
+import asyncio
+import importlib
+import json
+import sys
+import weakref
 
 from input_loader import ModelDef
-from hf_llm_client import call_hf_local_chat
+from prompt_format import _messages_to_prompt, model_key, DEFAULT_BATCH_SIZE, DEFAULT_TOP_P
+from response_cache import ResponseCache
+from profiling import count, timer
 
-# Προαιρετικό: αν υπάρχει OpenAI client, τον φορτώνουμε, αλλιώς αφήνουμε placeholder.
-try:
-    from llm_client import call_openai_chat  # για μελλοντική χρήση με OpenAI API
-except ImportError:
-    call_openai_chat = None
+
+@dataclass(frozen=True)
+class ProviderClient:
+    """
+    Ο client ενός provider: module + ονόματα των συναρτήσεών του.
+
+    Το module (μαζί με τα βαριά dependencies του, π.χ. torch / transformers για
+    huggingface_local) φορτώνεται στην πρώτη πραγματική κλήση σε μοντέλο του
+    provider, όχι στο import του router· έτσι CLI (--help), analysis και UI
+    ξεκινούν χωρίς αυτά.
+    """
+    module: str
+    chat: str  # (model, messages, temperature=, seed=) -> str
+    achat: Optional[str] = None  # async εκδοχή· αλλιώς το chat τρέχει σε thread
+    tokens: Optional[str] = None  # () -> tokens που παρήγαγε ο provider σε αυτό το process
+    aclose: Optional[str] = None  # async () -> None: κλείσιμο pooled connections
+
+    def load(self):
+        return importlib.import_module(self.module)
+
+    def loaded(self):
+        # None αν κανένα μοντέλο του provider δεν έχει κληθεί ακόμα σε αυτό το process
+        return sys.modules.get(self.module)
+
+    def fn(self, name: str) -> Callable:
+        return getattr(self.load(), getattr(self, name))
+
+
+_OPENAI_CLIENT = ProviderClient(
+    "openai_chat_client",
+    chat="call_openai_chat",
+    achat="acall_openai_chat",
+    tokens="completion_tokens",
+    aclose="aclose_clients",
+)
+
+# registry: ModelDef.provider -> client
+PROVIDER_CLIENTS: Dict[str, ProviderClient] = {
+    "huggingface_local": ProviderClient("hf_llm_client", chat="call_hf_local_chat", tokens="generated_tokens"),
+    "openai": _OPENAI_CLIENT,
+    "openai_compatible": _OPENAI_CLIENT,
+}
+
+
+def provider_client(provider: str) -> ProviderClient:
+    if provider == "anthropic":
+        # Placeholder για μελλοντική χρήση (Claude)
+        raise NotImplementedError(
+            "Anthropic/Claude provider δεν έχει υλοποιηθεί ακόμα."
+        )
+
+    client = PROVIDER_CLIENTS.get(provider)
+    if client is None:
+        raise ValueError(f"Άγνωστος provider: {provider}")
+    return client
+
+
+def _hf():
+    # huggingface_local-only δρόμοι (batched generate, logits, residency)
+    return PROVIDER_CLIENTS["huggingface_local"].load()
+
+
+def _loaded_clients() -> List[ProviderClient]:
+    seen: Dict[str, ProviderClient] = {}
+    for client in PROVIDER_CLIENTS.values():
+        if client.module not in seen and client.loaded() is not None:
+            seen[client.module] = client
+    return list(seen.values())
+
+
+# Πόσα requests ταυτόχρονα ανά provider στο async path.
+# huggingface_local = 1: το μοντέλο είναι ένα, στο ίδιο process.
+PROVIDER_CONCURRENCY = {
+    "huggingface_local": 1,
+    "openai": 16,
+    # τοπικός server (vLLM, llama.cpp, local_model_server.py): τα ταυτόχρονα
+    # requests γίνονται batches στον server, άρα θέλουμε πολλά in flight
+    "openai_compatible": 32,
+}
+
+# providers που μιλούν το OpenAI chat completions API πάνω από HTTP
+HTTP_PROVIDERS = ("openai", "openai_compatible")
+
+# providers που εκτελούνται με batched ticks (LaneScheduler.run)· οι υπόλοιποι
+# (HTTP APIs) τρέχουν στο async path με ένα task ανά lane (LaneScheduler.arun)
+BATCHED_PROVIDERS = ("huggingface_local",)
 
 
 def call_model(
     model: ModelDef,
     messages: List[Dict],
     temperature: float = 0.7,
+    seed: Optional[int] = None,
 ) -> str:
     """
     Ενιαίο entry point για ΟΛΑ τα μοντέλα.
@@ -22,27 +112,339 @@ def call_model(
     - Καλεί τον κατάλληλο client (HF local, OpenAI, κλπ.)
 
     ΤΩΡΑ:
-      - Υποστηρίζουμε μόνο provider == "huggingface_local"
-      - Έχουμε placeholders για "openai" και "anthropic"
+      - provider == "huggingface_local" (in-process transformers)
+      - provider == "openai" (chat completions API, OPENAI_BASE_URL / OPENAI_API_KEY)
+      - provider == "openai_compatible" (τοπικός server στο model.base_url, π.χ. vLLM· key μόνο από api_key_env)
+      - placeholder για "anthropic"
+
+    seed: seed του βήματος (seeding.derive_seed)· None -> global RNG / χωρίς seed.
     """
 
+    chat = provider_client(model.provider).fn("chat")
+    with timer("router.call_model"):
+        return chat(model, messages, temperature=temperature, seed=seed)
+
+
+def generated_tokens() -> int:
+    """
+    Tokens που παρήγαγαν τα μοντέλα σε αυτό το process (huggingface_local generate +
+    usage.completion_tokens των HTTP providers), για tokens/sec στα progress events.
+    Μόνο οι clients που έχουν ήδη φορτωθεί (οι άλλοι δεν έχουν παράγει τίποτα).
+    """
+    return sum(client.fn("tokens")() for client in _loaded_clients() if client.tokens)
+
+
+async def aclose_clients() -> None:
+    """
+    Κλείνει τις pooled connections των clients που έχουν φορτωθεί (τέλος ενός event loop).
+    """
+    for client in _loaded_clients():
+        if client.aclose:
+            await client.fn("aclose")()
+
+
+def plan_model_sweep(remaining: List[ModelDef], ram_mb: int = 0, processes: int = 1) -> None:
+    """
+    Δηλώνει στα in-process μοντέλα (huggingface_local) ποια θα χρειαστούν, με τη σειρά,
+    από εδώ και πέρα στο sweep: στο eviction (RAM budget ram_mb) φεύγουν πρώτα όσα
+    δεν ξαναχρειάζονται, και όταν φορτωθεί ένα, διαβάζεται από το δίσκο το επόμενο.
+    """
+    upcoming = [model_key(m) for m in remaining if m.provider == "huggingface_local"]
+    if upcoming or PROVIDER_CLIENTS["huggingface_local"].loaded() is not None:
+        _hf().configure_model_residency(ram_mb, processes=processes, upcoming=upcoming)
+
+
+def render_prompt(model: ModelDef, messages: List[Dict]) -> str:
+    """
+    Το prompt όπως ακριβώς το βλέπει ο provider (για τα cache keys).
+    """
     if model.provider == "huggingface_local":
-        # Τοπικά HuggingFace models (TinyLlama, Phi-3, κλπ.)
-        return call_hf_local_chat(model, messages, temperature=temperature)
-
-    if model.provider == "openai":
-        # Placeholder για μελλοντική χρήση
-        if call_openai_chat is None:
-            raise RuntimeError(
-                "OpenAI provider ζητήθηκε αλλά δεν είναι διαθέσιμος "
-                "(λείπει ο llm_client ή δεν θέλουμε ακόμα OpenAI API)."
+        return _messages_to_prompt(messages)
+
+    return json.dumps(messages, ensure_ascii=False, sort_keys=True)
+
+
+def _cache_key(
+    model: ModelDef,
+    messages: List[Dict],
+    temperature: float,
+    sample_index: int,
+    scoring_mode: str,
+    seed: Optional[int] = None,
+    seed_in_key: bool = True,
+) -> str:
+    """
+    Το seed μπαίνει στο key μόνο όταν καθορίζει την απάντηση: όχι σε temperature 0
+    (greedy / argmax), ούτε όταν seed_in_key=False (seed που δεν έδωσε ο χρήστης, τυχαίο
+    σε κάθε run)· τότε οι επαναλήψεις ξεχωρίζουν μόνο με το sample_index, και ένα
+    ξανατρέξιμο βρίσκει τις απαντήσεις του προηγούμενου στην cache.
+    """
+    if not seed_in_key or temperature <= 0:
+        seed = None
+    return ResponseCache.make_key(
+        model_key(model),
+        render_prompt(model, messages),
+        temperature,
+        None if scoring_mode == "logits" else DEFAULT_TOP_P,
+        seed,
+        sample_index,
+        scoring_mode,
+    )
+
+
+def _through_cache(
+    cache: Optional[ResponseCache],
+    model: ModelDef,
+    messages_list: List[List[Dict]],
+    temperature: float,
+    sample_indices: Optional[List[int]],
+    scoring_mode: str,
+    compute: Callable[[List[List[Dict]], Optional[List[int]]], List[Dict]],
+    seeds: Optional[List[int]] = None,
+    seed_in_key: bool = True,
+) -> List[Dict]:
+    """
+    Κοιτάζει πρώτα την ResponseCache και καλεί το compute(messages, seeds) μόνο
+    για τα misses (σε ένα batch), αποθηκεύοντας τις νέες απαντήσεις.
+    Το seed κάθε βήματος είναι μέρος του key (βλ. _cache_key).
+
+    Κάθε value έχει και το "seed" που παρήγαγε την απάντηση: για ένα hit είναι
+    το seed του run που την έβαλε στην cache, όχι απαραίτητα το seed του βήματος.
+    """
+    step_seeds = seeds if seeds is not None else [None] * len(messages_list)
+
+    if cache is None:
+        with timer("router.compute"):
+            computed = compute(messages_list, seeds)
+        return [{**value, "seed": seed} for value, seed in zip(computed, step_seeds)]
+
+    if sample_indices is None:
+        sample_indices = [0] * len(messages_list)
+
+    with timer("cache.lookup"):
+        keys = [
+            _cache_key(model, messages, temperature, sample_index, scoring_mode, seed, seed_in_key)
+            for messages, sample_index, seed in zip(messages_list, sample_indices, step_seeds)
+        ]
+        values: List[Optional[Dict]] = [cache.get(key) for key in keys]
+
+    missing = [i for i, value in enumerate(values) if value is None]
+    count("cache.hits", len(values) - len(missing))
+    count("cache.misses", len(missing))
+
+    if missing:
+        with timer("router.compute"):
+            computed = compute(
+                [messages_list[i] for i in missing],
+                None if seeds is None else [seeds[i] for i in missing],
             )
-        return call_openai_chat(model, messages, temperature=temperature)
+        for i, value in zip(missing, computed):
+            values[i] = {**value, "seed": step_seeds[i]}
+            cache.put(keys[i], values[i])
 
-    if model.provider == "anthropic":
-        # Placeholder για μελλοντική χρήση (Claude)
-        raise NotImplementedError(
-            "Anthropic/Claude provider δεν έχει υλοποιηθεί ακόμα."
+    # entries από παλιότερες εκδόσεις της cache δεν έχουν seed
+    return [{"seed": None, **value} for value in values]
+
+
+def call_model_batch(
+    model: ModelDef,
+    messages_list: List[List[Dict]],
+    temperature: float = 0.7,
+    batch_size: int = DEFAULT_BATCH_SIZE,
+    prefix_cache_mb: int = 0,
+    constrained: bool = False,
+    cache: Optional[ResponseCache] = None,
+    sample_indices: Optional[List[int]] = None,
+    scale: Optional[Tuple[int, int]] = None,
+    seeds: Optional[List[int]] = None,
+    seed_in_key: bool = True,
+    with_seeds: bool = False,
+) -> List:
+    """
+    Batched entry point: ένα reply ανά messages list, με την ίδια σειρά.
+
+    - huggingface_local -> πραγματικό batched generate (padding-aware),
+      ή prefix KV-cache reuse αν prefix_cache_mb > 0.
+      constrained=True -> μόνο τα tokens της κλίμακας + EOS (LikertLogitsProcessor)
+    - HTTP providers -> ταυτόχρονα requests (ο server τα κάνει batch)
+    - οι υπόλοιποι providers -> σειριακές κλήσεις στο call_model
+
+    cache: προαιρετική ResponseCache. sample_indices ξεχωρίζουν επαναλήψεις
+    του ίδιου prompt (π.χ. run_index των fresh runs).
+    scale: (scale_min, scale_max) του test, για να μην ψάχνεται στο system prompt
+    (huggingface_local).
+    seeds: ένα seed ανά messages list (seeding.derive_seed)· ίδιες απαντήσεις
+    σε batched, async και σειριακό τρέξιμο. seed_in_key=False -> τα seeds δεν
+    μπαίνουν στο key της cache (seed που δεν έδωσε ο χρήστης).
+    with_seeds=True -> (reply, seed) ανά messages list, με το seed που παρήγαγε το
+    reply (από την cache για hits, βλ. _through_cache).
+    """
+    def _compute(pending: List[List[Dict]], pending_seeds: Optional[List[int]]) -> List[Dict]:
+        if model.provider == "huggingface_local":
+            replies = _hf().call_hf_local_chat_batch(
+                model,
+                pending,
+                temperature=temperature,
+                batch_size=batch_size,
+                prefix_cache_mb=prefix_cache_mb,
+                constrained=constrained,
+                scale=scale,
+                seeds=pending_seeds,
+            )
+        elif model.provider in HTTP_PROVIDERS:
+            replies = asyncio.run(_acall_many(model, pending, temperature, pending_seeds))
+        else:
+            replies = [
+                call_model(model, messages, temperature=temperature, seed=seed)
+                for messages, seed in zip(pending, pending_seeds or [None] * len(pending))
+            ]
+        return [{"text": reply} for reply in replies]
+
+    values = _through_cache(
+        cache,
+        model,
+        messages_list,
+        temperature,
+        sample_indices,
+        "constrained" if constrained else "generate",
+        _compute,
+        seeds,
+        seed_in_key,
+    )
+    if with_seeds:
+        return [(value["text"], value["seed"]) for value in values]
+    return [value["text"] for value in values]
+
+
+def score_model_batch(
+    model: ModelDef,
+    messages_list: List[List[Dict]],
+    temperature: float = 0.7,
+    batch_size: int = DEFAULT_BATCH_SIZE,
+    prefix_cache_mb: int = 0,
+    cache: Optional[ResponseCache] = None,
+    sample_indices: Optional[List[int]] = None,
+    scale: Optional[Tuple[int, int]] = None,
+    seeds: Optional[List[int]] = None,
+    seed_in_key: bool = True,
+    with_seeds: bool = False,
+) -> List[Tuple]:
+    """
+    scoring_mode="logits": ένα forward pass ανά prompt, χωρίς decoding.
+    Επιστρέφει (answer, probs) ανά messages list, όπου probs = πιθανότητα
+    κάθε τιμής της κλίμακας scale_min..scale_max· with_seeds=True ->
+    (answer, probs, seed), όπως στο call_model_batch.
+
+    Χρειάζεται πρόσβαση στα logits, άρα μόνο για huggingface_local.
+    """
+    if model.provider != "huggingface_local":
+        raise ValueError(
+            f"scoring_mode='logits' υποστηρίζεται μόνο για huggingface_local, όχι για '{model.provider}'."
+        )
+
+    def _compute(pending: List[List[Dict]], pending_seeds: Optional[List[int]]) -> List[Dict]:
+        scored = _hf().score_hf_local_logits_batch(
+            model,
+            pending,
+            temperature=temperature,
+            batch_size=batch_size,
+            prefix_cache_mb=prefix_cache_mb,
+            scale=scale,
+            seeds=pending_seeds,
+        )
+        return [{"text": answer, "probs": probs} for answer, probs in scored]
+
+    values = _through_cache(
+        cache,
+        model,
+        messages_list,
+        temperature,
+        sample_indices,
+        "logits",
+        _compute,
+        seeds,
+        seed_in_key,
+    )
+    if with_seeds:
+        return [(value["text"], value["probs"], value["seed"]) for value in values]
+    return [(value["text"], value["probs"]) for value in values]
+
+
+# ----- async -----
+
+# asyncio.Semaphore ανήκει σε ένα event loop, άρα κρατάμε ένα σετ ανά loop
+_semaphores: "weakref.WeakKeyDictionary[asyncio.AbstractEventLoop, Dict[str, asyncio.Semaphore]]" = weakref.WeakKeyDictionary()
+
+
+def _provider_semaphore(provider: str) -> asyncio.Semaphore:
+    per_loop = _semaphores.setdefault(asyncio.get_running_loop(), {})
+    if provider not in per_loop:
+        per_loop[provider] = asyncio.Semaphore(PROVIDER_CONCURRENCY.get(provider, 4))
+    return per_loop[provider]
+
+
+async def _acall_many(
+    model: ModelDef,
+    messages_list: List[List[Dict]],
+    temperature: float,
+    seeds: Optional[List[int]] = None,
+) -> List[str]:
+    # sync entry point (call_model_batch) για HTTP providers: όλα μαζί σε ένα event loop
+    if seeds is None:
+        seeds = [None] * len(messages_list)
+    try:
+        return list(
+            await asyncio.gather(
+                *(
+                    acall_model(model, messages, temperature=temperature, seed=seed)
+                    for messages, seed in zip(messages_list, seeds)
+                )
+            )
         )
+    finally:
+        await aclose_clients()
+
+
+async def acall_model(
+    model: ModelDef,
+    messages: List[Dict],
+    temperature: float = 0.7,
+    cache: Optional[ResponseCache] = None,
+    sample_index: int = 0,
+    seed: Optional[int] = None,
+    seed_in_key: bool = True,
+    with_seed: bool = False,
+):
+    """
+    Async εκδοχή του call_model (with_seed=True -> (reply, seed), βλ. call_model_batch).
+
+    - κάθε provider έχει δικό του semaphore (PROVIDER_CONCURRENCY), ώστε πολλά
+      lanes να έχουν requests in flight χωρίς να πνίγουν τον provider
+    - HTTP providers: pooled AsyncClient + backoff σε rate limits
+    - huggingface_local: το sync call τρέχει σε thread, ένα τη φορά
+    """
+    client = provider_client(model.provider)
+
+    async def _compute() -> str:
+        # χρόνος μέσα στο semaphore (χωρίς την αναμονή για slot)
+        async with _provider_semaphore(model.provider):
+            with timer("router.acall_model"):
+                if client.achat:
+                    return await client.fn("achat")(model, messages, temperature=temperature, seed=seed)
+                return await asyncio.to_thread(client.fn("chat"), model, messages, temperature=temperature, seed=seed)
+
+    if cache is None:
+        value = {"text": await _compute(), "seed": seed}
+    else:
+        with timer("cache.lookup"):
+            key = _cache_key(model, messages, temperature, sample_index, "generate", seed, seed_in_key)
+            value = cache.get(key)
+        count("cache.hits" if value is not None else "cache.misses")
+
+        if value is None:
+            value = {"text": await _compute(), "seed": seed}
+            cache.put(key, value)
 
-    raise ValueError(f"Άγνωστος provider: {model.provider}")
+    if with_seed:
+        return value["text"], value.get("seed")
+    return value["text"]
@@ -0,0 +1,185 @@
+"""
+OpenAI-compatible server για τοπικά HuggingFace μοντέλα (stand-in για vLLM / llama.cpp):
+το μοντέλο φορτώνεται ΜΙΑ φορά και μένει ζεστό για όσα experiments ακολουθήσουν.
+
+    python src/local_model_server.py --preload Qwen/Qwen2.5-3B-Instruct --port 8000
+    # data/models/<id>.json: {"provider": "openai_compatible", "base_url": "http://127.0.0.1:8000/v1", ...}
+
+Ταυτόχρονα requests (πολλά lanes / πολλά experiments) μαζεύονται σε batches
+(έως --batch-size, αναμονή έως --max-wait-ms) και περνούν από ένα batched
+generate του hf_llm_client.
+"""
+
+from dataclasses import dataclass, field
+from http.server import ThreadingHTTPServer
+from typing import Dict, List, Optional, Tuple
+import argparse
+import queue
+import random
+import threading
+import time
+
+from input_loader import ModelDef
+from hf_llm_client import (
+    DEFAULT_BATCH_SIZE,
+    PRECISIONS,
+    QUANTIZATIONS,
+    _get_pipeline,
+    call_hf_local_chat_batch,
+)
+from mock_openai_server import make_handler
+
+
+@dataclass
+class _PendingRequest:
+    api_name: str
+    messages: List[Dict]
+    temperature: float
+    seed: Optional[int] = None
+    done: threading.Event = field(default_factory=threading.Event)
+    reply: Optional[str] = None
+    error: Optional[BaseException] = None
+
+
+class RequestBatcher:
+    """
+    Dynamic batching: ένα worker thread μαζεύει τα requests που φτάνουν μέσα σε
+    max_wait_ms (έως batch_size) και τα στέλνει ανά (api_name, temperature)
+    σε ένα call_hf_local_chat_batch. Το μοντέλο τρέχει μόνο σε αυτό το thread.
+    """
+
+    def __init__(
+        self,
+        batch_size: int = DEFAULT_BATCH_SIZE,
+        max_wait_ms: float = 10.0,
+        precision: Optional[str] = None,
+        quantization: Optional[str] = None,
+    ):
+        self.batch_size = max(1, int(batch_size))
+        self.precision = precision
+        self.quantization = quantization
+        self.max_wait_s = max(0.0, float(max_wait_ms)) / 1000.0
+        self._queue: "queue.Queue[_PendingRequest]" = queue.Queue()
+        self._worker = threading.Thread(target=self._loop, name="request-batcher", daemon=True)
+        self._worker.start()
+
+    def submit(self, api_name: str, messages: List[Dict], temperature: float, seed: Optional[int] = None) -> str:
+        pending = _PendingRequest(api_name, messages, temperature, seed)
+        self._queue.put(pending)
+        pending.done.wait()
+
+        if pending.error is not None:
+            raise pending.error
+        return pending.reply
+
+    def _collect(self) -> List[_PendingRequest]:
+        batch = [self._queue.get()]
+        deadline = time.monotonic() + self.max_wait_s
+
+        while len(batch) < self.batch_size:
+            timeout = deadline - time.monotonic()
+            if timeout <= 0:
+                break
+            try:
+                batch.append(self._queue.get(timeout=timeout))
+            except queue.Empty:
+                break
+
+        return batch
+
+    def _loop(self) -> None:
+        while True:
+            groups: Dict[Tuple[str, float], List[_PendingRequest]] = {}
+            for pending in self._collect():
+                groups.setdefault((pending.api_name, pending.temperature), []).append(pending)
+
+            for (api_name, temperature), group in groups.items():
+                model = ModelDef(
+                    id=api_name,
+                    provider="huggingface_local",
+                    api_name=api_name,
+                    precision=self.precision,
+                    quantization=self.quantization,
+                )
+                # requests με "seed" δίνουν την ίδια απάντηση όποιο batch κι αν τα μαζέψει
+                seeds = None
+                if any(p.seed is not None for p in group):
+                    seeds = [random.getrandbits(63) if p.seed is None else int(p.seed) for p in group]
+                try:
+                    replies = call_hf_local_chat_batch(
+                        model,
+                        [p.messages for p in group],
+                        temperature=temperature,
+                        batch_size=self.batch_size,
+                        seeds=seeds,
+                    )
+                    for pending, reply in zip(group, replies):
+                        pending.reply = reply
+                except Exception as e:
+                    for pending in group:
+                        pending.error = e
+
+                for pending in group:
+                    pending.done.set()
+
+
+def parse_args() -> argparse.Namespace:
+    parser = argparse.ArgumentParser(description="OpenAI-compatible server για τοπικά HuggingFace μοντέλα.")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8000)
+    parser.add_argument(
+        "--preload",
+        action="append",
+        default=[],
+        help="HF model name (api_name) που φορτώνεται στην εκκίνηση (επαναλαμβανόμενο).",
+    )
+    parser.add_argument("--precision", choices=sorted(PRECISIONS), help="π.χ. bf16 (default: του transformers).")
+    parser.add_argument("--quantization", choices=QUANTIZATIONS, help="π.χ. int8_dynamic για CPU.")
+    parser.add_argument("--batch-size", type=int, default=DEFAULT_BATCH_SIZE)
+    parser.add_argument(
+        "--max-wait-ms",
+        type=float,
+        default=10.0,
+        help="Πόσο περιμένει ένα batch να γεμίσει πριν σταλεί στο μοντέλο.",
+    )
+    return parser.parse_args()
+
+
+def main() -> None:
+    args = parse_args()
+
+    for api_name in args.preload:
+        print(f"Loading {api_name} ...")
+        _get_pipeline(api_name, args.precision, args.quantization)
+
+    batcher = RequestBatcher(
+        batch_size=args.batch_size,
+        max_wait_ms=args.max_wait_ms,
+        precision=args.precision,
+        quantization=args.quantization,
+    )
+
+    def _complete(request: Dict) -> str:
+        if not request.get("model"):
+            raise ValueError("Το request δεν έχει 'model'.")
+        return batcher.submit(
+            request["model"],
+            request.get("messages") or [],
+            float(request.get("temperature", 0.7)),
+            request.get("seed"),
+        )
+
+    handler = make_handler(complete=_complete, model_ids=args.preload)
+    server = ThreadingHTTPServer((args.host, args.port), handler)
+    server.daemon_threads = True
+    print(f"Local model server στο http://{args.host}:{args.port}/v1")
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.server_close()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,146 @@
+"""
+Τοπικός mock server με OpenAI-compatible chat API, για δοκιμές του async path
+χωρίς πραγματικό API key:
+
+    python src/mock_openai_server.py --port 8011 --latency 0.2 --rate-limit 0.1
+    OPENAI_BASE_URL=http://127.0.0.1:8011/v1 python src/run_experiment.py ...
+
+- POST /v1/chat/completions -> τυχαίος ακέραιος μέσα στην κλίμακα του system prompt
+  ("from X to Y"), ή 3 αν δεν βρεθεί κλίμακα
+- GET  /v1/models           -> λίστα με ένα dummy μοντέλο
+- --latency: καθυστέρηση ανά request (δευτερόλεπτα)
+- --rate-limit: πιθανότητα να απαντήσει 429 με Retry-After (έλεγχος του backoff)
+"""
+
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Callable, Dict, Optional, Sequence
+import argparse
+import json
+import random
+import re
+import time
+
+
+SCALE_RE = re.compile(r"from\s+(-?\d+)\s+to\s+(-?\d+)", re.IGNORECASE)
+
+
+def _mock_reply(messages, seed: Optional[int] = None) -> str:
+    system = next((m.get("content", "") for m in messages if m.get("role") == "system"), "")
+    match = SCALE_RE.search(system or "")
+    if not match:
+        return "3"
+    lo, hi = sorted((int(match.group(1)), int(match.group(2))))
+    rng = random if seed is None else random.Random(seed)
+    return str(rng.randint(lo, hi))
+
+
+def make_handler(
+    latency: float = 0.0,
+    rate_limit: float = 0.0,
+    complete: Optional[Callable[[Dict], str]] = None,
+    model_ids: Sequence[str] = ("mock-model",),
+):
+    """
+    complete(request) -> κείμενο απάντησης για ένα chat completions request
+    (default: mock απάντηση). Το local_model_server.py ξαναχρησιμοποιεί τον
+    ίδιο handler με πραγματικό μοντέλο.
+    """
+    if complete is None:
+        complete = lambda request: _mock_reply(request.get("messages") or [], request.get("seed"))
+
+    class MockOpenAIHandler(BaseHTTPRequestHandler):
+        protocol_version = "HTTP/1.1"
+
+        def _send_json(self, status: int, payload, headers=None) -> None:
+            body = json.dumps(payload).encode("utf-8")
+            self.send_response(status)
+            self.send_header("Content-Type", "application/json")
+            self.send_header("Content-Length", str(len(body)))
+            for name, value in (headers or {}).items():
+                self.send_header(name, value)
+            self.end_headers()
+            self.wfile.write(body)
+
+        def do_GET(self) -> None:
+            if self.path.rstrip("/") == "/v1/models":
+                data = [{"id": model_id, "object": "model"} for model_id in model_ids]
+                self._send_json(200, {"object": "list", "data": data})
+            else:
+                self._send_json(404, {"error": {"message": f"not found: {self.path}"}})
+
+        def do_POST(self) -> None:
+            length = int(self.headers.get("Content-Length") or 0)
+            raw = self.rfile.read(length) if length else b""
+
+            if self.path.rstrip("/") != "/v1/chat/completions":
+                self._send_json(404, {"error": {"message": f"not found: {self.path}"}})
+                return
+
+            try:
+                request = json.loads(raw or b"{}")
+            except json.JSONDecodeError:
+                self._send_json(400, {"error": {"message": "invalid JSON"}})
+                return
+
+            if rate_limit > 0 and random.random() < rate_limit:
+                self._send_json(429, {"error": {"message": "rate limited"}}, {"Retry-After": "0.1"})
+                return
+
+            if latency > 0:
+                time.sleep(latency)
+
+            try:
+                content = complete(request)
+            except Exception as e:
+                self._send_json(500, {"error": {"message": f"{type(e).__name__}: {e}"}})
+                return
+
+            self._send_json(
+                200,
+                {
+                    "id": f"chatcmpl-mock-{random.getrandbits(32):08x}",
+                    "object": "chat.completion",
+                    "created": int(time.time()),
+                    "model": request.get("model", "mock-model"),
+                    "choices": [
+                        {
+                            "index": 0,
+                            "message": {"role": "assistant", "content": content},
+                            "finish_reason": "stop",
+                        }
+                    ],
+                    # προσέγγιση: λέξεις αντί για tokens του tokenizer
+                    "usage": {"completion_tokens": max(1, len(content.split()))},
+                },
+            )
+
+        def log_message(self, format, *args) -> None:
+            # σιωπηλός server (αλλιώς μία γραμμή ανά request στο stderr)
+            pass
+
+    return MockOpenAIHandler
+
+
+def parse_args() -> argparse.Namespace:
+    parser = argparse.ArgumentParser(description="Mock OpenAI-compatible chat server (για δοκιμές).")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8011)
+    parser.add_argument("--latency", type=float, default=0.0, help="Καθυστέρηση ανά request (s).")
+    parser.add_argument("--rate-limit", type=float, default=0.0, help="Πιθανότητα απάντησης 429.")
+    return parser.parse_args()
+
+
+def main() -> None:
+    args = parse_args()
+    server = ThreadingHTTPServer((args.host, args.port), make_handler(args.latency, args.rate_limit))
+    print(f"Mock OpenAI server στο http://{args.host}:{args.port}/v1")
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.server_close()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,303 @@
+"""
+Model daemon: ένα μακρόβιο process που τρέχει experiments ως jobs, ώστε τα
+μοντέλα (cache του hf_llm_client._get_pipeline), το transformers και ο tokenizer
+να μένουν φορτωμένα ανάμεσα στα runs.
+
+    python src/model_daemon.py --preload qwen-2.5-3b          # στο root του repo
+    python src/run_experiment.py --daemon --test-file ... --model qwen-2.5-3b ...
+
+HTTP JSON API (localhost):
+- GET  /status               -> pid, uptime, μνήμη (RSS), φορτωμένα μοντέλα, ουρά
+- GET  /jobs                 -> όλα τα jobs (χωρίς output)
+- POST /jobs {"argv": [...]}  -> νέο job (τα args του run_experiment.py)· 429 αν η ουρά είναι γεμάτη
+- GET  /jobs/<id>?since=N     -> status, θέση στην ουρά + output από τον χαρακτήρα N και μετά
+- POST /jobs/<id>/cancel      -> cancel (βγαίνει από την ουρά, ή σταματά στο επόμενο βήμα)
+
+Τα jobs περνούν από μια job_queue.JobQueue (ένα τη φορά, έως --max-queued σε
+αναμονή), με τη σειρά που υποβλήθηκαν.
+Τα paths (data/, results/) είναι σχετικά με το cwd του daemon.
+
+Το module φορτώνει μόνο stdlib στο import, ώστε CLI και UI να το χρησιμοποιούν
+ως client χωρίς κόστος. Ο daemon φορτώνει τον client ενός provider (π.χ.
+hf_llm_client -> torch / transformers) μόνο όταν τον χρειαστεί (--preload ή job),
+μέσω του llm_router.PROVIDER_CLIENTS· ένας daemon μόνο για HTTP providers ξεκινά
+χωρίς αυτά.
+"""
+
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Callable, Dict, Iterator, List, Optional
+from urllib.parse import parse_qs, urlparse
+import argparse
+import json
+import os
+import sys
+import time
+import urllib.error
+import urllib.request
+
+from job_queue import DEFAULT_MAX_QUEUED, FINAL_STATUSES, JobQueue, QueueFullError, run_experiment_job
+
+
+DEFAULT_DAEMON_URL = os.getenv("BIASMIND_DAEMON_URL") or "http://127.0.0.1:8765"
+
+
+# ----- client -----
+
+def _request(url: str, path: str, payload: Optional[Dict] = None, timeout: float = 10.0) -> Dict:
+    data = None if payload is None else json.dumps(payload).encode("utf-8")
+    req = urllib.request.Request(
+        url.rstrip("/") + path,
+        data=data,
+        method="GET" if payload is None else "POST",
+        headers={"Content-Type": "application/json"},
+    )
+    with urllib.request.urlopen(req, timeout=timeout) as resp:
+        return json.loads(resp.read().decode("utf-8"))
+
+
+def daemon_status(url: str = DEFAULT_DAEMON_URL, timeout: float = 0.5) -> Optional[Dict]:
+    """
+    Status του daemon, ή None αν δεν τρέχει / δεν απαντά.
+    """
+    try:
+        return _request(url, "/status", timeout=timeout)
+    except (OSError, ValueError):
+        return None
+
+
+def submit_job(url: str, argv: List[str]) -> Dict:
+    return _request(url, "/jobs", {"argv": list(argv)})
+
+
+def get_job(url: str, job_id: str, since: int = 0) -> Dict:
+    return _request(url, f"/jobs/{job_id}?since={int(since)}")
+
+
+def cancel_job(url: str, job_id: str) -> Dict:
+    return _request(url, f"/jobs/{job_id}/cancel", {})
+
+
+def follow_job(url: str, job_id: str, poll_s: float = 0.2) -> Iterator[Dict]:
+    """
+    Το job ανά poll_s, με job["output"] = μόνο το νέο output από το προηγούμενο,
+    μέχρι να τελειώσει (το τελευταίο yield έχει το τελικό status).
+    """
+    offset = 0
+    while True:
+        job = get_job(url, job_id, since=offset)
+        offset = job["output_end"]
+        yield job
+
+        if job["status"] in FINAL_STATUSES:
+            return
+        time.sleep(poll_s)
+
+
+def submit_or_fail(url: str, argv: List[str]) -> Dict:
+    try:
+        return submit_job(url, argv)
+    except urllib.error.HTTPError as e:
+        if e.code == 429:
+            raise QueueFullError(json.loads(e.read().decode("utf-8")).get("error") or str(e))
+        raise RuntimeError(f"Ο model daemon απέρριψε το job ({url}): {e}")
+    except urllib.error.URLError as e:
+        raise RuntimeError(f"Ο model daemon δεν απαντά στο {url} (python src/model_daemon.py): {e}")
+
+
+def run_on_daemon(
+    url: str,
+    argv: List[str],
+    on_output: Optional[Callable[[str], None]] = None,
+    poll_s: float = 0.2,
+) -> Dict:
+    """
+    Υποβάλλει ένα job και περιμένει να τελειώσει· το output του job περνά
+    (σταδιακά) από το on_output. Επιστρέφει το τελικό status του job.
+    """
+    job = submit_or_fail(url, argv)
+    try:
+        for job in follow_job(url, job["id"], poll_s=poll_s):
+            if job["output"] and on_output is not None:
+                on_output(job["output"])
+    except KeyboardInterrupt:
+        # Ctrl-C στο CLI: το job δεν συνεχίζει να τρέχει στον daemon
+        cancel_job(url, job["id"])
+        raise
+    return job
+
+
+# ----- daemon -----
+
+def _rss_mb() -> Dict[str, Optional[float]]:
+    """
+    Τρέχον και μέγιστο RSS του process (Linux: /proc, αλλού: resource).
+    """
+    current = None
+    try:
+        with open("/proc/self/status", "r", encoding="utf-8") as f:
+            for line in f:
+                if line.startswith("VmRSS:"):
+                    current = round(int(line.split()[1]) / 1024, 1)
+                    break
+    except OSError:
+        pass
+
+    peak = None
+    try:
+        import resource
+
+        peak = round(resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024, 1)
+    except ImportError:
+        pass
+
+    return {"rss_mb": current, "peak_rss_mb": peak}
+
+
+class ModelDaemon:
+    def __init__(self, max_queued: int = DEFAULT_MAX_QUEUED):
+        self.started_at = time.time()
+        # ένα job τη φορά: profiling και token counters (progress) είναι ανά process
+        self.jobs = JobQueue(run_experiment_job, max_queued=max_queued, name="model-daemon-jobs")
+
+    def status(self) -> Dict:
+        from llm_router import PROVIDER_CLIENTS
+
+        status = {
+            "pid": os.getpid(),
+            "uptime_s": round(time.time() - self.started_at, 1),
+            "cwd": os.getcwd(),
+            **self.jobs.status(),
+            "models": [],
+        }
+        status.update(_rss_mb())
+
+        # φορτωμένα μοντέλα μόνο αν ο hf_llm_client έχει ήδη φορτωθεί (όχι import εδώ)
+        hf_client = PROVIDER_CLIENTS["huggingface_local"].loaded()
+        if hf_client is not None:
+            status["models"] = hf_client.pipeline_cache_info()
+
+        torch = sys.modules.get("torch")
+        if torch is not None and torch.cuda.is_available():
+            status["cuda_allocated_mb"] = round(torch.cuda.memory_allocated() / 2**20, 1)
+            status["cuda_reserved_mb"] = round(torch.cuda.memory_reserved() / 2**20, 1)
+
+        return status
+
+
+def make_handler(daemon: ModelDaemon):
+    class DaemonHandler(BaseHTTPRequestHandler):
+        protocol_version = "HTTP/1.1"
+
+        def _send_json(self, status: int, payload: Dict) -> None:
+            body = json.dumps(payload, ensure_ascii=False).encode("utf-8")
+            self.send_response(status)
+            self.send_header("Content-Type", "application/json")
+            self.send_header("Content-Length", str(len(body)))
+            self.end_headers()
+            self.wfile.write(body)
+
+        def do_GET(self) -> None:
+            url = urlparse(self.path)
+            path = url.path.rstrip("/")
+
+            if path == "/status":
+                self._send_json(200, daemon.status())
+                return
+
+            if path == "/jobs":
+                self._send_json(200, {"jobs": daemon.jobs.jobs()})
+                return
+
+            if path.startswith("/jobs/"):
+                since = int((parse_qs(url.query).get("since") or ["0"])[0])
+                job = daemon.jobs.job_dict(path[len("/jobs/"):], since=since)
+                if job is None:
+                    self._send_json(404, {"error": f"άγνωστο job: {path}"})
+                    return
+                self._send_json(200, job)
+                return
+
+            self._send_json(404, {"error": f"not found: {self.path}"})
+
+        def do_POST(self) -> None:
+            length = int(self.headers.get("Content-Length") or 0)
+            raw = self.rfile.read(length) if length else b""
+
+            path = urlparse(self.path).path.rstrip("/")
+
+            if path.startswith("/jobs/") and path.endswith("/cancel"):
+                job = daemon.jobs.cancel(path[len("/jobs/"):-len("/cancel")])
+                if job is None:
+                    self._send_json(404, {"error": f"άγνωστο job: {path}"})
+                    return
+                self._send_json(200, daemon.jobs.job_dict(job.id))
+                return
+
+            if path != "/jobs":
+                self._send_json(404, {"error": f"not found: {self.path}"})
+                return
+
+            try:
+                job = daemon.jobs.submit(json.loads(raw or b"{}").get("argv"))
+            except QueueFullError as e:
+                self._send_json(429, {"error": str(e)})
+                return
+            except (ValueError, AttributeError) as e:
+                self._send_json(400, {"error": str(e)})
+                return
+
+            self._send_json(202, daemon.jobs.job_dict(job.id))
+
+        def log_message(self, format, *args) -> None:
+            pass
+
+    return DaemonHandler
+
+
+def parse_args() -> argparse.Namespace:
+    parser = argparse.ArgumentParser(description="BiasMind model daemon (μοντέλα φορτωμένα ανάμεσα στα experiments).")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8765)
+    parser.add_argument(
+        "--preload",
+        action="append",
+        default=[],
+        metavar="MODEL_ID",
+        help="Model id (data/models/<id>.json) που φορτώνεται στην εκκίνηση (επαναλαμβανόμενο).",
+    )
+    parser.add_argument(
+        "--max-queued",
+        type=int,
+        default=DEFAULT_MAX_QUEUED,
+        help="Μέγιστα jobs σε αναμονή· τα επόμενα απορρίπτονται (429).",
+    )
+    return parser.parse_args()
+
+
+def main() -> None:
+    args = parse_args()
+
+    # ο runner μία φορά, πριν το πρώτο job· οι provider clients φορτώνονται lazily
+    import run_experiment  # noqa: F401
+    from input_loader import load_models
+    from llm_router import provider_client
+
+    for model in load_models(args.preload):
+        if model.provider == "huggingface_local":
+            print(f"Loading {model.id} ({model.api_name}) ...")
+            provider_client(model.provider).load()._get_model_pipeline(model)
+
+    daemon = ModelDaemon(max_queued=args.max_queued)
+    server = ThreadingHTTPServer((args.host, args.port), make_handler(daemon))
+    server.daemon_threads = True
+    print(f"Model daemon στο http://{args.host}:{args.port} (cwd={os.getcwd()})")
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.server_close()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,274 @@
+from collections import OrderedDict
+from pathlib import Path
+from typing import Callable, Dict, List, Optional, Tuple
+import gc
+import os
+import threading
+import time
+
+
+# πόσο από τη RAM του μηχανήματος δίνουμε στα μοντέλα αν δεν δοθεί budget
+DEFAULT_RAM_FRACTION = 0.7
+
+# αρχεία βαρών που διαβάζει το prefetch: μόνο η πρώτη μορφή που υπάρχει
+# (σειρά προτίμησης όπως στο from_pretrained), όχι και οι δύο
+WEIGHT_PATTERNS = ("*.safetensors", "*.bin")
+
+PREFETCH_CHUNK_BYTES = 16 * 1024 * 1024
+
+
+def total_ram_mb() -> Optional[int]:
+    try:
+        return int(os.sysconf("SC_PAGE_SIZE") * os.sysconf("SC_PHYS_PAGES") / 2**20)
+    except (AttributeError, OSError, ValueError):
+        return None
+
+
+def default_budget_mb(processes: int = 1) -> int:
+    """
+    DEFAULT_RAM_FRACTION της RAM, μοιρασμένο στα processes που φορτώνουν μοντέλα
+    (π.χ. --workers). Αν η RAM δεν είναι γνωστή: χωρίς όριο (0).
+    """
+    total = total_ram_mb()
+    if total is None:
+        return 0
+    return int(total * DEFAULT_RAM_FRACTION / max(1, int(processes)))
+
+
+def model_nbytes(obj) -> int:
+    """
+    Bytes των parameters + buffers ενός torch module (ή pipeline με .model), μαζί με
+    τα packed βάρη των quantized modules (π.χ. int8_dynamic Linear), που δεν είναι parameters.
+    """
+    model = getattr(obj, "model", obj)
+    total = 0
+    for tensors in (getattr(model, "parameters", None), getattr(model, "buffers", None)):
+        if tensors is None:
+            continue
+        for t in tensors():
+            total += t.numel() * t.element_size()
+
+    modules = getattr(model, "modules", None)
+    for module in modules() if modules is not None else []:
+        # quantized Linear -> LinearPackedParams (module) με _weight_bias() = (int8 weight, bias)
+        packed = getattr(module, "_packed_params", None)
+        if packed is None or not hasattr(packed, "modules") or not hasattr(packed, "_weight_bias"):
+            continue
+        for t in packed._weight_bias():
+            if t is not None:
+                total += t.numel() * t.element_size()
+    return total
+
+
+def _snapshot_dir(model_id: str) -> Optional[Path]:
+    """
+    Τοπικός φάκελος με τα αρχεία του μοντέλου (path ή HF hub cache), ή None αν
+    δεν υπάρχει στο δίσκο. Δεν κατεβάζει τίποτα: το download το κάνει το from_pretrained.
+    """
+    if Path(model_id).is_dir():
+        return Path(model_id)
+
+    try:
+        from huggingface_hub import snapshot_download
+    except ImportError:
+        return None
+
+    try:
+        return Path(snapshot_download(model_id, local_files_only=True))
+    except Exception:
+        return None
+
+
+def _weight_files(folder: Path) -> List[Path]:
+    for pattern in WEIGHT_PATTERNS:
+        files = sorted(folder.glob(pattern))
+        if files:
+            return files
+    return []
+
+
+def estimate_nbytes(model_id: str) -> int:
+    """
+    Εκτίμηση πριν το load: μέγεθος των αρχείων βαρών στο δίσκο (0 αν δεν βρεθούν).
+    """
+    folder = _snapshot_dir(model_id)
+    if folder is None:
+        return 0
+    return sum(f.stat().st_size for f in _weight_files(folder))
+
+
+class ModelResidency:
+    """
+    Ποια μοντέλα είναι φορτωμένα στη μνήμη, με budget σε MB αντί για πλήθος.
+
+    - get(model_id, loader): επιστρέφει το φορτωμένο μοντέλο, αλλιώς κάνει χώρο
+      (eviction) και το φορτώνει. Το footprint μετριέται μετά το load (parameters
+      + buffers) και θυμόμαστε το πραγματικό για τα επόμενα loads.
+    - plan(upcoming): τα μοντέλα που θα χρειαστούν στη σειρά (π.χ. τα models ενός sweep).
+      Στο eviction φεύγουν πρώτα όσα δεν ξαναχρειάζονται (LRU), μετά όσα
+      χρειάζονται πιο αργά, ώστε κάθε μοντέλο να φορτώνεται μία φορά ανά sweep.
+    - prefetch(model_id): διαβάζει τα αρχεία βαρών που είναι ήδη στο δίσκο (μία μορφή:
+      safetensors, αλλιώς bin) σε background thread, ώστε το επόμενο load να τα βρει
+      στο page cache.
+      Γίνεται αυτόματα για το επόμενο μοντέλο του plan μόλις φορτωθεί ένα.
+
+    budget_mb = 0 -> χωρίς όριο μνήμης.
+    source_of(model_id) -> το HF id / path των αρχείων του (αν το model_id είναι
+    π.χ. παραλλαγή precision του ίδιου μοντέλου), για εκτίμηση μεγέθους και prefetch.
+    """
+
+    def __init__(
+        self,
+        budget_mb: int = 0,
+        on_evict: Optional[Callable[[str], None]] = None,
+        source_of: Callable[[str], str] = lambda model_id: model_id,
+    ):
+        self.budget_bytes = int(budget_mb) * 2**20
+        self.on_evict = on_evict
+        self.source_of = source_of
+
+        self._resident: "OrderedDict[str, Tuple[object, int]]" = OrderedDict()
+        self._footprints: Dict[str, int] = {}
+        self._load_seconds: Dict[str, float] = {}
+        self._upcoming: List[str] = []
+        self._prefetching: Dict[str, threading.Thread] = {}
+        self._lock = threading.RLock()
+        self.loads = 0
+        self.hits = 0
+        self.evictions = 0
+
+    def set_budget(self, budget_mb: int) -> None:
+        with self._lock:
+            self.budget_bytes = int(budget_mb) * 2**20
+            self._make_room(0)
+
+    def plan(self, upcoming: List[str]) -> None:
+        with self._lock:
+            self._upcoming = list(upcoming)
+
+    def resident_bytes(self) -> int:
+        return sum(nbytes for _obj, nbytes in self._resident.values())
+
+    def get(self, model_id: str, loader: Callable[[str], object]):
+        with self._lock:
+            if model_id in self._resident:
+                self._resident.move_to_end(model_id)
+                self.hits += 1
+                return self._resident[model_id][0]
+
+            self._wait_prefetch(model_id)
+
+            expected = self._footprints.get(model_id) or estimate_nbytes(self.source_of(model_id))
+            self._make_room(expected)
+
+            started = time.perf_counter()
+            obj = loader(model_id)
+            self._load_seconds[model_id] = round(time.perf_counter() - started, 2)
+            self.loads += 1
+
+            nbytes = model_nbytes(obj)
+            self._footprints[model_id] = nbytes
+            self._resident[model_id] = (obj, nbytes)
+
+            # η εκτίμηση ήταν μικρή: κάνε χώρο με βάση το πραγματικό (εκτός από το νέο μοντέλο)
+            self._make_room(0, keep=model_id)
+
+            # όσο δουλεύει αυτό το μοντέλο, διαβάζουμε από το δίσκο το επόμενο του plan
+            following = self._next_planned(model_id)
+            if following is not None:
+                self.prefetch(following)
+
+            return obj
+
+    def _next_planned(self, model_id: str) -> Optional[str]:
+        if model_id not in self._upcoming:
+            return None
+        for m in self._upcoming[self._upcoming.index(model_id) + 1:]:
+            if m != model_id and m not in self._resident:
+                return m
+        return None
+
+    def evict(self, model_id: str) -> None:
+        with self._lock:
+            if self._resident.pop(model_id, None) is None:
+                return
+            self.evictions += 1
+
+        if self.on_evict is not None:
+            self.on_evict(model_id)
+        gc.collect()
+
+        try:
+            import torch
+
+            if torch.cuda.is_available():
+                torch.cuda.empty_cache()
+        except ImportError:
+            pass
+
+    def _victims(self, keep: Optional[str]) -> List[str]:
+        # πρώτα όσα δεν είναι στο plan (LRU σειρά), μετά όσα χρειάζονται πιο αργά
+        upcoming = [m for m in self._upcoming if m != keep]
+        unused = [m for m in self._resident if m not in upcoming and m != keep]
+        later = sorted(
+            (m for m in self._resident if m in upcoming and m != keep),
+            key=upcoming.index,
+            reverse=True,
+        )
+        return unused + later
+
+    def _make_room(self, incoming: int, keep: Optional[str] = None) -> None:
+        if self.budget_bytes <= 0:
+            return
+
+        for victim in self._victims(keep):
+            if self.resident_bytes() + incoming <= self.budget_bytes:
+                break
+            self.evict(victim)
+
+    def prefetch(self, model_id: str) -> None:
+        with self._lock:
+            if model_id in self._resident or model_id in self._prefetching:
+                return
+
+            thread = threading.Thread(
+                target=self._read_weights,
+                args=(self.source_of(model_id),),
+                name=f"prefetch-{model_id}",
+                daemon=True,
+            )
+            self._prefetching[model_id] = thread
+            thread.start()
+
+    @staticmethod
+    def _read_weights(model_id: str) -> None:
+        folder = _snapshot_dir(model_id)
+        if folder is None:
+            return
+
+        for path in _weight_files(folder):
+            try:
+                with path.open("rb", buffering=0) as f:
+                    while f.read(PREFETCH_CHUNK_BYTES):
+                        pass
+            except OSError:
+                return
+
+    def _wait_prefetch(self, model_id: str) -> None:
+        # load ενώ τρέχει ακόμα το prefetch: περιμένουμε να μη διαβάζονται τα αρχεία δύο φορές
+        thread = self._prefetching.pop(model_id, None)
+        if thread is not None:
+            thread.join()
+
+    def info(self) -> Dict:
+        with self._lock:
+            return {
+                "budget_mb": round(self.budget_bytes / 2**20, 1),
+                "resident_mb": round(self.resident_bytes() / 2**20, 1),
+                "resident": {m: round(n / 2**20, 1) for m, (_obj, n) in self._resident.items()},
+                "load_seconds": dict(self._load_seconds),
+                "upcoming": list(self._upcoming),
+                "loads": self.loads,
+                "hits": self.hits,
+                "evictions": self.evictions,
+            }
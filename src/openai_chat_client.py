@@ -0,0 +1,212 @@
+from typing import Dict, List, Optional
+import asyncio
+import os
+import random
+import time
+import weakref
+
+from input_loader import ModelDef
+
+# Προαιρετικό: HTTP providers χρειάζονται το httpx (connection pooling, async).
+try:
+    import httpx
+except ImportError:
+    httpx = None
+
+
+DEFAULT_OPENAI_BASE_URL = "https://api.openai.com/v1"
+# default του vLLM / llama.cpp server (και του local_model_server.py)
+DEFAULT_LOCAL_BASE_URL = "http://127.0.0.1:8000/v1"
+
+# status codes για τα οποία αξίζει retry (rate limit / προσωρινά σφάλματα)
+RETRY_STATUS = {408, 409, 429, 500, 502, 503, 504}
+MAX_RETRIES = 6
+MAX_BACKOFF_S = 30.0
+
+MAX_CONNECTIONS = 32
+REQUEST_TIMEOUT_S = 120.0
+
+
+def _require_httpx() -> None:
+    if httpx is None:
+        raise RuntimeError("Ο OpenAI provider χρειάζεται το httpx (pip install httpx).")
+
+
+def _base_url(model: ModelDef) -> str:
+    """
+    model.base_url > OPENAI_BASE_URL > default του provider
+    (openai -> api.openai.com, openai_compatible -> τοπικός server).
+    """
+    if model.base_url:
+        return model.base_url.rstrip("/")
+
+    if model.provider == "openai_compatible":
+        default = DEFAULT_LOCAL_BASE_URL
+    else:
+        default = DEFAULT_OPENAI_BASE_URL
+    return (os.getenv("OPENAI_BASE_URL") or default).rstrip("/")
+
+
+def _headers(model: ModelDef) -> Dict[str, str]:
+    headers = {"Content-Type": "application/json"}
+    # το OPENAI_API_KEY πάει μόνο στον openai provider· openai_compatible servers
+    # (τοπικοί / τρίτοι) παίρνουν key μόνο από το δικό τους api_key_env
+    if model.api_key_env:
+        api_key = os.getenv(model.api_key_env)
+    elif model.provider == "openai":
+        api_key = os.getenv("OPENAI_API_KEY")
+    else:
+        api_key = None
+    if api_key:
+        headers["Authorization"] = f"Bearer {api_key}"
+    return headers
+
+
+def _payload(model: ModelDef, messages: List[Dict], temperature: float, seed: Optional[int] = None) -> Dict:
+    payload = {
+        "model": model.api_name,
+        "messages": messages,
+        "temperature": temperature,
+        "max_tokens": 12,
+    }
+    # OpenAI: best-effort determinism· vLLM / local_model_server: seed ανά request
+    if seed is not None:
+        payload["seed"] = seed
+    return payload
+
+
+# completion tokens (usage) των απαντήσεων σε αυτό το process, για τα progress events
+_TOKEN_COUNTS = {"completion": 0}
+
+
+def completion_tokens() -> int:
+    return _TOKEN_COUNTS["completion"]
+
+
+def _reply_text(data: Dict) -> str:
+    usage = data.get("usage") if isinstance(data, dict) else None
+    if isinstance(usage, dict):
+        _TOKEN_COUNTS["completion"] += int(usage.get("completion_tokens") or 0)
+    try:
+        return data["choices"][0]["message"]["content"] or ""
+    except (KeyError, IndexError, TypeError):
+        raise RuntimeError(f"Μη αναμενόμενη απάντηση από chat completions API: {data!r}")
+
+
+def _backoff_delay(attempt: int, response: Optional["httpx.Response"]) -> float:
+    """
+    Σέβεται το Retry-After του server (rate limit), αλλιώς exponential backoff με jitter.
+    """
+    if response is not None:
+        retry_after = response.headers.get("retry-after")
+        if retry_after:
+            try:
+                return min(float(retry_after), MAX_BACKOFF_S)
+            except ValueError:
+                pass
+
+    return min(0.5 * (2 ** attempt), MAX_BACKOFF_S) * (0.5 + random.random() / 2)
+
+
+def _limits() -> "httpx.Limits":
+    return httpx.Limits(max_connections=MAX_CONNECTIONS, max_keepalive_connections=MAX_CONNECTIONS)
+
+
+# ----- sync -----
+
+_sync_client: Optional["httpx.Client"] = None
+
+
+def _get_sync_client() -> "httpx.Client":
+    global _sync_client
+    _require_httpx()
+    if _sync_client is None:
+        _sync_client = httpx.Client(limits=_limits(), timeout=REQUEST_TIMEOUT_S)
+    return _sync_client
+
+
+def call_openai_chat(
+    model: ModelDef,
+    messages: List[Dict],
+    temperature: float = 0.7,
+    seed: Optional[int] = None,
+) -> str:
+    """
+    Chat completion (OpenAI API ή OpenAI-compatible server, π.χ. vLLM / llama.cpp),
+    με keep-alive connection pool και backoff σε rate limits.
+    Επιστρέφει το κείμενο της απάντησης· το parsing γίνεται στον runner.
+    """
+    client = _get_sync_client()
+    url = f"{_base_url(model)}/chat/completions"
+
+    for attempt in range(MAX_RETRIES + 1):
+        response = None
+        try:
+            response = client.post(url, json=_payload(model, messages, temperature, seed), headers=_headers(model))
+            if response.status_code not in RETRY_STATUS:
+                response.raise_for_status()
+                return _reply_text(response.json())
+        except httpx.TransportError:
+            if attempt == MAX_RETRIES:
+                raise
+
+        if attempt == MAX_RETRIES:
+            response.raise_for_status()
+        time.sleep(_backoff_delay(attempt, response))
+
+    raise RuntimeError("unreachable")
+
+
+# ----- async -----
+
+# ένας AsyncClient ανά event loop (ο client δεν μπορεί να περάσει από loop σε loop)
+_async_clients: "weakref.WeakKeyDictionary[asyncio.AbstractEventLoop, httpx.AsyncClient]" = weakref.WeakKeyDictionary()
+
+
+def _get_async_client() -> "httpx.AsyncClient":
+    _require_httpx()
+    loop = asyncio.get_running_loop()
+    client = _async_clients.get(loop)
+    if client is None:
+        client = httpx.AsyncClient(limits=_limits(), timeout=REQUEST_TIMEOUT_S)
+        _async_clients[loop] = client
+    return client
+
+
+async def aclose_clients() -> None:
+    """
+    Κλείνει τον AsyncClient του τρέχοντος loop (καλείται στο τέλος ενός async run).
+    """
+    client = _async_clients.pop(asyncio.get_running_loop(), None)
+    if client is not None:
+        await client.aclose()
+
+
+async def acall_openai_chat(
+    model: ModelDef,
+    messages: List[Dict],
+    temperature: float = 0.7,
+    seed: Optional[int] = None,
+) -> str:
+    """
+    Async εκδοχή του call_openai_chat (pooled AsyncClient, ίδιο backoff).
+    """
+    client = _get_async_client()
+    url = f"{_base_url(model)}/chat/completions"
+
+    for attempt in range(MAX_RETRIES + 1):
+        response = None
+        try:
+            response = await client.post(url, json=_payload(model, messages, temperature, seed), headers=_headers(model))
+            if response.status_code not in RETRY_STATUS:
+                response.raise_for_status()
+                return _reply_text(response.json())
+        except httpx.TransportError:
+            if attempt == MAX_RETRIES:
+                raise
+
+        if attempt == MAX_RETRIES:
+            response.raise_for_status()
+        await asyncio.sleep(_backoff_delay(attempt, response))
+
+    raise RuntimeError("unreachable")
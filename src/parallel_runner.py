@@ -0,0 +1,154 @@
+from concurrent.futures import FIRST_COMPLETED, Future, ProcessPoolExecutor, wait
+from typing import Callable, Dict, Iterator, List, Optional, Tuple
+import multiprocessing
+import os
+
+from job_queue import JobCancelled, raise_if_cancelled, set_process_cancel_event
+from lane_scheduler import Lane
+
+
+# κάθε πόσο ο parent ελέγχει για cancel όσο περιμένει τα shards
+CANCEL_POLL_S = 0.2
+
+
+def lane_components(lanes: List[Lane]) -> List[List[Lane]]:
+    """
+    Ομάδες lanes που συνδέονται μέσω depends_on (continuous runs, carry_over).
+    Διαφορετικές ομάδες δεν μοιράζονται context, άρα τρέχουν σε διαφορετικά processes.
+    Κάθε ομάδα είναι ταξινομημένη κατά lane.index, και οι ομάδες κατά το πρώτο τους lane.
+    """
+    parent: Dict[int, int] = {lane.index: lane.index for lane in lanes}
+
+    def _root(i: int) -> int:
+        while parent[i] != i:
+            parent[i] = parent[parent[i]]
+            i = parent[i]
+        return i
+
+    for lane in lanes:
+        if lane.depends_on is not None:
+            parent[_root(lane.index)] = _root(lane.depends_on)
+
+    groups: Dict[int, List[Lane]] = {}
+    for lane in sorted(lanes, key=lambda l: l.index):
+        groups.setdefault(_root(lane.index), []).append(lane)
+
+    return sorted(groups.values(), key=lambda group: group[0].index)
+
+
+def shard_lanes(lanes: List[Lane], n_shards: int) -> List[List[Lane]]:
+    """
+    Μοιράζει τις ανεξάρτητες ομάδες lanes σε έως n_shards shards
+    (μεγαλύτερη ομάδα πρώτα, στο shard με τα λιγότερα lanes).
+    Ντετερμινιστικό: ίδια lanes -> ίδια shards.
+    """
+    n_shards = max(1, int(n_shards))
+    shards: List[List[Lane]] = [[] for _ in range(n_shards)]
+    loads = [0] * n_shards
+
+    for group in sorted(lane_components(lanes), key=lambda g: (-len(g), g[0].index)):
+        target = min(range(n_shards), key=lambda s: (loads[s], s))
+        shards[target].extend(group)
+        loads[target] += len(group)
+
+    return [sorted(shard, key=lambda l: l.index) for shard in shards if shard]
+
+
+def default_torch_threads(workers: int) -> int:
+    return max(1, (os.cpu_count() or 1) // max(1, int(workers)))
+
+
+def _init_worker(torch_threads: int, cancel_event) -> None:
+    # raise_if_cancelled() στα βήματα του shard κοιτάζει το Event του parent
+    set_process_cancel_event(cancel_event)
+
+    # πριν το πρώτο forward pass: κάθε worker έχει το δικό του μερίδιο από cores
+    os.environ["OMP_NUM_THREADS"] = str(torch_threads)
+    os.environ["MKL_NUM_THREADS"] = str(torch_threads)
+    try:
+        import torch
+    except ImportError:
+        return
+
+    torch.set_num_threads(torch_threads)
+    try:
+        torch.set_num_interop_threads(1)
+    except RuntimeError:
+        # έχει ήδη ξεκινήσει παράλληλη δουλειά σε αυτό το process
+        pass
+
+
+class LanePool(ProcessPoolExecutor):
+    """
+    Process pool για --workers. "spawn" (όχι fork): torch / tokenizers δεν είναι fork-safe.
+    Κάθε worker κρατά τα μοντέλα του φορτωμένα (cache του _get_pipeline) για όλο το experiment.
+
+    cancel_event: το θέτει το run_shards όταν ακυρωθεί το job του parent· οι workers
+    σταματούν στο επόμενο βήμα τους (raise_if_cancelled).
+    """
+
+    def __init__(self, workers: int, torch_threads: int):
+        ctx = multiprocessing.get_context("spawn")
+        self.cancel_event = ctx.Event()
+        super().__init__(
+            max_workers=max(1, int(workers)),
+            mp_context=ctx,
+            initializer=_init_worker,
+            initargs=(torch_threads, self.cancel_event),
+        )
+
+
+def open_lane_pool(workers: int, torch_threads: Optional[int] = None) -> LanePool:
+    return LanePool(workers, torch_threads or default_torch_threads(workers))
+
+
+def run_shards(
+    pool: LanePool,
+    run_shard: Callable[..., Tuple[List[Lane], List[Dict], Optional[Dict]]],
+    shards: List[List[Lane]],
+    *args,
+    on_records: Optional[Callable[[List[Dict]], None]] = None,
+    on_profile: Optional[Callable[[Dict], None]] = None,
+) -> Iterator[Lane]:
+    """
+    Τρέχει κάθε shard στο pool: run_shard(shard, *args) -> (lanes με rows, journal records,
+    profiling snapshot ή None).
+    Τα lanes επιστρέφονται (yield) με τη σειρά του lane.index, μόλις είναι
+    διαθέσιμα αυτό και όλα τα προηγούμενα — ίδια σειρά με το σειριακό loop.
+
+    Cancel του job (raise_if_cancelled) όσο τρέχουν τα shards: θέτει το pool.cancel_event,
+    ώστε και οι workers να σταματήσουν· τα records των shards που δεν τελείωσαν χάνονται.
+    """
+    expected = sorted(lane.index for shard in shards for lane in shard)
+    futures: List[Future] = [pool.submit(run_shard, shard, *args) for shard in shards]
+
+    finished: Dict[int, Lane] = {}
+    next_pos = 0
+    pending = set(futures)
+
+    try:
+        while pending:
+            done, pending = wait(pending, timeout=CANCEL_POLL_S, return_when=FIRST_COMPLETED)
+
+            for future in done:
+                lanes, records, profile = future.result()
+                if on_records is not None:
+                    on_records(records)
+                if profile is not None and on_profile is not None:
+                    on_profile(profile)
+                for lane in lanes:
+                    finished[lane.index] = lane
+
+            # μετά τα records των shards που τελείωσαν, ώστε να μπουν στο journal
+            try:
+                raise_if_cancelled()
+            except JobCancelled:
+                pool.cancel_event.set()
+                raise
+
+            while next_pos < len(expected) and expected[next_pos] in finished:
+                yield finished.pop(expected[next_pos])
+                next_pos += 1
+    finally:
+        for future in pending:
+            future.cancel()
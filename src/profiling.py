@@ -0,0 +1,242 @@
+"""
+Χρονομέτρηση των hot paths ενός experiment (prompt building, tokenization,
+generate / forward, parsing, router calls, εγγραφές CSV):
+
+    from profiling import timer, count
+
+    with timer("prompt.tokenize"):
+        ...
+    count("rows")
+
+Οι μετρήσεις είναι ανά process και μαζεύονται σε histograms (log2 buckets σε µs)
+ανά όνομα stage· το experiment τις γράφει στο results/metadata/profile_<id>.json
+(οι workers του --workers στέλνουν το snapshot τους στον parent, βλ. merge).
+
+Όσο το profiling είναι κλειστό (default), το timer() επιστρέφει ένα κοινό no-op
+context manager, άρα το κόστος στα hot paths είναι ένα function call.
+
+Modes (ExperimentConfig.profile / --profile):
+- "off"      -> τίποτα
+- "timers"   -> timers + counters -> profile_<id>.json
+- "cprofile" -> επιπλέον cProfile του runner -> profile_<id>.prof
+               (python -m pstats / snakeviz). Για sampling profiler χωρίς
+               overhead: py-spy record -o flame.svg -- python src/run_experiment.py ...
+               (τα stages είναι συναρτήσεις με δικά τους ονόματα, φαίνονται στο flamegraph)
+"""
+
+from pathlib import Path
+from typing import Dict, Optional
+import cProfile
+import json
+import threading
+import time
+
+
+PROFILE_MODES = ("off", "timers", "cprofile")
+
+_ENABLED = False
+_LOCK = threading.Lock()
+
+# stage -> [count, total_ns, min_ns, max_ns, {bucket: count}]
+_TIMINGS: Dict[str, list] = {}
+_COUNTERS: Dict[str, int] = {}
+
+
+def enabled() -> bool:
+    return _ENABLED
+
+
+def enable(on: bool = True) -> None:
+    global _ENABLED
+    _ENABLED = bool(on)
+
+
+def reset() -> None:
+    with _LOCK:
+        _TIMINGS.clear()
+        _COUNTERS.clear()
+
+
+def _bucket(ns: int) -> int:
+    # bucket k: διάρκεια < 2**k µs (k = 0: κάτω από 1 µs)
+    return (ns // 1000).bit_length()
+
+
+def _record(name: str, ns: int) -> None:
+    with _LOCK:
+        stat = _TIMINGS.get(name)
+        if stat is None:
+            _TIMINGS[name] = [1, ns, ns, ns, {_bucket(ns): 1}]
+            return
+        stat[0] += 1
+        stat[1] += ns
+        stat[2] = min(stat[2], ns)
+        stat[3] = max(stat[3], ns)
+        b = _bucket(ns)
+        stat[4][b] = stat[4].get(b, 0) + 1
+
+
+class _Timer:
+    __slots__ = ("name", "_start")
+
+    def __init__(self, name: str):
+        self.name = name
+        self._start = 0
+
+    def __enter__(self) -> "_Timer":
+        self._start = time.perf_counter_ns()
+        return self
+
+    def __exit__(self, exc_type, exc, tb) -> None:
+        _record(self.name, time.perf_counter_ns() - self._start)
+
+
+class _NoTimer:
+    __slots__ = ()
+
+    def __enter__(self) -> "_NoTimer":
+        return self
+
+    def __exit__(self, exc_type, exc, tb) -> None:
+        pass
+
+
+_NO_TIMER = _NoTimer()
+
+
+def timer(name: str):
+    """
+    Context manager που χρονομετρά ένα stage (no-op αν το profiling είναι κλειστό).
+    """
+    return _Timer(name) if _ENABLED else _NO_TIMER
+
+
+def count(name: str, n: int = 1) -> None:
+    if not _ENABLED:
+        return
+    with _LOCK:
+        _COUNTERS[name] = _COUNTERS.get(name, 0) + int(n)
+
+
+def snapshot() -> Dict:
+    """
+    Οι raw μετρήσεις του process (JSON-serializable, για merge στον parent).
+    """
+    with _LOCK:
+        return {
+            "timings": {
+                name: {"count": c, "total_ns": t, "min_ns": lo, "max_ns": hi, "buckets": dict(b)}
+                for name, (c, t, lo, hi, b) in _TIMINGS.items()
+            },
+            "counters": dict(_COUNTERS),
+        }
+
+
+def merge(other: Dict) -> None:
+    """
+    Προσθέτει ένα snapshot (π.χ. από worker process) στις μετρήσεις αυτού του process.
+    """
+    with _LOCK:
+        for name, s in other.get("timings", {}).items():
+            buckets = {int(k): v for k, v in s["buckets"].items()}
+            stat = _TIMINGS.get(name)
+            if stat is None:
+                _TIMINGS[name] = [s["count"], s["total_ns"], s["min_ns"], s["max_ns"], buckets]
+                continue
+            stat[0] += s["count"]
+            stat[1] += s["total_ns"]
+            stat[2] = min(stat[2], s["min_ns"])
+            stat[3] = max(stat[3], s["max_ns"])
+            for b, n in buckets.items():
+                stat[4][b] = stat[4].get(b, 0) + n
+
+        for name, n in other.get("counters", {}).items():
+            _COUNTERS[name] = _COUNTERS.get(name, 0) + n
+
+
+def _percentile_us(buckets: Dict[int, int], total: int, q: float) -> float:
+    # άνω όριο του bucket όπου πέφτει το q-quantile
+    rank = q * total
+    seen = 0
+    for b in sorted(buckets):
+        seen += buckets[b]
+        if seen >= rank:
+            return float(2 ** b)
+    return float(2 ** max(buckets))
+
+
+def summary() -> Dict:
+    """
+    Ανά stage: count, total / mean / min / max (ms), p50 / p90 / p99 (άνω όριο bucket, ms)
+    και histogram {"<2^k µs": count}· ταξινομημένα κατά συνολικό χρόνο.
+    """
+    raw = snapshot()
+    stages = {}
+    for name, s in sorted(raw["timings"].items(), key=lambda kv: -kv[1]["total_ns"]):
+        n = s["count"]
+        buckets = s["buckets"]
+        stages[name] = {
+            "count": n,
+            "total_ms": round(s["total_ns"] / 1e6, 3),
+            "mean_ms": round(s["total_ns"] / n / 1e6, 4),
+            "min_ms": round(s["min_ns"] / 1e6, 4),
+            "max_ms": round(s["max_ns"] / 1e6, 4),
+            "p50_ms": _percentile_us(buckets, n, 0.50) / 1000,
+            "p90_ms": _percentile_us(buckets, n, 0.90) / 1000,
+            "p99_ms": _percentile_us(buckets, n, 0.99) / 1000,
+            "histogram_us": {f"<{2 ** b}": buckets[b] for b in sorted(buckets)},
+        }
+    return {"stages": stages, "counters": dict(sorted(raw["counters"].items()))}
+
+
+class ExperimentProfile:
+    """
+    Profiling ενός experiment (mode: βλ. PROFILE_MODES). Στην έξοδο γράφει το
+    results/metadata/profile_<experiment_id>.json (και profile_<id>.prof στο "cprofile").
+    """
+
+    def __init__(self, experiment_id: str, mode: str = "off", base_dir: str | Path = "results/metadata"):
+        if mode not in PROFILE_MODES:
+            raise ValueError(f"profile mode πρέπει να είναι ένα από {PROFILE_MODES}, όχι '{mode}'")
+        self.experiment_id = experiment_id
+        self.mode = mode
+        self.base_dir = Path(base_dir)
+        self.path = self.base_dir / f"profile_{experiment_id}.json"
+        self._cprofile: Optional[cProfile.Profile] = None
+        self._started = 0.0
+
+    def __enter__(self) -> "ExperimentProfile":
+        if self.mode == "off":
+            return self
+        reset()
+        enable()
+        if self.mode == "cprofile":
+            self._cprofile = cProfile.Profile()
+            self._cprofile.enable()
+        self._started = time.perf_counter()
+        return self
+
+    def __exit__(self, exc_type, exc, tb) -> None:
+        if self.mode == "off":
+            return
+        wall_s = time.perf_counter() - self._started
+        enable(False)
+
+        self.base_dir.mkdir(parents=True, exist_ok=True)
+        payload = {
+            "experiment_id": self.experiment_id,
+            "mode": self.mode,
+            "status": "finished" if exc_type is None else "failed",
+            "wall_s": round(wall_s, 3),
+        }
+
+        if self._cprofile is not None:
+            self._cprofile.disable()
+            prof_path = self.path.with_suffix(".prof")
+            self._cprofile.dump_stats(str(prof_path))
+            payload["cprofile"] = str(prof_path)
+            self._cprofile = None
+
+        payload |= summary()
+        self.path.write_text(json.dumps(payload, ensure_ascii=False, indent=2), encoding="utf-8")
+        print(f"Profile: {self.path}")
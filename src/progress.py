@@ -0,0 +1,131 @@
+from typing import Callable, Dict, Optional
+import json
+import sys
+import time
+
+
+# κάθε progress event είναι μία γραμμή: PROGRESS_PREFIX + JSON
+# (ανάμεσα στα υπόλοιπα prints του runner, στο stdout του process ή του daemon job)
+PROGRESS_PREFIX = "@progress "
+
+
+def parse_progress_line(line: str) -> Optional[Dict]:
+    """
+    Το event μιας γραμμής εξόδου του runner, ή None αν είναι απλό κείμενο.
+    """
+    line = line.strip()
+    if not line.startswith(PROGRESS_PREFIX):
+        return None
+    try:
+        event = json.loads(line[len(PROGRESS_PREFIX):])
+    except json.JSONDecodeError:
+        return None
+    return event if isinstance(event, dict) else None
+
+
+def format_eta(seconds: Optional[float]) -> str:
+    if seconds is None:
+        return "–"
+    seconds = int(round(seconds))
+    hours, rest = divmod(seconds, 3600)
+    minutes, secs = divmod(rest, 60)
+    return f"{hours}:{minutes:02d}:{secs:02d}" if hours else f"{minutes:02d}:{secs:02d}"
+
+
+class ProgressReporter:
+    """
+    Structured progress ενός experiment ως JSON lines (βλ. PROGRESS_PREFIX):
+
+    - {"event": "start", "experiment_id", "total", ...}
+    - {"event": "progress", "done", "total", "items_per_s", "tokens_per_s",
+       "eta_s", "parse_failures", "model", ...}   (το πολύ κάθε every_s)
+    - {"event": "end", "status": "finished" | "failed", ...}
+
+    done = απαντημένα items (rows), μαζί με όσα ξαναπαίχτηκαν από το journal (resume)·
+    items_per_s / eta_s μετρούν μόνο τα νέα. tokens_per_s από το tokens() (generated
+    tokens του process, βλ. llm_router.generated_tokens).
+
+    enabled=False -> μετρά χωρίς να γράφει (π.χ. CLI χωρίς --progress).
+    """
+
+    def __init__(
+        self,
+        experiment_id: str,
+        total: int,
+        enabled: bool = True,
+        tokens: Optional[Callable[[], int]] = None,
+        every_s: float = 0.5,
+        stream=None,
+    ):
+        self.experiment_id = experiment_id
+        self.total = int(total)
+        self.enabled = enabled
+        self.tokens = tokens
+        self.every_s = float(every_s)
+        self.stream = stream
+
+        self.done = 0
+        self.replayed = 0
+        self.parse_failures = 0
+        self.model: Optional[str] = None
+
+        self._started = time.monotonic()
+        self._tokens_at_start = tokens() if tokens is not None else 0
+        self._last_emit = 0.0
+
+    def _emit(self, event: Dict) -> None:
+        if not self.enabled:
+            return
+        stream = self.stream or sys.stdout
+        stream.write(PROGRESS_PREFIX + json.dumps(event, ensure_ascii=False) + "\n")
+        stream.flush()
+
+    def snapshot(self) -> Dict:
+        elapsed = max(1e-9, time.monotonic() - self._started)
+        fresh = self.done - self.replayed
+        items_per_s = fresh / elapsed
+        generated = (self.tokens() - self._tokens_at_start) if self.tokens is not None else 0
+        remaining = max(0, self.total - self.done)
+
+        return {
+            "experiment_id": self.experiment_id,
+            "model": self.model,
+            "done": self.done,
+            "total": self.total,
+            "replayed": self.replayed,
+            "parse_failures": self.parse_failures,
+            "elapsed_s": round(elapsed, 1),
+            "items_per_s": round(items_per_s, 3),
+            "tokens_per_s": round(generated / elapsed, 1),
+            "eta_s": round(remaining / items_per_s, 1) if items_per_s > 0 else None,
+        }
+
+    def start(self, **extra) -> None:
+        self._emit({"event": "start", "experiment_id": self.experiment_id, "total": self.total} | extra)
+
+    def set_model(self, model_id: str) -> None:
+        self.model = model_id
+        self._emit({"event": "progress"} | self.snapshot())
+
+    def rows(self, n: int = 1, parse_failures: int = 0, replayed: bool = False) -> None:
+        self.done += n
+        self.parse_failures += parse_failures
+        if replayed:
+            self.replayed += n
+
+        now = time.monotonic()
+        if now - self._last_emit >= self.every_s or self.done >= self.total:
+            self._last_emit = now
+            self._emit({"event": "progress"} | self.snapshot())
+
+    def end(self, status: str = "finished", **extra) -> None:
+        self._emit({"event": "end", "status": status} | self.snapshot() | extra)
+
+    def __enter__(self) -> "ProgressReporter":
+        return self
+
+    def __exit__(self, exc_type, exc, tb) -> None:
+        if exc_type is None:
+            self.end("finished")
+        else:
+            self.end("failed", error=f"{exc_type.__name__}: {exc}")
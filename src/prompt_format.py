@@ -0,0 +1,358 @@
+# prompt_format.py
+"""
+Prompt text, model keys and reply parsing of the huggingface_local provider.
+
+No torch / transformers here: the router builds response-cache keys from these
+(render_prompt, model_key) without loading the HF client, and PromptTokens only
+needs a tokenizer.
+"""
+from collections import OrderedDict
+from typing import List, Dict, Optional, Tuple
+import re
+
+from input_loader import ModelDef
+from profiling import timer
+
+
+DEFAULT_BATCH_SIZE = 8
+DEFAULT_TOP_P = 0.9
+
+
+def pipeline_key(model_id: str, precision: Optional[str] = None, quantization: Optional[str] = None) -> str:
+    """
+    Identity of a loaded variant: the same weights at another precision are another model
+    (residency, prefix cache and response cache keys).
+    """
+    suffix = "+".join(x for x in (precision, quantization) if x)
+    return f"{model_id}@{suffix}" if suffix else model_id
+
+
+def model_key(model: ModelDef) -> str:
+    return pipeline_key(model.api_name, model.precision, model.quantization)
+
+
+def _extract_scale_from_system(messages: List[Dict]) -> Optional[Tuple[int, int]]:
+    """
+    Extract (min,max) from system prompt like:
+    "Always answer ONLY with a single integer number from X to Y."
+    """
+    sys = ""
+    for m in messages:
+        if m.get("role") == "system":
+            sys = m.get("content", "") or ""
+            break
+
+    matches = re.findall(r"from\s+(-?\d+)\s+to\s+(-?\d+)", sys, flags=re.IGNORECASE)
+    if not matches:
+        return None
+
+    a, b = matches[-1]
+    try:
+        mn, mx = int(a), int(b)
+        if mn > mx:
+            mn, mx = mx, mn
+        return mn, mx
+    except Exception:
+        return None
+
+
+_ROLE_FORMATS = {
+    "system": ("{}", "\n\n"),
+    "user": ("User: {}", "\n"),
+    "assistant": ("Assistant: {}", "\n"),
+}
+
+
+def _answer_instruction(scale: Optional[Tuple[int, int]]) -> str:
+    if scale is not None:
+        mn, mx = scale
+        return f"\nRespond with ONE integer between {mn} and {mx}. No words.\nAnswer: "
+    return "\nRespond with ONE integer. No words.\nAnswer: "
+
+
+def _prompt_segments(messages: List[Dict], trail: bool = False) -> Tuple[List[Tuple[str, str]], str]:
+    """
+    The prompt body as (kind, text) segments, plus the text that goes before the
+    answer instruction. "".join(texts) + head + instruction == the prompt.
+    kind = "<previous role>><role>", used by PromptTokens to verify segment-wise
+    tokenization against full-string tokenization.
+
+    Where a segment boundary may fall depends on the tokenizer's pre-tokenizer:
+    - trail=False: the separator after a message starts the NEXT segment, so a
+      boundary never splits a newline run (GPT-2 style: "\n\n" is one token).
+    - trail=True: the separator ends the message's own segment, so punctuation
+      stays with the newlines after it (Qwen style: ".\n\n" is one token); the
+      current user turn then goes with the answer instruction.
+    """
+    segments: List[Tuple[str, str]] = []
+    prev, sep = "", ""
+
+    for msg in messages:
+        role = msg.get("role")
+        if role not in _ROLE_FORMATS:
+            continue
+        fmt, next_sep = _ROLE_FORMATS[role]
+        text = fmt.format(msg.get("content", ""))
+        if trail:
+            segments.append((f"{prev}>{role}", text + next_sep))
+        else:
+            segments.append((f"{prev}>{role}", sep + text))
+        prev, sep = role, next_sep
+
+    if not trail:
+        return segments, sep
+    if not segments:
+        return segments, ""
+    return segments[:-1], segments[-1][1]
+
+
+def _messages_to_prompt_parts(
+    messages: List[Dict],
+    scale: Optional[Tuple[int, int]] = None,
+) -> Tuple[str, str]:
+    """
+    Splits the prompt into (body, tail):
+    - body: system prompt + FULL conversation history + current user turn.
+      The body of item k is a prefix of the body of item k+1 in the same dialogue,
+      which is what the prefix KV-cache reuses.
+    - tail: the answer instruction, which changes position every turn.
+    scale: the test's (min, max); parsed from the system prompt if not given.
+    """
+    with timer("prompt.build"):
+        if scale is None:
+            scale = _extract_scale_from_system(messages)
+        segments, sep = _prompt_segments(messages)
+        return "".join(text for _kind, text in segments) + sep, _answer_instruction(scale)
+
+
+def _messages_to_prompt(messages: List[Dict], scale: Optional[Tuple[int, int]] = None) -> str:
+    """
+    UPDATED:
+    - Includes FULL conversation history (system, user, assistant)
+    - Preserves original instruction style
+    """
+    body, tail = _messages_to_prompt_parts(messages, scale)
+    return body + tail
+
+
+def _parse_first_int_in_range(text: str, mn: int, mx: int) -> Optional[int]:
+    """
+    Extract the first integer token that lies within [mn,mx].
+    """
+    for tok in re.findall(r"-?\d+", text):
+        try:
+            v = int(tok)
+        except Exception:
+            continue
+        if mn <= v <= mx:
+            return v
+    return None
+
+
+def _parse_reply(gen: str, scale: Optional[Tuple[int, int]]) -> str:
+    """
+    Returns the first integer of the raw generation (within scale, if known) as a string,
+    or "" if nothing parses.
+    """
+    if scale is not None:
+        mn, mx = scale
+        v = _parse_first_int_in_range(gen, mn, mx)
+        return "" if v is None else str(v)
+
+    m = re.search(r"-?\d+", gen)
+    return "" if not m else m.group(0)
+
+
+def _common_prefix_len(a: List[int], b: List[int]) -> int:
+    n = 0
+    for x, y in zip(a, b):
+        if x != y:
+            break
+        n += 1
+    return n
+
+
+def _scale_continuations(
+    tokenizer,
+    prompt: str,
+    mn: int,
+    mx: int,
+) -> Tuple[List[int], List[List[int]]]:
+    """
+    Tokenizes prompt + "<v>" for every v in [mn, mx] and splits it into
+    (shared context ids, per-value continuation ids).
+    Tokenizing the full string handles tokenizers that merge the trailing
+    space of "Answer: " into the digit token.
+    """
+    prompt_ids = tokenizer(prompt, add_special_tokens=True)["input_ids"]
+    fulls = [
+        tokenizer(prompt + str(v), add_special_tokens=True)["input_ids"]
+        for v in range(mn, mx + 1)
+    ]
+
+    p = min(_common_prefix_len(prompt_ids, f) for f in fulls)
+    p = min(p, min(len(f) for f in fulls) - 1)
+
+    return prompt_ids[:p], [f[p:] for f in fulls]
+
+
+class PromptTokens:
+    """
+    Token ids of prompts built from per-segment token ids, instead of
+    concatenating the prompt string and re-tokenizing all of it every turn.
+
+    In a dialogue lane the system prompt and every earlier turn are tokenized
+    once (cached by (model, segment text)); each new turn only tokenizes its
+    own text. The split of the answer instruction into context / scale value
+    continuations is computed once per model and scale.
+
+    Segment-wise ids must equal full-string ids, and whether they do depends on
+    the tokenizer and on the text at each boundary (e.g. a system prompt ending
+    in "." merges with the "\n\n" after it in some BPE vocabularies). Per model,
+    every distinct (segment kind, text) pair is checked once against full-string
+    tokenization: a prompt with an unverified segment (a new persona, item or
+    reply) costs one full-string tokenization, later ones only their new turn.
+    On a mismatch the model moves to the next scheme for good:
+    SCHEMES = lead separators -> trailing separators -> full-string tokenization.
+    """
+
+    SCHEMES = ("lead", "trail", "full")
+
+    def __init__(self, max_segments: int = 200_000):
+        self.max_segments = max(1, int(max_segments))
+        self._segments: "OrderedDict[Tuple[str, str], Tuple[int, ...]]" = OrderedDict()
+        self._special_prefix: Dict[str, Tuple[int, ...]] = {}
+        self._scheme: Dict[str, str] = {}
+        self._verified: Dict[str, set] = {}  # model -> verified (kind, text) pairs
+        self._splits: Dict[Tuple[str, str, int, int], Tuple[int, List[List[int]]]] = {}
+
+    def scheme(self, key: str) -> str:
+        return self._scheme.get(key, self.SCHEMES[0])
+
+    def _fall_back(self, key: str) -> None:
+        # segment-wise ids differed from full-string ids: next scheme, nothing verified
+        schemes = self.SCHEMES
+        self._scheme[key] = schemes[min(schemes.index(self.scheme(key)) + 1, len(schemes) - 1)]
+        self._verified.pop(key, None)
+        for split_key in [k for k in self._splits if k[0] == key]:
+            del self._splits[split_key]
+
+    def _encode(self, key: str, tokenizer, text: str) -> Tuple[int, ...]:
+        ids = self._segments.get((key, text))
+        if ids is not None:
+            self._segments.move_to_end((key, text))
+            return ids
+
+        ids = tuple(tokenizer(text, add_special_tokens=False)["input_ids"])
+        self._segments[(key, text)] = ids
+        if len(self._segments) > self.max_segments:
+            self._segments.popitem(last=False)
+        return ids
+
+    def _prefix(self, key: str, tokenizer) -> Tuple[int, ...]:
+        # special tokens that add_special_tokens=True puts in front (e.g. BOS)
+        if key not in self._special_prefix:
+            self._special_prefix[key] = tuple(tokenizer("", add_special_tokens=True)["input_ids"])
+        return self._special_prefix[key]
+
+    @staticmethod
+    def _full_string(tokenizer, messages: List[Dict], scale: Optional[Tuple[int, int]]) -> Tuple[List[int], int]:
+        body, tail = _messages_to_prompt_parts(messages, scale)
+        ids = tokenizer(body + tail, add_special_tokens=True)["input_ids"]
+        body_ids = tokenizer(body, add_special_tokens=True)["input_ids"]
+        return ids, _common_prefix_len(ids, body_ids)
+
+    def encode(
+        self,
+        key: str,
+        tokenizer,
+        messages: List[Dict],
+        scale: Optional[Tuple[int, int]],
+    ) -> Tuple[List[int], int]:
+        """
+        (prompt ids, stable) where ids[:stable] is shared with the next turn of
+        the same dialogue (system prompt + earlier turns, and with the "lead"
+        scheme also the current user turn).
+        """
+        scheme = self.scheme(key)
+        if scheme == "full":
+            return self._full_string(tokenizer, messages, scale)
+
+        segments, head = _prompt_segments(messages, trail=scheme == "trail")
+
+        ids = list(self._prefix(key, tokenizer))
+        for _kind, text in segments:
+            ids.extend(self._encode(key, tokenizer, text))
+        stable = len(ids)
+
+        tail = head + _answer_instruction(scale)
+        if scheme == "lead":
+            ids.extend(self._encode(key, tokenizer, tail))
+        else:
+            # the current user turn is new every time: not worth a cache entry
+            ids.extend(tokenizer(tail, add_special_tokens=False)["input_ids"])
+
+        pairs = set(segments) | {("tail", tail)}
+        verified = self._verified.setdefault(key, set())
+        if not pairs <= verified:
+            if tokenizer(_messages_to_prompt(messages, scale), add_special_tokens=True)["input_ids"] != ids:
+                self._fall_back(key)
+                return self.encode(key, tokenizer, messages, scale)
+            if len(verified) + len(pairs) > self.max_segments:
+                verified.clear()
+            verified |= pairs
+
+        return ids, stable
+
+    def scale_continuations(
+        self,
+        key: str,
+        tokenizer,
+        messages: List[Dict],
+        scale: Tuple[int, int],
+    ) -> Tuple[List[int], List[List[int]], int]:
+        """
+        Token-level _scale_continuations: (context ids, per-value continuation ids, stable).
+        How "...Answer: " + "<v>" splits into tokens only depends on the end of
+        the prompt, so it is computed once per (model, scale) on the answer
+        instruction alone, and checked once against the full-string split.
+        """
+        mn, mx = scale
+        if self.scheme(key) == "full":
+            context, conts = _scale_continuations(tokenizer, _messages_to_prompt(messages, scale), mn, mx)
+            _ids, stable = self._full_string(tokenizer, messages, scale)
+            return context, conts, min(stable, len(context))
+
+        ids, stable = self.encode(key, tokenizer, messages, scale)
+        instruction = _answer_instruction(scale)
+        split_key = (key, instruction, mn, mx)
+
+        split = self._splits.get(split_key)
+        if split is None:
+            instruction_ids = tokenizer(instruction, add_special_tokens=False)["input_ids"]
+            fulls = [
+                tokenizer(instruction + str(v), add_special_tokens=False)["input_ids"]
+                for v in range(mn, mx + 1)
+            ]
+            p = min(_common_prefix_len(instruction_ids, f) for f in fulls)
+            p = min(p, min(len(f) for f in fulls) - 1)
+            split = (len(instruction_ids) - p, [f[p:] for f in fulls])
+
+            context, conts = _scale_continuations(tokenizer, _messages_to_prompt(messages, scale), mn, mx)
+            if self.scheme(key) == "full" or context != ids[: len(ids) - split[0]] or conts != split[1]:
+                if self.scheme(key) != "full":
+                    self._fall_back(key)
+                return self.scale_continuations(key, tokenizer, messages, scale)
+            self._splits[split_key] = split
+
+        cut, conts = split
+        context = ids[: len(ids) - cut]
+        return context, conts, min(stable, len(context))
+
+    def drop_model(self, key: str) -> None:
+        for seg_key in [k for k in self._segments if k[0] == key]:
+            del self._segments[seg_key]
+        for split_key in [k for k in self._splits if k[0] == key]:
+            del self._splits[split_key]
+        self._special_prefix.pop(key, None)
+        self._verified.pop(key, None)
@@ -0,0 +1,154 @@
+from pathlib import Path
+from typing import Dict, Optional
+import hashlib
+import json
+import sqlite3
+import threading
+import time
+
+
+CACHE_MODES = ("off", "read", "readwrite")
+
+
+class ResponseCache:
+    """
+    Content-addressed cache απαντήσεων, σε SQLite:
+      results/cache/responses.sqlite
+
+    key   = sha256(model.api_name, rendered prompt, sampling params, seed, sample index)
+    value = JSON (π.χ. {"text": "3"} ή {"text": "3", "probs": [...]})
+
+    mode:
+      read      -> μόνο lookups (τίποτα δεν γράφεται)
+      readwrite -> lookups + αποθήκευση νέων απαντήσεων
+    Όταν το μέγεθος ξεπεράσει το max_mb, σβήνονται πρώτα τα least-recently-used.
+    """
+
+    def __init__(
+        self,
+        mode: str = "readwrite",
+        path: str | Path = "results/cache/responses.sqlite",
+        max_mb: int = 512,
+    ):
+        if mode not in ("read", "readwrite"):
+            raise ValueError(f"Cache mode πρέπει να είναι 'read' ή 'readwrite', όχι '{mode}'")
+
+        self.mode = mode
+        self.path = Path(path)
+        self.max_bytes = int(max_mb) * 1024 * 1024
+        self.hits = 0
+        self.misses = 0
+
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(str(self.path), check_same_thread=False)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute(
+            "CREATE TABLE IF NOT EXISTS responses ("
+            " key TEXT PRIMARY KEY,"
+            " value TEXT NOT NULL,"
+            " size INTEGER NOT NULL,"
+            " last_used REAL NOT NULL)"
+        )
+        self._conn.execute("CREATE INDEX IF NOT EXISTS idx_responses_last_used ON responses(last_used)")
+        self._conn.commit()
+
+        row = self._conn.execute("SELECT COALESCE(SUM(size), 0) FROM responses").fetchone()
+        self._bytes = int(row[0])
+
+    @staticmethod
+    def make_key(
+        api_name: str,
+        prompt: str,
+        temperature: float,
+        top_p: Optional[float],
+        seed: Optional[int],
+        sample_index: int,
+        scoring_mode: str = "generate",
+    ) -> str:
+        payload = json.dumps(
+            {
+                "api_name": api_name,
+                "prompt": prompt,
+                "temperature": temperature,
+                "top_p": top_p,
+                "seed": seed,
+                "sample_index": sample_index,
+                "scoring_mode": scoring_mode,
+            },
+            sort_keys=True,
+            ensure_ascii=False,
+        )
+        return hashlib.sha256(payload.encode("utf-8")).hexdigest()
+
+    def get(self, key: str) -> Optional[Dict]:
+        with self._lock:
+            row = self._conn.execute("SELECT value FROM responses WHERE key = ?", (key,)).fetchone()
+
+            if row is None:
+                self.misses += 1
+                return None
+
+            self.hits += 1
+            if self.mode == "readwrite":
+                self._conn.execute("UPDATE responses SET last_used = ? WHERE key = ?", (time.time(), key))
+                self._conn.commit()
+
+        return json.loads(row[0])
+
+    def put(self, key: str, value: Dict) -> None:
+        if self.mode != "readwrite":
+            return
+
+        data = json.dumps(value, ensure_ascii=False)
+        size = len(data.encode("utf-8")) + len(key)
+
+        with self._lock:
+            old = self._conn.execute("SELECT size FROM responses WHERE key = ?", (key,)).fetchone()
+            if old is not None:
+                self._bytes -= int(old[0])
+
+            self._conn.execute(
+                "INSERT OR REPLACE INTO responses (key, value, size, last_used) VALUES (?, ?, ?, ?)",
+                (key, data, size, time.time()),
+            )
+            self._bytes += size
+
+            if self._bytes > self.max_bytes:
+                self._evict()
+
+            self._conn.commit()
+
+    def _evict(self) -> None:
+        # LRU: σβήνουμε τα παλαιότερα σε μικρά κομμάτια μέχρι να χωράμε στο budget
+        while self._bytes > self.max_bytes:
+            rows = self._conn.execute(
+                "SELECT key, size FROM responses ORDER BY last_used ASC LIMIT 256"
+            ).fetchall()
+            if not rows:
+                self._bytes = 0
+                break
+
+            for key, size in rows:
+                self._conn.execute("DELETE FROM responses WHERE key = ?", (key,))
+                self._bytes -= int(size)
+                if self._bytes <= self.max_bytes:
+                    break
+
+    def close(self) -> None:
+        with self._lock:
+            self._conn.close()
+
+
+def open_response_cache(mode: str, max_mb: int = 512) -> Optional[ResponseCache]:
+    """
+    mode "off" -> None (καμία cache), αλλιώς ResponseCache στο default path.
+    """
+    if mode not in CACHE_MODES:
+        raise ValueError(f"Cache mode πρέπει να είναι ένα από {CACHE_MODES}, όχι '{mode}'")
+
+    if mode == "off":
+        return None
+
+    return ResponseCache(mode=mode, max_mb=max_mb)
@@ -1,7 +1,25 @@
 from pathlib import Path
-from typing import List, Dict
+from typing import Iterable, List, Dict, Optional
 import csv
 import json
+import os
+
+# Προαιρετικό: Parquet output μόνο αν υπάρχει το pyarrow. Φορτώνεται με τον πρώτο
+# Parquet writer (βλ. _require_pyarrow), όχι στο import: το CSV path δεν το χρειάζεται.
+pa = None
+pq = None
+
+
+def _require_pyarrow() -> None:
+    global pa, pq
+    if pa is not None:
+        return
+    try:
+        import pyarrow
+        import pyarrow.parquet
+    except ImportError:
+        raise RuntimeError("Parquet output ζητήθηκε αλλά λείπει το pyarrow (pip install pyarrow).")
+    pa, pq = pyarrow, pyarrow.parquet
 
 
 # Στήλες για το RAW CSV
@@ -16,11 +34,100 @@ RAW_COLUMNS = [
     "question_text",
     "trait",
     "reverse",
+    "item_order",
+    "item_position",
+    "seed",
     "answer",
+    "answer_probs",
     "timestamp_run",
 ]
 
 
+class CsvRowWriter:
+    """
+    Streaming CSV writer (context manager).
+
+    - write_row / write_rows γράφουν αμέσως στο αρχείο, χωρίς να κρατούν rows στη μνήμη
+    - κάθε flush_every rows: flush + fsync, ώστε άλλα εργαλεία να κάνουν tail το αρχείο live
+    - mode="a": append σε υπάρχον αρχείο (header μόνο αν το αρχείο είναι κενό)
+
+    Ό,τι κλειδί λείπει από ένα row μένει κενό· το experiment_id μπαίνει πάντα.
+    """
+
+    def __init__(
+        self,
+        path: str | Path,
+        columns: List[str],
+        experiment_id: str,
+        mode: str = "w",
+        flush_every: int = 50,
+    ):
+        if mode not in ("w", "a"):
+            raise ValueError(f"mode πρέπει να είναι 'w' ή 'a', όχι '{mode}'")
+
+        self.path = Path(path)
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+
+        self.columns = columns
+        self.experiment_id = experiment_id
+        self.flush_every = max(1, int(flush_every))
+        self.rows_written = 0
+
+        needs_header = mode == "w" or not self.path.exists() or self.path.stat().st_size == 0
+
+        self._empty_row = {col: "" for col in columns}
+        self._pending = 0
+        self._f = self.path.open(mode, newline="", encoding="utf-8")
+        self._writer = csv.DictWriter(self._f, fieldnames=columns)
+
+        if needs_header:
+            self._writer.writeheader()
+
+    def __enter__(self) -> "CsvRowWriter":
+        return self
+
+    def __exit__(self, exc_type, exc, tb) -> None:
+        self.close()
+
+    def write_row(self, row: Dict) -> None:
+        merged = self._empty_row | row
+        merged["experiment_id"] = self.experiment_id
+        self._writer.writerow(merged)
+
+        self.rows_written += 1
+        self._pending += 1
+        if self._pending >= self.flush_every:
+            self.flush()
+
+    def write_rows(self, rows: Iterable[Dict]) -> None:
+        for row in rows:
+            self.write_row(row)
+
+    def flush(self) -> None:
+        self._f.flush()
+        os.fsync(self._f.fileno())
+        self._pending = 0
+
+    def close(self) -> None:
+        if self._f.closed:
+            return
+        self.flush()
+        self._f.close()
+
+
+def open_raw_csv_writer(
+    experiment_id: str,
+    base_dir: str | Path = "results/raw",
+    mode: str = "w",
+    flush_every: int = 50,
+) -> CsvRowWriter:
+    """
+    Streaming writer για το results/raw/raw_<experiment_id>.csv
+    """
+    path = Path(base_dir) / f"raw_{experiment_id}.csv"
+    return CsvRowWriter(path, RAW_COLUMNS, experiment_id, mode=mode, flush_every=flush_every)
+
+
 def write_raw_csv(
     experiment_id: str,
     rows: List[Dict],
@@ -33,23 +140,10 @@ def write_raw_csv(
     rows: λίστα από dicts με κλειδιά που ταιριάζουν στις RAW_COLUMNS.
     Ό,τι κλειδί λείπει θα μείνει κενό.
     """
-    base_dir = Path(base_dir)
-    base_dir.mkdir(parents=True, exist_ok=True)
-
-    path = base_dir / f"raw_{experiment_id}.csv"
-
-    empty_row = {col: "" for col in RAW_COLUMNS}
-
-    with path.open("w", newline="", encoding="utf-8") as f:
-        writer = csv.DictWriter(f, fieldnames=RAW_COLUMNS)
-        writer.writeheader()
-
-        for row in rows:
-            merged = empty_row | row
-            merged["experiment_id"] = experiment_id
-            writer.writerow(merged)
+    with open_raw_csv_writer(experiment_id, base_dir=base_dir) as writer:
+        writer.write_rows(rows)
 
-    return path
+    return writer.path
 
 
 # Στήλες για το SCORED CSV
@@ -68,6 +162,19 @@ SCORED_COLUMNS = [
 ]
 
 
+def open_scored_csv_writer(
+    experiment_id: str,
+    base_dir: str | Path = "results/scored",
+    mode: str = "w",
+    flush_every: int = 50,
+) -> CsvRowWriter:
+    """
+    Streaming writer για το results/scored/scored_<experiment_id>.csv
+    """
+    path = Path(base_dir) / f"scored_{experiment_id}.csv"
+    return CsvRowWriter(path, SCORED_COLUMNS, experiment_id, mode=mode, flush_every=flush_every)
+
+
 def write_scored_csv(
     experiment_id: str,
     rows: List[Dict],
@@ -79,23 +186,10 @@ def write_scored_csv(
 
     Κάθε row = ένα score (π.χ. Openness, Economic, overall).
     """
-    base_dir = Path(base_dir)
-    base_dir.mkdir(parents=True, exist_ok=True)
-
-    path = base_dir / f"scored_{experiment_id}.csv"
-
-    empty_row = {col: "" for col in SCORED_COLUMNS}
-
-    with path.open("w", newline="", encoding="utf-8") as f:
-        writer = csv.DictWriter(f, fieldnames=SCORED_COLUMNS)
-        writer.writeheader()
-
-        for row in rows:
-            merged = empty_row | row
-            merged["experiment_id"] = experiment_id
-            writer.writerow(merged)
+    with open_scored_csv_writer(experiment_id, base_dir=base_dir) as writer:
+        writer.write_rows(rows)
 
-    return path
+    return writer.path
 
 
 def write_metadata_json(
@@ -116,3 +210,220 @@ def write_metadata_json(
         json.dump(experiment_meta, f, ensure_ascii=False, indent=2)
 
     return path
+
+
+class MetadataWriter:
+    """
+    Το metadata_<experiment_id>.json ενός experiment που τρέχει.
+
+    update(...) ενημερώνει πεδία (π.χ. status, rows_written) και ξαναγράφει το
+    αρχείο atomically (temp + os.replace), ώστε όποιος το διαβάζει να βλέπει
+    πάντα έγκυρο JSON.
+    """
+
+    def __init__(
+        self,
+        experiment_meta: Dict,
+        base_dir: str | Path = "results/metadata",
+    ):
+        self.meta = dict(experiment_meta)
+        self.base_dir = Path(base_dir)
+        self.path: Optional[Path] = None
+        self._write()
+
+    def __enter__(self) -> "MetadataWriter":
+        return self
+
+    def __exit__(self, exc_type, exc, tb) -> None:
+        if exc_type is not None:
+            self.update(status="failed")
+
+    def _write(self) -> None:
+        self.base_dir.mkdir(parents=True, exist_ok=True)
+
+        experiment_id = self.meta["experiment_id"]
+        path = self.base_dir / f"metadata_{experiment_id}.json"
+        tmp = path.with_suffix(".json.tmp")
+
+        with tmp.open("w", encoding="utf-8") as f:
+            json.dump(self.meta, f, ensure_ascii=False, indent=2)
+            f.flush()
+            os.fsync(f.fileno())
+
+        os.replace(tmp, path)
+        self.path = path
+
+    def update(self, **fields) -> None:
+        self.meta.update(fields)
+        self._write()
+
+
+# ----- Columnar (Parquet) output -----
+
+def _parquet_schema(columns: List[str], types: Dict):
+    """
+    Strings -> dictionary-encoded (επαναλαμβάνονται σε κάθε row), ints/floats/bools typed.
+    Οι "plain" string στήλες είναι σχεδόν μοναδικές ανά row, οπότε μένουν απλά strings.
+    """
+    fields = []
+    for col in columns:
+        if col in types["int"]:
+            fields.append(pa.field(col, getattr(pa, types["int"][col])()))
+        elif col in types["float"]:
+            fields.append(pa.field(col, pa.float64()))
+        elif col in types["bool"]:
+            fields.append(pa.field(col, pa.bool_()))
+        elif col in types["plain"]:
+            fields.append(pa.field(col, pa.string()))
+        else:
+            fields.append(pa.field(col, pa.dictionary(pa.int32(), pa.string())))
+    return pa.schema(fields)
+
+
+# experiment_id / model είναι partition keys (στο path), όχι στήλες του αρχείου
+PARQUET_PARTITION_COLUMNS = ["experiment_id", "model"]
+
+_RAW_PARQUET_TYPES = {
+    "int": {"run_index": "int32", "question_id": "int32", "item_position": "int32", "seed": "int64", "answer": "int16"},
+    "float": [],
+    "bool": ["reverse"],
+    "plain": ["answer_probs", "timestamp_run"],
+}
+
+_SCORED_PARQUET_TYPES = {
+    "int": {"run_index": "int32"},
+    "float": ["score_value", "score_normalized"],
+    "bool": [],
+    "plain": [],
+}
+
+
+def _to_bool(v) -> Optional[bool]:
+    if v is None or v == "":
+        return None
+    if isinstance(v, str):
+        return v.strip().lower() in ("true", "1", "yes")
+    return bool(v)
+
+
+def _to_number(v, kind):
+    if v is None or v == "":
+        return None
+    return kind(v)
+
+
+class ParquetRowWriter:
+    """
+    Streaming Parquet writer με το ίδιο interface με τον CsvRowWriter.
+
+    Γράφει partitioned ανά experiment_id / model:
+      <base_dir>/experiment_id=<id>/model=<model>/part-0.parquet
+
+    Τα rows μαζεύονται ανά model και γράφονται ως row groups των row_group_size.
+    """
+
+    def __init__(
+        self,
+        base_dir: str | Path,
+        columns: List[str],
+        types: Dict,
+        experiment_id: str,
+        row_group_size: int = 2000,
+    ):
+        _require_pyarrow()
+
+        self.base_dir = Path(base_dir)
+        self.experiment_id = experiment_id
+        self.row_group_size = max(1, int(row_group_size))
+        self.rows_written = 0
+
+        self._types = types
+        self._columns = [c for c in columns if c not in PARQUET_PARTITION_COLUMNS]
+        self._schema = _parquet_schema(self._columns, types)
+        self._buffers: Dict[str, List[Dict]] = {}
+        self._writers: Dict[str, "pq.ParquetWriter"] = {}
+
+    def __enter__(self) -> "ParquetRowWriter":
+        return self
+
+    def __exit__(self, exc_type, exc, tb) -> None:
+        self.close()
+
+    def _partition_path(self, model: str) -> Path:
+        return self.base_dir / f"experiment_id={self.experiment_id}" / f"model={model}" / "part-0.parquet"
+
+    def _convert(self, col: str, values: List):
+        if col in self._types["int"]:
+            return [_to_number(v, int) for v in values]
+        if col in self._types["float"]:
+            return [_to_number(v, float) for v in values]
+        if col in self._types["bool"]:
+            return [_to_bool(v) for v in values]
+        return [None if v is None else str(v) for v in values]
+
+    def _flush_model(self, model: str) -> None:
+        rows = self._buffers.get(model) or []
+        if not rows:
+            return
+
+        arrays = []
+        for col, field in zip(self._columns, self._schema):
+            values = self._convert(col, [row.get(col, "") for row in rows])
+            if pa.types.is_dictionary(field.type):
+                arrays.append(pa.array(values, type=pa.string()).dictionary_encode())
+            else:
+                arrays.append(pa.array(values, type=field.type))
+
+        table = pa.Table.from_arrays(arrays, schema=self._schema)
+
+        writer = self._writers.get(model)
+        if writer is None:
+            path = self._partition_path(model)
+            path.parent.mkdir(parents=True, exist_ok=True)
+            writer = pq.ParquetWriter(str(path), self._schema, use_dictionary=True, compression="zstd")
+            self._writers[model] = writer
+
+        writer.write_table(table)
+        self._buffers[model] = []
+
+    def write_row(self, row: Dict) -> None:
+        model = str(row.get("model", ""))
+        self._buffers.setdefault(model, []).append(row)
+        self.rows_written += 1
+
+        if len(self._buffers[model]) >= self.row_group_size:
+            self._flush_model(model)
+
+    def write_rows(self, rows: Iterable[Dict]) -> None:
+        for row in rows:
+            self.write_row(row)
+
+    def flush(self) -> None:
+        for model in list(self._buffers):
+            self._flush_model(model)
+
+    def close(self) -> None:
+        self.flush()
+        for writer in self._writers.values():
+            writer.close()
+        self._writers = {}
+
+
+def open_raw_parquet_writer(
+    experiment_id: str,
+    base_dir: str | Path = "results/parquet/raw",
+) -> ParquetRowWriter:
+    """
+    Streaming Parquet writer με το schema των RAW_COLUMNS.
+    """
+    return ParquetRowWriter(base_dir, RAW_COLUMNS, _RAW_PARQUET_TYPES, experiment_id)
+
+
+def open_scored_parquet_writer(
+    experiment_id: str,
+    base_dir: str | Path = "results/parquet/scored",
+) -> ParquetRowWriter:
+    """
+    Streaming Parquet writer με το schema των SCORED_COLUMNS.
+    """
+    return ParquetRowWriter(base_dir, SCORED_COLUMNS, _SCORED_PARQUET_TYPES, experiment_id)
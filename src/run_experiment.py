@@ -1,10 +1,12 @@
 import argparse
+import sys
 from datetime import datetime
 from pathlib import Path
-from typing import List
+from typing import List, Optional
 
 from input_loader import load_models, load_personas, ModelDef, PersonaDef
-from experiment_runner import ExperimentConfig, PersonaRunConfig, run_experiment
+from experiment_runner import ExperimentConfig, PersonaRunConfig, TestSpec, run_experiment
+from model_daemon import DEFAULT_DAEMON_URL, run_on_daemon
 
 
 def _generate_experiment_id() -> str:
@@ -58,7 +60,7 @@ def _parse_persona_specs(
     return result
 
 
-def parse_args() -> argparse.Namespace:
+def parse_args(argv: Optional[List[str]] = None) -> argparse.Namespace:
     parser = argparse.ArgumentParser(description="BiasMind experiment runner")
 
     parser.add_argument(
@@ -66,15 +68,32 @@ def parse_args() -> argparse.Namespace:
         help="ID του experiment (αν δεν δοθεί, θα φτιαχτεί timestamp-based).",
     )
 
+    parser.add_argument(
+        "--resume",
+        metavar="EXPERIMENT_ID",
+        help=(
+            "Συνέχεια ενός experiment που διακόπηκε, από το results/checkpoints/journal_<id>.jsonl. "
+            "Τα υπόλοιπα arguments πρέπει να είναι ίδια με το αρχικό run."
+        ),
+    )
+
     parser.add_argument(
         "--test-file",
+        action="append",
         required=True,
-        help="Διαδρομή στο test JSON (π.χ. data/tests/test_bfi10.json).",
+        help=(
+            "Διαδρομή στο test JSON (π.χ. data/tests/test_bfi10.json). Μπορεί να δοθεί πολλές φορές: "
+            "όλα τα tests τρέχουν στο ίδιο experiment, με ένα φόρτωμα κάθε μοντέλου."
+        ),
     )
 
     parser.add_argument(
         "--test-name",
-        help="Όνομα του test (π.χ. BFI-10). Αν δεν δοθεί, θα χρησιμοποιηθεί το όνομα του αρχείου.",
+        action="append",
+        help=(
+            "Όνομα του test (π.χ. BFI-10), ένα ανά --test-file με την ίδια σειρά. "
+            "Αν δεν δοθεί, θα χρησιμοποιηθεί το όνομα του αρχείου."
+        ),
     )
 
     parser.add_argument(
@@ -109,19 +128,193 @@ def parse_args() -> argparse.Namespace:
         help="Temperature για το μοντέλο (π.χ. 0.2, 0.5, 0.7).",
     )
 
-    return parser.parse_args()
+    parser.add_argument(
+        "--seed",
+        type=int,
+        default=None,
+        help=(
+            "Seed του experiment· κάθε (model, test, persona, run, item) παίρνει δικό του seed από αυτό, "
+            "άρα batched / --workers / σειριακό τρέξιμο δίνουν τις ίδιες απαντήσεις "
+            "(default: τυχαίο, γράφεται στο metadata)."
+        ),
+    )
 
+    parser.add_argument(
+        "--batch-size",
+        type=int,
+        default=8,
+        help="Πόσα ανεξάρτητα dialogues (π.χ. fresh runs) ανά batched generate call.",
+    )
 
-def main() -> None:
-    args = parse_args()
+    parser.add_argument(
+        "--prefix-cache-mb",
+        type=int,
+        default=0,
+        help=(
+            "Memory budget (MB) για επαναχρησιμοποίηση past_key_values του persona "
+            "system prompt και του dialogue. Χρήσιμο σε continuous / carry_over. 0 = off."
+        ),
+    )
 
-    experiment_id = args.experiment_id or _generate_experiment_id()
+    parser.add_argument(
+        "--scoring-mode",
+        choices=["generate", "constrained", "logits"],
+        default="generate",
+        help=(
+            "generate = sampling + parsing του κειμένου. "
+            "constrained = sampling μόνο πάνω στα tokens της κλίμακας (+EOS), χωρίς parse failures. "
+            "logits = ένα forward pass και κατανομή πάνω στις τιμές της κλίμακας "
+            "(argmax αν temperature 0, αλλιώς sampling). Μόνο για huggingface_local."
+        ),
+    )
+
+    parser.add_argument(
+        "--item-order",
+        choices=["file", "reverse", "random", "latin"],
+        default="file",
+        help=(
+            "Σειρά των items ανά run (counterbalancing, καταγράφεται ανά row): file = όπως στο test, "
+            "reverse = ανάποδα, random = τυχαία ανά (test, persona, run) από το --seed, "
+            "latin = balanced Latin square (το run r παίρνει τη γραμμή r). "
+            "Τα fresh runs με διαφορετική σειρά τρέχουν μαζί στα ίδια batches."
+        ),
+    )
+
+    parser.add_argument(
+        "--max-in-flight",
+        type=int,
+        default=8,
+        help=(
+            "Remote providers (π.χ. openai): πόσα requests από διαφορετικά lanes "
+            "είναι ταυτόχρονα in flight (async, ένα task ανά lane)."
+        ),
+    )
+
+    parser.add_argument(
+        "--workers",
+        type=int,
+        default=1,
+        help=(
+            "huggingface_local: μοίρασε τα ανεξάρτητα lanes (fresh runs, personas με reset) "
+            "σε N processes· κάθε worker φορτώνει το μοντέλο μία φορά."
+        ),
+    )
 
-    test_file = Path(args.test_file)
-    if not test_file.exists():
-        raise FileNotFoundError(f"Test file δεν βρέθηκε: {test_file}")
+    parser.add_argument(
+        "--torch-threads",
+        type=int,
+        default=0,
+        help="torch threads ανά worker του --workers (0 = cores / workers).",
+    )
+
+    parser.add_argument(
+        "--model-ram-mb",
+        type=int,
+        default=0,
+        help=(
+            "RAM budget (MB) για τα φορτωμένα huggingface_local μοντέλα ανά process· "
+            "όταν δεν χωρά το επόμενο, φεύγει πρώτα όποιο δεν ξαναχρειάζεται "
+            "(0 = BIASMIND_MODEL_RAM_MB ή 70%% της RAM)."
+        ),
+    )
+
+    parser.add_argument(
+        "--cache",
+        choices=["off", "read", "readwrite"],
+        default="off",
+        help=(
+            "Persistent response cache στο results/cache (key: model, prompt, sampling params, "
+            "sample index). read = μόνο lookups, readwrite = lookups + αποθήκευση."
+        ),
+    )
+
+    parser.add_argument(
+        "--cache-max-mb",
+        type=int,
+        default=512,
+        help="Μέγιστο μέγεθος της response cache (LRU eviction).",
+    )
+
+    parser.add_argument(
+        "--parquet",
+        action="store_true",
+        help=(
+            "Γράψε επιπλέον columnar Parquet (results/parquet/{raw,scored}/experiment_id=.../model=...). "
+            "Χρειάζεται pyarrow."
+        ),
+    )
+
+    parser.add_argument(
+        "--progress",
+        action="store_true",
+        help=(
+            "Γράψε structured progress events (JSON lines με πρόθεμα '@progress ': "
+            "items done/total, items/sec, tokens/sec, ETA, parse failures) στο stdout."
+        ),
+    )
+
+    parser.add_argument(
+        "--profile",
+        choices=["off", "timers", "cprofile"],
+        default="off",
+        help=(
+            "Χρονομέτρηση ανά stage (prompt, tokenize, generate, parse, router, CSV) σε histograms "
+            "-> results/metadata/profile_<id>.json. cprofile = επιπλέον cProfile -> profile_<id>.prof."
+        ),
+    )
+
+    parser.add_argument(
+        "--daemon",
+        nargs="?",
+        const=DEFAULT_DAEMON_URL,
+        metavar="URL",
+        help=(
+            "Στείλε το experiment ως job στο model daemon (src/model_daemon.py), "
+            f"που κρατά τα μοντέλα φορτωμένα ανάμεσα στα runs (default: {DEFAULT_DAEMON_URL})."
+        ),
+    )
+
+    return parser.parse_args(argv)
+
+
+def main(argv: Optional[List[str]] = None) -> None:
+    if argv is None:
+        argv = sys.argv[1:]
+
+    args = parse_args(argv)
+
+    if args.daemon:
+        job = run_on_daemon(args.daemon, argv, on_output=lambda text: print(text, end="", flush=True))
+        if job["status"] != "finished":
+            sys.exit(1)
+        return
+
+    run_from_args(args)
+
+
+def run_from_args(args: argparse.Namespace) -> None:
+    """
+    Τρέχει το experiment που περιγράφουν τα CLI args, σε αυτό το process
+    (το καλεί και ο model daemon για κάθε job).
+    """
+    if args.resume and args.experiment_id and args.experiment_id != args.resume:
+        raise ValueError("--experiment-id και --resume δείχνουν σε διαφορετικό experiment.")
+
+    experiment_id = args.resume or args.experiment_id or _generate_experiment_id()
+
+    test_files = [Path(f) for f in args.test_file]
+    for test_file in test_files:
+        if not test_file.exists():
+            raise FileNotFoundError(f"Test file δεν βρέθηκε: {test_file}")
+
+    test_names = args.test_name or [test_file.stem for test_file in test_files]
+    if len(test_names) != len(test_files):
+        raise ValueError(
+            f"Δόθηκαν {len(test_names)} --test-name για {len(test_files)} --test-file· "
+            "χρειάζεται ένα όνομα ανά test (ή κανένα)."
+        )
 
-    test_name = args.test_name or test_file.stem
+    tests = [TestSpec(test_name=name, test_file=f) for name, f in zip(test_names, test_files)]
 
     model_ids = [m.strip() for m in args.model]
     models: List[ModelDef] = load_models(model_ids)
@@ -133,12 +326,26 @@ def main() -> None:
 
     config = ExperimentConfig(
         experiment_id=experiment_id,
-        test_name=test_name,
-        test_file=test_file,
+        tests=tests,
         models=models,
         personas=persona_cfgs,
         memory_between_personas=args.memory_between,
         temperature=args.temperature,
+        seed=args.seed,
+        batch_size=args.batch_size,
+        prefix_cache_mb=args.prefix_cache_mb,
+        scoring_mode=args.scoring_mode,
+        item_order=args.item_order,
+        cache_mode=args.cache,
+        cache_max_mb=args.cache_max_mb,
+        resume=bool(args.resume),
+        parquet=args.parquet,
+        max_in_flight=args.max_in_flight,
+        workers=args.workers,
+        torch_threads=args.torch_threads,
+        model_ram_mb=args.model_ram_mb,
+        progress=args.progress,
+        profile=args.profile,
     )
 
     run_experiment(config)
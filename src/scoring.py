@@ -0,0 +1,126 @@
+from typing import Dict, List, Tuple
+
+import numpy as np
+
+from test_loader import TestDefinition
+
+
+SCORING_FORMULAS = ("mean", "sum")
+
+
+class ScoringEngine:
+    """
+    Vectorized scoring για ένα TestDefinition.
+
+    Υπολογίζονται ΜΙΑ φορά από το test JSON:
+    - reverse mask ανά item
+    - για κάθε trait του `scoring`: index array των items του + formula ("mean" / "sum")
+      (αν το test δεν έχει `scoring`, traits = item.trait με formula "mean")
+
+    Μετά, ένα answer matrix (n_runs × n_items) βαθμολογείται με μία πράξη ανά trait.
+    """
+
+    def __init__(self, test_def: TestDefinition):
+        self.test_name = test_def.test_name
+        self.scale_min = int(test_def.scale_min)
+        self.scale_max = int(test_def.scale_max)
+
+        self.item_ids: List = [item.id for item in test_def.items]
+        self.item_pos: Dict = {item_id: j for j, item_id in enumerate(self.item_ids)}
+        self.reverse = np.array([bool(item.reverse) for item in test_def.items], dtype=bool)
+
+        self.traits: List[Tuple[str, np.ndarray, str]] = []
+
+        if test_def.scoring:
+            for trait, rule in test_def.scoring.items():
+                missing = [i for i in rule.items if i not in self.item_pos]
+                if missing:
+                    raise ValueError(f"Scoring rule '{trait}' αναφέρει items που δεν υπάρχουν: {missing}")
+                if rule.formula not in SCORING_FORMULAS:
+                    raise ValueError(
+                        f"Άγνωστο formula '{rule.formula}' για '{trait}' (υποστηρίζονται: {SCORING_FORMULAS})"
+                    )
+                idx = np.array([self.item_pos[i] for i in rule.items], dtype=np.intp)
+                self.traits.append((trait, idx, rule.formula))
+        else:
+            by_trait: Dict[str, List[int]] = {}
+            for j, item in enumerate(test_def.items):
+                by_trait.setdefault(item.trait, []).append(j)
+            for trait, positions in by_trait.items():
+                self.traits.append((trait, np.array(positions, dtype=np.intp), "mean"))
+
+    def adjust(self, answers: np.ndarray) -> np.ndarray:
+        """
+        Εφαρμόζει το reverse scoring: adj = scale_min + scale_max - answer.
+        NaN (item χωρίς απάντηση) μένει NaN.
+        """
+        answers = np.asarray(answers, dtype=float)
+        return np.where(self.reverse, self.scale_min + self.scale_max - answers, answers)
+
+    def score(self, answers: np.ndarray) -> np.ndarray:
+        """
+        answers: (n_runs, n_items) με τη σειρά των test_def.items (NaN = χωρίς απάντηση)
+        returns: (n_runs, n_traits) με τη σειρά του self.traits
+        """
+        adj = self.adjust(np.atleast_2d(answers))
+        out = np.zeros((adj.shape[0], len(self.traits)), dtype=float)
+
+        for t, (_trait, idx, formula) in enumerate(self.traits):
+            block = adj[:, idx]
+            answered = (~np.isnan(block)).sum(axis=1)
+            total = np.nansum(block, axis=1)
+
+            if formula == "sum":
+                out[:, t] = total
+            else:
+                out[:, t] = np.divide(total, answered, out=np.zeros_like(total), where=answered > 0)
+
+            # trait χωρίς καμία απάντηση -> δεν βγαίνει score
+            out[answered == 0, t] = np.nan
+
+        return out
+
+    def score_rows(self, raw_rows: List[Dict]) -> List[Dict]:
+        """
+        raw rows -> scored rows, ένα ανά (model, provider, persona, run, test) και trait,
+        με τη σειρά που εμφανίζονται τα runs στα raw rows.
+        """
+        if not raw_rows:
+            return []
+
+        keys: Dict[tuple, int] = {}
+        for row in raw_rows:
+            key = (row["model"], row["provider"], row["persona_id"], row["run_index"], row["test_name"])
+            keys.setdefault(key, len(keys))
+
+        answers = np.full((len(keys), len(self.item_ids)), np.nan)
+        for row in raw_rows:
+            key = (row["model"], row["provider"], row["persona_id"], row["run_index"], row["test_name"])
+            col = self.item_pos.get(row["question_id"])
+            if col is not None:
+                answers[keys[key], col] = int(row["answer"])
+
+        scores = self.score(answers)
+
+        scored_rows: List[Dict] = []
+        for (model, provider, persona_id, run_index, test_name), r in keys.items():
+            for t, (trait, _idx, _formula) in enumerate(self.traits):
+                value = scores[r, t]
+                if np.isnan(value):
+                    continue
+                scored_rows.append(
+                    {
+                        "model": model,
+                        "provider": provider,
+                        "persona_id": persona_id,
+                        "run_index": run_index,
+                        "test_name": test_name,
+                        "score_name": trait,
+                        "score_kind": "trait",
+                        "score_value": round(float(value), 3),
+                        "score_normalized": "",
+                        "summary_label": "",
+                    }
+                )
+
+        return scored_rows
@@ -0,0 +1,39 @@
+from typing import Optional, Union
+import hashlib
+import secrets
+
+
+# seeds χωράνε σε signed 64-bit (torch.Generator.manual_seed, OpenAI "seed")
+SEED_BITS = 63
+
+
+def new_base_seed() -> int:
+    """
+    Seed ενός experiment όταν δεν δόθηκε --seed (γράφεται στο metadata,
+    ώστε το run να μπορεί να επαναληφθεί με --seed).
+    """
+    return secrets.randbits(31)
+
+
+def derive_seed(
+    base_seed: int,
+    model_id: str,
+    persona_id: str,
+    run_index: int,
+    item_id: Union[str, int],
+    test_name: Optional[str] = None,
+) -> int:
+    """
+    Seed ενός βήματος (model, persona, run_index, item) από το seed του experiment.
+    test_name: για experiments με πολλά tests, όπου τα item ids επαναλαμβάνονται.
+
+    Εξαρτάται μόνο από την ταυτότητα του βήματος, όχι από τη σειρά εκτέλεσης:
+    batched, async, --workers και σειριακό τρέξιμο δίνουν το ίδιο seed στο ίδιο βήμα,
+    και η ResponseCache το έχει στο key της.
+    """
+    parts = (int(base_seed), model_id, persona_id, int(run_index), item_id)
+    if test_name is not None:
+        parts += (test_name,)
+    payload = "|".join(str(x) for x in parts)
+    digest = hashlib.sha256(payload.encode("utf-8")).digest()
+    return int.from_bytes(digest[:8], "big") >> (64 - SEED_BITS)
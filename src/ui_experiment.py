@@ -1,11 +1,18 @@
+import html
 import json
+import os
 import sys
 import shlex
-import subprocess
+import threading
+import time
 from pathlib import Path
 
 import gradio as gr
 
+from job_queue import FINAL_STATUSES, JobQueue, QueueFullError, run_experiment_job
+from model_daemon import DEFAULT_DAEMON_URL, cancel_job, daemon_status, follow_job, get_job, submit_or_fail
+from progress import format_eta, parse_progress_line
+
 PERSONAS_DIR = Path("data/personas")
 TESTS_DIR = Path("data/tests")
 MODELS_DIR = Path("data/models")
@@ -130,20 +137,31 @@ def _memory_between_ui(order):
     return gr.update(interactive=True)
 
 
+def _as_list(value):
+    # multiselect dropdowns give lists; a single value still works
+    if value is None:
+        return []
+    if isinstance(value, str):
+        value = [value]
+    return [v.strip() for v in value if v and v.strip()]
+
+
 def _build_cmd(
-    test_file,
-    model_id,
+    test_files,
+    model_ids,
     temperature,
     memory_between,
     cfg_dict,
     order_list,
+    experiment_id=None,
 ):
-    if not test_file:
-        raise ValueError("Επίλεξε test file.")
+    test_files = _as_list(test_files)
+    model_ids = _as_list(model_ids)
 
-    model_id = (model_id or "").strip()
+    if not test_files:
+        raise ValueError("Επίλεξε test file.")
 
-    if not model_id:
+    if not model_ids:
         raise ValueError("Επίλεξε model.")
 
     cfg_dict = cfg_dict or {}
@@ -161,11 +179,16 @@ def _build_cmd(
     argv = [
         sys.executable,
         "src/run_experiment.py",
-        "--test-file",
-        test_file,
     ]
 
-    argv += ["--model", model_id]
+    for test_file in test_files:
+        argv += ["--test-file", test_file]
+
+    if experiment_id:
+        argv += ["--experiment-id", experiment_id]
+
+    for model_id in model_ids:
+        argv += ["--model", model_id]
 
     for pid in ordered_personas:
         cfg = cfg_dict[pid]
@@ -193,63 +216,236 @@ def _build_cmd(
 
 
 def _preview_command(
-    test_file,
-    model_id,
+    test_files,
+    model_ids,
     temperature,
     memory_between,
     cfg_dict,
     order_list,
 ):
-    _, pretty = _build_cmd(
-        test_file,
-        model_id,
+    """
+    Every selected model and test goes into a single run (--model and
+    --test-file repeated): the runner loads each model once and asks it every
+    test in the same batched pass.
+    """
+    _argv, pretty = _build_cmd(
+        test_files,
+        model_ids,
         temperature,
         memory_between,
         cfg_dict,
         order_list,
     )
 
-    pretty_ml = pretty.replace(" --", "\n  --")
+    return "$ " + pretty.replace(" --", "\n  --")
+
+
+# In-process job queue of this UI (when no model daemon is running): every
+# session's runs go through it, so concurrent users share the loaded models
+# instead of each run loading them in its own process.
+UI_MAX_QUEUED = int(os.getenv("BIASMIND_UI_MAX_QUEUED") or 32)
+
+_QUEUE = {"queue": None}
+_QUEUE_LOCK = threading.Lock()
+
+# job refs in the UI: "job-3" (this UI's queue) or "daemon:job-3"
+_DAEMON_PREFIX = "daemon:"
+
+
+def _local_queue():
+    # two sessions clicking Run at once must not each build a queue (and load models)
+    with _QUEUE_LOCK:
+        if _QUEUE["queue"] is None:
+            _QUEUE["queue"] = JobQueue(
+                run_experiment_job,
+                max_queued=UI_MAX_QUEUED,
+                name="ui-jobs",
+            )
+        return _QUEUE["queue"]
+
+
+def _parse_job_ref(ref):
+    ref = (ref or "").strip()
+    if ref.startswith(_DAEMON_PREFIX):
+        return ref[len(_DAEMON_PREFIX):], DEFAULT_DAEMON_URL
+    return ref, None
+
+
+def _get_job(ref, since=0):
+    job_id, daemon_url = _parse_job_ref(ref)
+    if daemon_url is not None:
+        return get_job(daemon_url, job_id, since=since)
+    return _local_queue().job_dict(job_id, since=since)
+
+
+def _follow_local(job_id, poll_s=0.2):
+    offset = 0
+    while True:
+        job = _local_queue().job_dict(job_id, since=offset)
+        offset = job["output_end"]
+        yield job
+
+        if job["status"] in FINAL_STATUSES:
+            return
+        time.sleep(poll_s)
+
+
+def _progress_html(event, job=None):
+    parts = []
+
+    if job is not None:
+        if job["status"] == "queued":
+            parts.append(f"<div>Job <code>{html.escape(job['id'])}</code>: queued, position <b>{job['position']}</b></div>")
+        elif job["status"] != "running":
+            parts.append(f"<div>Job <code>{html.escape(job['id'])}</code>: <b>{html.escape(job['status'])}</b></div>")
+        elif job.get("cancel_requested"):
+            parts.append(f"<div>Job <code>{html.escape(job['id'])}</code>: cancelling...</div>")
 
-    return f"$ {pretty_ml}"
+    if event is None:
+        return "".join(parts)
+
+    done = int(event.get("done") or 0)
+    total = int(event.get("total") or 0)
+    pct = 100.0 * done / total if total else 0.0
+
+    stats = [
+        f"<b>{done}/{total}</b> items ({pct:.0f}%)",
+        f"{event.get('items_per_s') or 0:.2f} items/s",
+        f"{event.get('tokens_per_s') or 0:.1f} tokens/s",
+        f"ETA {format_eta(event.get('eta_s'))}",
+        f"parse failures: {event.get('parse_failures') or 0}",
+    ]
+    if event.get("model"):
+        stats.insert(1, f"model <code>{html.escape(str(event['model']))}</code>")
+    if event.get("event") == "end":
+        stats.append(f"status: <b>{html.escape(str(event.get('status')))}</b>")
+
+    parts.append(
+        f'<progress value="{done}" max="{max(total, 1)}" style="width:100%"></progress>'
+        f"<div>{' · '.join(stats)}</div>"
+    )
+    return "".join(parts)
 
 
 def _run_experiment(
-    test_file,
-    model_id,
+    test_files,
+    model_ids,
     temperature,
     memory_between,
     cfg_dict,
     order_list,
 ):
+    """
+    Generator: submits the experiment as a job and streams (progress bar, output, job ref)
+    until it ends. The job goes to the model daemon if one is running, else to this UI's
+    in-process queue. The runner gets --progress; its JSON-lines events drive the bar
+    and every other line goes to the output box.
+    """
     argv, _pretty = _build_cmd(
-        test_file,
-        model_id,
+        test_files,
+        model_ids,
         temperature,
         memory_between,
         cfg_dict,
         order_list,
     )
+    # the queue runs run_experiment.py's args in-process
+    argv = argv[2:] + ["--progress"]
 
-    proc = subprocess.run(
-        argv,
-        capture_output=True,
-        text=True,
-    )
+    log = []
+    last = {"event": None}
 
-    out = []
+    def _consume(line):
+        event = parse_progress_line(line)
+        if event is None:
+            log.append(line)
+        else:
+            last["event"] = event
 
-    if proc.stdout:
-        out.append("---- STDOUT ----\n")
-        out.append(proc.stdout)
+    try:
+        if daemon_status(DEFAULT_DAEMON_URL) is not None:
+            job = submit_or_fail(DEFAULT_DAEMON_URL, argv)
+            ref = _DAEMON_PREFIX + job["id"]
+            jobs = follow_job(DEFAULT_DAEMON_URL, job["id"])
+            log.append(f"---- DAEMON JOB {job['id']} ({DEFAULT_DAEMON_URL}) ----\n")
+        else:
+            job = _local_queue().submit(argv)
+            ref = job.id
+            jobs = _follow_local(job.id)
+            log.append(f"---- JOB {job.id} ----\n")
+    except QueueFullError as e:
+        yield "", f"---- NOT SUBMITTED ----\n{e}", ""
+        return
+
+    # the browser going away only stops this stream; the job keeps its place / log
+    pending = ""
+    for job in jobs:
+        pending += job["output"]
+        *lines, pending = pending.split("\n")
+        for line in lines:
+            _consume(line + "\n")
+        yield _progress_html(last["event"], job), "".join(log), ref
+
+    if pending:
+        _consume(pending)
+    if job["error"]:
+        log.append(f"\n---- {job['status'].upper()} ----\n{job['error']}")
+    log.append(f"\n(status: {job['status']})")
+
+    yield _progress_html(last["event"], job), "".join(log), ref
+
+
+def _cancel_run(ref):
+    job_id, daemon_url = _parse_job_ref(ref)
+    if not job_id:
+        return "No job to cancel."
+
+    if daemon_url is not None:
+        job = cancel_job(daemon_url, job_id)
+    else:
+        job = _local_queue().cancel(job_id)
+        job = None if job is None else _local_queue().job_dict(job.id)
+
+    if job is None:
+        return f"Unknown job: {html.escape(ref)}"
+    if job["status"] == "running":
+        return f"Cancelling {html.escape(ref)} after the current step. Resume later with --resume &lt;experiment_id&gt;."
+    return f"Job {html.escape(ref)}: {html.escape(job['status'])}"
+
+
+def _job_log(ref):
+    if not (ref or "").strip():
+        return "Enter a job id."
+    try:
+        job = _get_job(ref)
+    except OSError as e:
+        return f"Could not read job {ref}: {e}"
+    if job is None:
+        return f"Unknown job: {ref}"
 
-    if proc.stderr:
-        out.append("\n---- STDERR ----\n")
-        out.append(proc.stderr)
+    # progress events are for the bar, not the log
+    lines = [l for l in job["output"].splitlines(keepends=True) if parse_progress_line(l) is None]
+    return f"---- {ref} ({job['status']}) ----\n" + "".join(lines)
 
-    out.append(f"\n(exit code: {proc.returncode})")
 
-    return "".join(out)
+def _queue_status_text():
+    status = daemon_status(DEFAULT_DAEMON_URL)
+
+    if status is None:
+        daemon = (
+            f"Model daemon: not running ({DEFAULT_DAEMON_URL}).\n"
+            "Runs go to this UI's in-process queue (models stay loaded in the UI process).\n"
+            "Start a daemon with: python src/model_daemon.py"
+        )
+    else:
+        daemon = "Model daemon:\n" + json.dumps(status, indent=2, ensure_ascii=False)
+
+    queue = _QUEUE["queue"]
+    if queue is None:
+        return daemon + "\n\nUI queue: no jobs yet."
+
+    local = {**queue.status(), "jobs": queue.jobs()}
+    return daemon + "\n\nUI queue:\n" + json.dumps(local, indent=2, ensure_ascii=False)
 
 
 # ---------- UI ----------
@@ -263,16 +459,18 @@ def build_experiment_ui():
         gr.Markdown("## Experiment Runner")
 
         with gr.Row():
-            test_file = gr.Dropdown(
+            test_files_select = gr.Dropdown(
                 choices=test_files,
                 value=None,
-                label="Test file",
+                multiselect=True,
+                label="Test files",
             )
 
-            model_id = gr.Dropdown(
+            model_ids_select = gr.Dropdown(
                 choices=model_ids,
                 value=None,
-                label="Model",
+                multiselect=True,
+                label="Models",
             )
 
             temperature = gr.Number(
@@ -445,6 +643,21 @@ def build_experiment_ui():
                 variant="primary",
             )
 
+            btn_cancel = gr.Button("Cancel", variant="stop")
+
+            btn_status = gr.Button("Queue status")
+
+        with gr.Row():
+            job_ref = gr.Textbox(
+                label="Job",
+                placeholder="job id (filled in by Run)",
+                scale=3,
+            )
+
+            btn_log = gr.Button("Job log", scale=1)
+
+        progress_view = gr.HTML("")
+
         output = gr.Textbox(
             label="Output",
             lines=18,
@@ -454,8 +667,8 @@ def build_experiment_ui():
         btn_preview.click(
             fn=_preview_command,
             inputs=[
-                test_file,
-                model_id,
+                test_files_select,
+                model_ids_select,
                 temperature,
                 memory_between,
                 cfg_state,
@@ -467,13 +680,32 @@ def build_experiment_ui():
         btn_run.click(
             fn=_run_experiment,
             inputs=[
-                test_file,
-                model_id,
+                test_files_select,
+                model_ids_select,
                 temperature,
                 memory_between,
                 cfg_state,
                 order_state,
             ],
+            outputs=[progress_view, output, job_ref],
+        )
+
+        # the run stream ends by itself once the job reports "cancelled"
+        btn_cancel.click(
+            fn=_cancel_run,
+            inputs=[job_ref],
+            outputs=[progress_view],
+        )
+
+        btn_status.click(
+            fn=_queue_status_text,
+            inputs=[],
+            outputs=[output],
+        )
+
+        btn_log.click(
+            fn=_job_log,
+            inputs=[job_ref],
             outputs=[output],
         )
 
@@ -0,0 +1,66 @@
+import json
+import sys
+import types
+from pathlib import Path
+
+import pytest
+
+# τα modules του src/ εισάγονται script-style (όπως από τα entry points)
+sys.path.insert(0, str(Path(__file__).resolve().parents[1] / "src"))
+
+import llm_router  # noqa: E402
+from experiment_runner import ExperimentConfig, PersonaRunConfig, TestSpec  # noqa: E402
+from input_loader import ModelDef, PersonaDef  # noqa: E402
+
+
+@pytest.fixture
+def fake_provider(monkeypatch):
+    """
+    Provider "fake": απαντά fake_provider.reply και κρατά το seed κάθε κλήσης.
+    """
+    module = types.ModuleType("fake_provider")
+    module.reply = "3"
+    module.calls = []
+
+    def chat(model, messages, temperature=0.7, seed=None):
+        module.calls.append(seed)
+        return module.reply
+
+    module.chat = chat
+    monkeypatch.setitem(sys.modules, "fake_provider", module)
+    monkeypatch.setitem(llm_router.PROVIDER_CLIENTS, "fake", llm_router.ProviderClient("fake_provider", chat="chat"))
+    return module
+
+
+@pytest.fixture
+def make_config(tmp_path, monkeypatch):
+    """
+    ExperimentConfig(experiment_id, **overrides) για ένα test 3 items (κλίμακα 1-5)
+    στον fake provider: persona "neutral", 2 fresh runs. Τα results γράφονται στο tmp_path.
+    """
+    monkeypatch.chdir(tmp_path)
+
+    test_file = tmp_path / "test.json"
+    test_file.write_text(
+        json.dumps(
+            {
+                "test_name": "T",
+                "scale_min": 1,
+                "scale_max": 5,
+                "items": [{"id": i, "text": f"Item {i}", "trait": "A"} for i in range(1, 4)],
+            }
+        ),
+        encoding="utf-8",
+    )
+
+    def _make(experiment_id, **overrides):
+        fields = {
+            "experiment_id": experiment_id,
+            "tests": [TestSpec("T", test_file)],
+            "models": [ModelDef(id="fake-model", provider="fake", api_name="fake-model")],
+            "personas": [PersonaRunConfig(PersonaDef("neutral", "You are a person."), 2, "fresh")],
+            "memory_between_personas": "reset",
+        }
+        return ExperimentConfig(**(fields | overrides))
+
+    return _make
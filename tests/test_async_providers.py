@@ -0,0 +1,110 @@
+import asyncio
+import csv
+import itertools
+import threading
+import time
+from http.server import ThreadingHTTPServer
+
+import pytest
+
+import llm_router
+from experiment_runner import run_experiment
+from input_loader import ModelDef
+from mock_openai_server import _mock_reply, make_handler
+
+
+class _MockServer:
+    """
+    Ο mock_openai_server σε ephemeral port. Μετρά τα ταυτόχρονα requests και
+    απαντά 429 (Retry-After: 0) σε κάθε 4ο request και 500 σε κάθε 5ο.
+    """
+
+    def __init__(self, latency: float = 0.05):
+        self.lock = threading.Lock()
+        self.in_flight = 0
+        self.max_in_flight = 0
+        self.statuses = {200: 0, 429: 0, 500: 0}
+        requests = itertools.count(1)
+        server = self
+
+        def complete(request):
+            with server.lock:
+                server.in_flight += 1
+                server.max_in_flight = max(server.max_in_flight, server.in_flight)
+            try:
+                time.sleep(latency)
+                return _mock_reply(request.get("messages") or [], request.get("seed"))
+            finally:
+                with server.lock:
+                    server.in_flight -= 1
+
+        class Handler(make_handler(complete=complete)):
+            def do_POST(self):
+                with server.lock:
+                    n = next(requests)
+                    status = 429 if n % 4 == 0 else 500 if n % 5 == 0 else 200
+                    server.statuses[status] += 1
+
+                if status == 200:
+                    super().do_POST()
+                    return
+
+                self.rfile.read(int(self.headers.get("Content-Length") or 0))
+                headers = {"Retry-After": "0"} if status == 429 else None
+                self._send_json(status, {"error": {"message": f"mock {status}"}}, headers)
+
+        self.httpd = ThreadingHTTPServer(("127.0.0.1", 0), Handler)
+        self.httpd.daemon_threads = True
+        threading.Thread(target=self.httpd.serve_forever, daemon=True).start()
+
+    @property
+    def model(self) -> ModelDef:
+        base_url = f"http://127.0.0.1:{self.httpd.server_address[1]}/v1"
+        return ModelDef(id="mock", provider="openai_compatible", api_name="mock-model", base_url=base_url)
+
+    def close(self) -> None:
+        self.httpd.shutdown()
+        self.httpd.server_close()
+
+
+@pytest.fixture
+def mock_server():
+    server = _MockServer()
+    yield server
+    server.close()
+
+
+def test_acall_model_retries_and_respects_provider_concurrency(mock_server, monkeypatch):
+    monkeypatch.setitem(llm_router.PROVIDER_CONCURRENCY, "openai_compatible", 3)
+    messages = [{"role": "system", "content": "Answer from 1 to 5."}, {"role": "user", "content": "Item"}]
+
+    async def _run():
+        try:
+            return await asyncio.gather(
+                *(llm_router.acall_model(mock_server.model, messages, seed=i) for i in range(12))
+            )
+        finally:
+            await llm_router.aclose_clients()
+
+    replies = asyncio.run(_run())
+
+    assert all(reply in {"1", "2", "3", "4", "5"} for reply in replies)
+    assert 1 < mock_server.max_in_flight <= 3
+    # κάθε 429 / 500 ξαναστάλθηκε: 12 επιτυχίες συνολικά
+    assert mock_server.statuses[200] == 12
+    assert mock_server.statuses[429] > 0 and mock_server.statuses[500] > 0
+
+
+def test_async_lanes_stay_within_max_in_flight(make_config, mock_server):
+    config = make_config("async", models=[mock_server.model], seed=1, max_in_flight=4)
+    config.personas[0].runs = 8
+
+    run_experiment(config)
+
+    with open("results/raw/raw_async.csv", encoding="utf-8") as f:
+        rows = list(csv.DictReader(f))
+
+    assert len(rows) == 8 * 3
+    assert 1 < mock_server.max_in_flight <= 4
+    assert mock_server.statuses[200] == 8 * 3
+    assert mock_server.statuses[429] > 0 and mock_server.statuses[500] > 0
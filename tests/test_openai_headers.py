@@ -0,0 +1,27 @@
+from input_loader import ModelDef
+from openai_chat_client import _headers
+
+
+def test_openai_key_is_sent_only_to_openai(monkeypatch):
+    monkeypatch.setenv("OPENAI_API_KEY", "sk-real")
+
+    openai = ModelDef(id="gpt", provider="openai", api_name="gpt-4o-mini")
+    local = ModelDef(id="local", provider="openai_compatible", api_name="qwen", base_url="http://127.0.0.1:8000/v1")
+
+    assert _headers(openai)["Authorization"] == "Bearer sk-real"
+    assert "Authorization" not in _headers(local)
+
+
+def test_openai_compatible_uses_its_own_key_env(monkeypatch):
+    monkeypatch.setenv("OPENAI_API_KEY", "sk-real")
+    monkeypatch.setenv("LOCAL_SERVER_KEY", "local-key")
+
+    local = ModelDef(
+        id="local",
+        provider="openai_compatible",
+        api_name="qwen",
+        base_url="http://127.0.0.1:8000/v1",
+        api_key_env="LOCAL_SERVER_KEY",
+    )
+
+    assert _headers(local)["Authorization"] == "Bearer local-key"
@@ -0,0 +1,24 @@
+from experiment_runner import run_experiment
+from progress import parse_progress_line
+
+
+def _end_event(output):
+    events = [e for e in map(parse_progress_line, output.splitlines()) if e]
+    return [e for e in events if e["event"] == "end"][-1]
+
+
+def test_resume_counts_journal_steps_as_replayed_only(make_config, fake_provider, capsys):
+    # καμία απάντηση δεν έχει αριθμό: κάθε βήμα είναι parse failure
+    fake_provider.reply = "It depends."
+
+    run_experiment(make_config("resumed", seed=1, progress=True))
+    first = _end_event(capsys.readouterr().out)
+    assert (first["done"], first["replayed"], first["parse_failures"]) == (6, 0, 6)
+
+    run_experiment(make_config("resumed", seed=1, progress=True, resume=True))
+    resumed = _end_event(capsys.readouterr().out)
+
+    # τα βήματα του journal δεν ξανατρέχουν: ούτε parse failures ούτε items/sec
+    assert len(fake_provider.calls) == 6
+    assert (resumed["done"], resumed["replayed"], resumed["parse_failures"]) == (6, 6, 0)
+    assert resumed["items_per_s"] == 0
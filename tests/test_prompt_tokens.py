@@ -0,0 +1,70 @@
+from prompt_format import PromptTokens, _messages_to_prompt
+
+
+class MergingTokenizer:
+    """
+    Toy BPE-like tokenizer: characters, plus ".\n\n" merged into a single token,
+    so a system prompt ending in "." tokenizes differently across the boundary
+    with the separator that follows it.
+    """
+
+    BOS = 1
+    MERGES = {".\n\n": 1000}
+
+    def __init__(self):
+        self.calls = []
+
+    def __call__(self, text, add_special_tokens=True):
+        self.calls.append(text)
+        ids = [self.BOS] if add_special_tokens else []
+        i = 0
+        while i < len(text):
+            for merge, token_id in self.MERGES.items():
+                if text.startswith(merge, i):
+                    ids.append(token_id)
+                    i += len(merge)
+                    break
+            else:
+                ids.append(ord(text[i]) + 2)
+                i += 1
+        return {"input_ids": ids}
+
+
+SCALE = (1, 5)
+
+
+def _messages(system, user="I see myself as someone who is reserved"):
+    return [{"role": "system", "content": system}, {"role": "user", "content": user}]
+
+
+def _full_ids(tokenizer, messages):
+    return tokenizer(_messages_to_prompt(messages, SCALE), add_special_tokens=True)["input_ids"]
+
+
+def test_new_segment_text_with_merging_boundary_is_verified():
+    tokenizer = MergingTokenizer()
+    tokens = PromptTokens()
+
+    # first persona: no merge at the system / user boundary, the lead scheme holds
+    first = _messages("You are a farmer")
+    ids, _stable = tokens.encode("m", tokenizer, first, SCALE)
+    assert ids == _full_ids(tokenizer, first)
+    assert tokens.scheme("m") == "lead"
+
+    # same segment kinds, but this system text ends in "." and merges with "\n\n"
+    second = _messages("You are a doctor.")
+    ids, _stable = tokens.encode("m", tokenizer, second, SCALE)
+    assert ids == _full_ids(tokenizer, second)
+    assert tokens.scheme("m") == "trail"
+
+
+def test_verified_prompt_is_not_tokenized_in_full_again():
+    tokenizer = MergingTokenizer()
+    tokens = PromptTokens()
+    messages = _messages("You are a farmer")
+    full_prompt = _messages_to_prompt(messages, SCALE)
+
+    tokens.encode("m", tokenizer, messages, SCALE)
+    tokens.encode("m", tokenizer, messages, SCALE)
+
+    assert tokenizer.calls.count(full_prompt) == 1
@@ -0,0 +1,43 @@
+import csv
+
+from experiment_runner import run_experiment
+
+
+def _row_seeds(experiment_id):
+    with open(f"results/raw/raw_{experiment_id}.csv", encoding="utf-8") as f:
+        return [row["seed"] for row in csv.DictReader(f)]
+
+
+def test_rerun_without_seed_at_temperature_zero_hits_cache(make_config, fake_provider, capsys):
+    run_experiment(make_config("first", temperature=0.0, cache_mode="readwrite"))
+    assert len(fake_provider.calls) == 6
+
+    # νέο τυχαίο seed, αλλά σε temperature 0 η απάντηση δεν εξαρτάται από αυτό
+    run_experiment(make_config("second", temperature=0.0, cache_mode="readwrite"))
+    assert len(fake_provider.calls) == 6
+    assert "Response cache: 6 hits, 0 misses" in capsys.readouterr().out
+
+
+def test_rerun_without_seed_keys_on_sample_index(make_config, fake_provider, capsys):
+    run_experiment(make_config("first", temperature=0.7, cache_mode="readwrite"))
+    run_experiment(make_config("second", temperature=0.7, cache_mode="readwrite"))
+
+    assert len(fake_provider.calls) == 6
+    assert "Response cache: 6 hits, 0 misses" in capsys.readouterr().out
+
+
+def test_cache_served_rows_keep_the_generating_seed(make_config, fake_provider):
+    run_experiment(make_config("first", temperature=0.7, cache_mode="readwrite"))
+    run_experiment(make_config("second", temperature=0.7, cache_mode="readwrite"))
+
+    # το second έχει δικό του τυχαίο seed, αλλά οι απαντήσεις του είναι του first
+    assert sorted(_row_seeds("first")) == sorted(str(seed) for seed in fake_provider.calls)
+    assert _row_seeds("second") == _row_seeds("first")
+
+
+def test_explicit_seed_is_part_of_the_key(make_config, fake_provider):
+    run_experiment(make_config("first", temperature=0.7, seed=1, cache_mode="readwrite"))
+    run_experiment(make_config("second", temperature=0.7, seed=2, cache_mode="readwrite"))
+    run_experiment(make_config("third", temperature=0.7, seed=1, cache_mode="readwrite"))
+
+    assert len(fake_provider.calls) == 12
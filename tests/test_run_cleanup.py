@@ -0,0 +1,21 @@
+import pytest
+
+import experiment_runner
+from experiment_runner import run_experiment
+
+
+def test_journal_and_cache_close_when_the_provider_fails(make_config, fake_provider, monkeypatch):
+    closed = []
+    for cls in (experiment_runner.ExperimentJournal, experiment_runner.ResponseCache):
+        close = cls.close
+        monkeypatch.setattr(cls, "close", lambda self, _close=close: closed.append(type(self).__name__) or _close(self))
+
+    def chat(model, messages, temperature=0.7, seed=None):
+        raise RuntimeError("provider down")
+
+    fake_provider.chat = chat
+
+    with pytest.raises(RuntimeError, match="provider down"):
+        run_experiment(make_config("failing", cache_mode="readwrite"))
+
+    assert sorted(closed) == ["ExperimentJournal", "ResponseCache"]
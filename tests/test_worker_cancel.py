@@ -0,0 +1,38 @@
+import time
+from types import SimpleNamespace
+
+from job_queue import FINAL_STATUSES, JobQueue, raise_if_cancelled
+from parallel_runner import open_lane_pool, run_shards
+
+
+def _slow_shard(lanes):
+    # ~10s αν δεν ακυρωθεί
+    for _ in range(200):
+        raise_if_cancelled()
+        time.sleep(0.05)
+    return lanes, [], None
+
+
+def test_cancel_stops_running_worker_shards():
+    elapsed = {}
+
+    def run(job):
+        started = time.monotonic()
+        try:
+            with open_lane_pool(2, torch_threads=1) as pool:
+                shards = [[SimpleNamespace(index=0)], [SimpleNamespace(index=1)]]
+                list(run_shards(pool, _slow_shard, shards))
+        finally:
+            # μαζί με το shutdown του pool, που περιμένει τους workers
+            elapsed["s"] = time.monotonic() - started
+
+    queue = JobQueue(run, echo=False)
+    job = queue.submit([])
+    time.sleep(1.5)
+    queue.cancel(job.id)
+
+    while job.status not in FINAL_STATUSES:
+        time.sleep(0.05)
+
+    assert job.status == "cancelled"
+    assert elapsed["s"] < 6